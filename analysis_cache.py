@@ -0,0 +1,190 @@
+import os
+import time
+import json
+import pickle
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+
+def _normalize_text(text):
+    """Collapse whitespace and case so trivial edits map to the same key"""
+    if not text:
+        return ""
+    return " ".join(text.split()).lower()
+
+
+def make_analysis_key(resume_content, job_role, job_description, model_name, prompt_version):
+    """
+    Build a content-addressed cache key for an analysis request
+    """
+    payload = json.dumps([
+        _normalize_text(resume_content),
+        _normalize_text(job_role),
+        _normalize_text(job_description),
+        model_name,
+        prompt_version,
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Two-tier cache: a bounded in-memory LRU in front of an optional SQLite file.
+    Entries expire after ``ttl`` seconds; both tiers evict oldest entries first
+    once their size limit is reached.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600, db_path=None, max_db_entries=5000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_db_entries = max_db_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0,
+        }
+
+        if self.db_path:
+            self._init_db()
+
+    @classmethod
+    def from_env(cls, prefix='ANALYSIS_CACHE'):
+        """Create a cache configured from environment variables"""
+        return cls(
+            max_entries=int(os.environ.get(f'{prefix}_SIZE', 256)),
+            ttl=int(os.environ.get(f'{prefix}_TTL', 3600)),
+            db_path=os.environ.get(f'{prefix}_DB') or None,
+            max_db_entries=int(os.environ.get(f'{prefix}_DB_SIZE', 5000)),
+        )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_created ON cache(created_at)")
+        except sqlite3.Error as e:
+            logging.warning(f"Disabling on-disk cache at {self.db_path}: {e}")
+            self.db_path = None
+
+    def _expired(self, created_at):
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.stats['hits'] += 1
+                    self.stats['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+        value = self._get_from_disk(key)
+        with self._lock:
+            if value is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['hits'] += 1
+            self.stats['disk_hits'] += 1
+            self._store_in_memory(key, value, time.time())
+        return value
+
+    def set(self, key, value):
+        """Store value under key in every configured tier"""
+        now = time.time()
+        with self._lock:
+            self._store_in_memory(key, value, now)
+            self.stats['sets'] += 1
+        self._set_on_disk(key, value, now)
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                logging.warning(f"Cache delete failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM cache")
+            except sqlite3.Error as e:
+                logging.warning(f"Cache clear failed: {e}")
+
+    def _store_in_memory(self, key, value, created_at):
+        # Caller must hold self._lock
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _get_from_disk(self, key):
+        if not self.db_path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if self._expired(row[1]):
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None
+                return pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError) as e:
+            logging.warning(f"Cache read failed: {e}")
+            return None
+
+    def _set_on_disk(self, key, value, created_at):
+        if not self.db_path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), created_at)
+                )
+                if self.ttl > 0:
+                    conn.execute("DELETE FROM cache WHERE created_at < ?", (created_at - self.ttl,))
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_db_entries,)
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"Cache write failed: {e}")
+
+    def get_stats(self):
+        """Return a snapshot of hit/miss counters and current sizes"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
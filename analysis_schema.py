@@ -0,0 +1,98 @@
+import json
+
+ANALYSIS_LIST_FIELDS = ('missing_skills', 'redundant_language', 'formatting_recommendations')
+
+# JSON shape requested from the model in structured-output mode
+ANALYSIS_JSON_SCHEMA = """{
+  "missing_skills": ["5-8 specific skills, keywords or qualifications missing for this role"],
+  "section_feedback": {
+%s
+  },
+  "redundant_language": ["weak or overused phrase - suggested alternative"],
+  "formatting_recommendations": ["specific formatting or clarity recommendation"]%s
+}"""
+
+IMPROVED_RESUME_JSON_FIELD = """,
+  "improved_resume": "the complete improved resume as plain text with newlines"\
+"""
+
+
+class AnalysisSchemaError(ValueError):
+    """Raised when a structured response does not match the analysis schema"""
+    pass
+
+
+DEFAULT_FEEDBACK_SECTIONS = ("Education", "Experience", "Skills", "Overall Structure")
+
+
+def json_schema_description(include_improved_resume=False, feedback_sections=None):
+    """Schema text for the prompt, with one feedback key per section title"""
+    feedback = ',\n'.join(f'    "{title}": "feedback and suggestions"'
+                          for title in (feedback_sections or DEFAULT_FEEDBACK_SECTIONS))
+    return ANALYSIS_JSON_SCHEMA % (feedback, IMPROVED_RESUME_JSON_FIELD if include_improved_resume else "")
+
+
+def _strip_code_fence(text):
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        if text.rstrip().endswith('```'):
+            text = text.rstrip()[:-3]
+    return text
+
+
+def _string_list(data, field):
+    value = data.get(field, [])
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        raise AnalysisSchemaError(f"'{field}' must be a list")
+    items = []
+    for item in value:
+        if not isinstance(item, (str, int, float)):
+            raise AnalysisSchemaError(f"'{field}' must contain only strings")
+        item = str(item).strip()
+        if item:
+            items.append(item)
+    return items
+
+
+def parse_structured_response(response_text, require_improved_resume=False):
+    """
+    Parse and validate a JSON analysis response into the analysis dict shape
+    used by results.html. Raises AnalysisSchemaError on any mismatch.
+    """
+    try:
+        data = json.loads(_strip_code_fence(response_text))
+    except (json.JSONDecodeError, TypeError) as e:
+        raise AnalysisSchemaError(f"Response is not valid JSON: {e}")
+
+    if not isinstance(data, dict):
+        raise AnalysisSchemaError("Response must be a JSON object")
+
+    analysis = {field: _string_list(data, field) for field in ANALYSIS_LIST_FIELDS}
+
+    section_feedback = data.get('section_feedback', {})
+    if not isinstance(section_feedback, dict):
+        raise AnalysisSchemaError("'section_feedback' must be an object")
+    analysis['section_feedback'] = {}
+    for section, feedback in section_feedback.items():
+        # Models sometimes return bullet lists instead of a single string
+        if isinstance(feedback, list):
+            feedback = '\n'.join(str(item) for item in feedback)
+        if not isinstance(feedback, str):
+            raise AnalysisSchemaError(f"Feedback for '{section}' must be text")
+        if feedback.strip():
+            analysis['section_feedback'][str(section)] = feedback.strip()
+
+    if not analysis['missing_skills'] and not analysis['section_feedback']:
+        raise AnalysisSchemaError("Response has neither missing skills nor section feedback")
+
+    if require_improved_resume:
+        improved_resume = data.get('improved_resume')
+        if not isinstance(improved_resume, str) or not improved_resume.strip():
+            raise AnalysisSchemaError("'improved_resume' must be non-empty text")
+        analysis['improved_resume'] = improved_resume.strip()
+
+    analysis['raw_response'] = response_text
+    return analysis
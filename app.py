@@ -1,10 +1,18 @@
 import os
+import json
+import time
 import logging
-from flask import Flask
+from flask import Flask, request, g
 from werkzeug.middleware.proxy_fix import ProxyFix
+import metrics
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; LOG_LEVEL=DEBUG restores the old verbose output
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+request_logger = logging.getLogger('resume.requests')
+REQUEST_LOG_LEVEL = logging.getLevelName(os.environ.get('REQUEST_LOG_LEVEL', 'INFO').upper())
+if not isinstance(REQUEST_LOG_LEVEL, int):
+    REQUEST_LOG_LEVEL = logging.INFO
 
 # Create Flask app
 app = Flask(__name__)
@@ -14,9 +22,50 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = 'uploads'
+# Uploads up to this size are parsed straight from memory; larger ones are spooled to disk
+app.config['UPLOAD_SPOOL_THRESHOLD'] = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', 4 * 1024 * 1024))
+# Run parsing and analysis on a background job queue instead of the request thread
+app.config['ASYNC_ANALYSIS'] = os.environ.get('ASYNC_ANALYSIS', 'true').lower() in ('1', 'true', 'yes')
+# Stream the improved resume to the results page over SSE instead of waiting for it
+app.config['STREAM_IMPROVED_RESUME'] = os.environ.get('STREAM_IMPROVED_RESUME', 'false').lower() in ('1', 'true', 'yes')
+
+# Re-review only the edited sections when a resume is resubmitted for the same job
+app.config['INCREMENTAL_ANALYSIS'] = os.environ.get('INCREMENTAL_ANALYSIS', 'true').lower() in ('1', 'true', 'yes')
+# Above this share of edited text a resubmission gets a full analysis
+app.config['INCREMENTAL_MAX_CHANGE'] = float(os.environ.get('INCREMENTAL_MAX_CHANGE', 0.5))
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    metrics.start_timings()
+
+@app.after_request
+def log_request_timing(response):
+    """Record request latency and emit one structured log line per request"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or 'unmatched'
+    metrics.REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method,
+                                    status=response.status_code)
+    stages = metrics.finish_timings()
+    
+    if request_logger.isEnabledFor(REQUEST_LOG_LEVEL):
+        # Streaming responses are timed up to the first byte, not to completion
+        request_logger.log(REQUEST_LOG_LEVEL, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 2),
+            'stages_ms': stages,
+        }))
+    return response
+
 # Import routes after app creation to avoid circular imports
 from routes import *
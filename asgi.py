@@ -0,0 +1,232 @@
+"""
+ASGI entry point. One event loop per worker process runs every analysis job
+and improved-resume stream as a task, awaiting the model through the SDK's
+async API, so a worker holds hundreds of in-flight analyses instead of one
+per thread. PDF parsing runs on a small CPU thread pool; the remaining Flask
+routes (forms, job polling, downloads, batch) are served on a bounded thread
+pool through WSGIBridge. Jobs and results live in the worker's memory, so
+run one worker per instance and scale out with more instances.
+
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker --workers 1
+    uvicorn asgi:app --port 5000
+"""
+import io
+import os
+import re
+import sys
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# One worker keeps many model calls in flight; LLM_RATE_PER_SECOND still caps the request rate
+os.environ.setdefault('LLM_MAX_IN_FLIGHT', '256')
+
+from app import app as flask_app
+import routes
+import metrics
+
+# Analyses always go through the job queue so they can run on the event loop
+flask_app.config['ASYNC_ANALYSIS'] = True
+
+_STREAM_PATH = re.compile(r'^/stream_improved_resume/([^/]+)$')
+_SSE_HEADERS = [(b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no')]
+
+
+class WSGIBridge:
+    """
+    Serves a WSGI app from an ASGI server, one request per thread of a
+    bounded pool. Response chunks are sent as the app yields them, and each
+    send waits for the server, so a slow client holds back its own thread only.
+    """
+
+    def __init__(self, wsgi_app, max_threads=32, max_body=None):
+        self.wsgi_app = wsgi_app
+        self.max_body = max_body
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        body = await self._read_body(receive)
+        if body is None:
+            await _send_plain(send, 413, b'Request Entity Too Large')
+            return
+
+        loop = asyncio.get_running_loop()
+        response = {'started': False}
+        try:
+            await loop.run_in_executor(self._executor, self._run, self._environ(scope, body), send, loop, response)
+        except Exception as e:
+            logging.error(f"Unhandled error serving {scope['path']}: {e}")
+            if not response['started']:
+                await _send_plain(send, 500, b'Internal Server Error')
+
+    async def _read_body(self, receive):
+        """The whole request body, or None once it exceeds max_body"""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if self.max_body and size > self.max_body:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    def _environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client')
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1] if server[1] is not None else 80),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0] if client else '',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', ()):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_LENGTH':
+                continue
+            key = name if name == 'CONTENT_TYPE' else f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _run(self, environ, send, loop, response):
+        # Runs on a pool thread; every ASGI send is handed back to the event loop
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response['started']:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+            return write
+
+        def start():
+            if not response['started']:
+                response['started'] = True
+                send_sync({'type': 'http.response.start', 'status': response['status'],
+                           'headers': response['headers']})
+
+        def write(data):
+            start()
+            if data:
+                send_sync({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+        iterable = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in iterable:
+                write(chunk)
+            start()
+            send_sync({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+async def _send_plain(send, status, body):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class ResumeReviewerASGI:
+    """
+    The app under an ASGI server: improved-resume streams are served on the
+    event loop, everything else by Flask through the WSGI bridge. Startup
+    attaches the loop to the job queue so analyses run on it.
+    """
+
+    def __init__(self, flask_app, wsgi_threads=32):
+        self.flask_app = flask_app
+        self.wsgi = WSGIBridge(flask_app, max_threads=wsgi_threads,
+                               max_body=flask_app.config.get('MAX_CONTENT_LENGTH'))
+
+    @classmethod
+    def from_env(cls, flask_app):
+        return cls(flask_app, wsgi_threads=int(os.environ.get('ASGI_WSGI_THREADS', 32)))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        # Servers run with --lifespan off never send startup
+        if not routes.job_queue.has_event_loop():
+            routes.job_queue.attach_loop(asyncio.get_running_loop())
+
+        match = _STREAM_PATH.match(scope['path'])
+        if match and scope['method'] == 'GET':
+            await self._stream_improved_resume(match.group(1), receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                routes.job_queue.attach_loop(asyncio.get_running_loop())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                routes.job_queue.attach_loop(None)
+                self.wsgi.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _stream_improved_resume(self, stream_id, receive, send):
+        """routes.stream_improved_resume, without holding a thread for the length of the stream"""
+        started = time.perf_counter()
+        events = routes.improved_resume_events(stream_id)
+
+        async def pump():
+            await send({'type': 'http.response.start', 'status': 200, 'headers': _SSE_HEADERS})
+            # Timed to the first byte, like Flask's streaming responses
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint='stream_improved_resume',
+                                            method='GET', status=200)
+            async for event in events:
+                await send({'type': 'http.response.body', 'body': event.encode('utf-8'), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        async def wait_for_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        # Stop generating (and free the model slot) as soon as the browser goes away
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(wait_for_disconnect())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await events.aclose()
+
+
+app = ResumeReviewerASGI.from_env(flask_app)
@@ -0,0 +1,326 @@
+"""
+Bulk resume screening: analyze a directory or zip of PDF/DOCX/TXT resumes against a
+single job role and description, streaming one result per resume as JSONL or CSV.
+
+Usage:
+    python batch_analyzer.py resumes.zip --job-role "Data Engineer" \
+        --job-description-file posting.txt --format csv --output results.csv
+"""
+import os
+import io
+import csv
+import sys
+import json
+import time
+import hashlib
+import logging
+import zipfile
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+BATCH_EXTENSIONS = {'pdf', 'docx', 'txt'}
+
+CSV_FIELDS = [
+    'file', 'status', 'error', 'elapsed_seconds', 'rank_score', 'match_score', 'missing_keywords', 'missing_skills',
+    'redundant_language', 'formatting_recommendations', 'improved_resume'
+]
+
+
+class RateLimiter:
+    """Spaces calls evenly so no more than ``rate`` start per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _has_batch_extension(name):
+    return '.' in name and name.rsplit('.', 1)[1].lower() in BATCH_EXTENSIONS
+
+
+def iter_resume_files(source, max_file_bytes=None, max_total_bytes=None, max_files=None):
+    """
+    Lazily yield (name, opener) pairs for every PDF/DOCX/TXT resume in a directory
+    tree or zip archive. opener() returns the file's bytes. A zip is checked
+    against the limits before anything is decompressed: too many resumes or
+    too many bytes in total rejects it, and the opener of a resume larger than
+    ``max_file_bytes`` raises instead of reading it.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for filename in sorted(files):
+                if _has_batch_extension(filename):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, source), _file_opener(path)
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            entries = [info for info in archive.infolist()
+                       if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+                       and _has_batch_extension(info.filename)]
+        if max_files and len(entries) > max_files:
+            raise ValueError(f"Archive holds {len(entries)} resumes; the limit is {max_files}")
+        total_bytes = sum(info.file_size for info in entries)
+        if max_total_bytes and total_bytes > max_total_bytes:
+            raise ValueError(f"Archive expands to {total_bytes} bytes; the limit is {max_total_bytes}")
+        for info in entries:
+            yield info.filename, _zip_opener(source, info.filename, max_file_bytes)
+    else:
+        raise ValueError(f"Batch source must be a directory or zip file: {source}")
+
+
+def _file_opener(path):
+    def opener():
+        with open(path, 'rb') as f:
+            return f.read()
+    return opener
+
+
+def _zip_opener(archive_path, name, max_bytes=None):
+    # Each worker opens its own handle; ZipFile objects are not thread-safe
+    def opener():
+        with zipfile.ZipFile(archive_path) as archive:
+            info = archive.getinfo(name)
+            # zipfile stops decompressing at the declared size, so checking it bounds the read
+            if max_bytes and info.file_size > max_bytes:
+                raise ValueError(f"File expands to {info.file_size} bytes; the limit is {max_bytes}")
+            return archive.read(info)
+    return opener
+
+
+class BatchAnalyzer:
+    """
+    Parses resumes in parallel and dispatches their analyses through a bounded
+    worker pool. Only ``max_in_flight`` resumes are held in memory at a time,
+    so memory use stays flat however large the batch is. With a shortlist,
+    every resume is vectorized into ``ranking_index`` (a throwaway in-memory
+    one when None) and only the best matches reach the model.
+    """
+
+    def __init__(self, analyzer, pdf_parser, workers=8, max_concurrent_analyses=4,
+                 rate_per_second=2.0, max_in_flight=None, ranking_index=None, ingestor=None,
+                 max_file_bytes=16 * 1024 * 1024, max_total_bytes=256 * 1024 * 1024, max_files=1000):
+        from ingestion import Ingestor
+        self.analyzer = analyzer
+        self.pdf_parser = pdf_parser
+        self.ingestor = ingestor if ingestor is not None else Ingestor.from_env(pdf_parser)
+        self.ranking_index = ranking_index
+        self.workers = workers
+        self.max_in_flight = max_in_flight or workers * 2
+        self._analysis_slots = threading.BoundedSemaphore(max_concurrent_analyses)
+        self._rate_limiter = RateLimiter(rate_per_second)
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_files = max_files
+
+    @classmethod
+    def from_env(cls, analyzer, pdf_parser):
+        """Create a batch analyzer configured from environment variables"""
+        from ranking_index import RankingIndex
+        return cls(
+            analyzer,
+            pdf_parser,
+            workers=int(os.environ.get('BATCH_WORKERS', 8)),
+            max_concurrent_analyses=int(os.environ.get('BATCH_MAX_CONCURRENT_ANALYSES', 4)),
+            rate_per_second=float(os.environ.get('BATCH_RATE_PER_SECOND', 2.0)),
+            ranking_index=RankingIndex.from_env(),
+            max_file_bytes=int(os.environ.get('BATCH_MAX_FILE_BYTES', 16 * 1024 * 1024)),
+            max_total_bytes=int(os.environ.get('BATCH_MAX_TOTAL_BYTES', 256 * 1024 * 1024)),
+            max_files=int(os.environ.get('BATCH_MAX_FILES', 1000)),
+        )
+
+    def run(self, source, job_role, job_description="", shortlist=None):
+        """
+        Yield one result dict per resume, in completion order. With
+        ``shortlist``, only that many top-ranked resumes are analyzed; the rest
+        are yielded first with status 'skipped' and their rank_score.
+        """
+        if shortlist:
+            files = yield from self._shortlist(source, job_role, job_description, shortlist)
+        else:
+            files = ((name, opener, {}) for name, opener in self._iter_files(source))
+        pending = set()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as executor:
+            for name, opener, extra in files:
+                if len(pending) >= self.max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(executor.submit(self._process_one, name, opener, job_role, job_description, extra))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def check_source(self, source):
+        """Raise ValueError when a source is not a directory or zip, or a zip exceeds the limits"""
+        for _ in self._iter_files(source):
+            break
+
+    def _iter_files(self, source):
+        return iter_resume_files(source, self.max_file_bytes, self.max_total_bytes, self.max_files)
+
+    def _shortlist(self, source, job_role, job_description, top_n):
+        """
+        Generator that indexes every resume, yields error and 'skipped' results
+        for the ones that did not make the cut, and returns the (name, opener,
+        extra) entries of the top ``top_n`` resumes, best first. Resumes are
+        parsed again when analyzed, so no text is held between the two passes.
+        """
+        from ranking_index import RankingIndex, KIND_RESUME
+
+        index = self.ranking_index if self.ranking_index is not None else RankingIndex()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch-index") as executor:
+            indexed = list(executor.map(lambda entry: self._index_one(index, *entry), self._iter_files(source)))
+
+        doc_ids = {doc_id for _, _, doc_id, _ in indexed if doc_id}
+        query = "\n".join(part for part in (job_role, job_description) if part)
+        scores = {match['id']: match['score']
+                  for match in index.rank(query, KIND_RESUME, top_n=len(doc_ids), ids=doc_ids)}
+        logging.info(f"Ranked {len(doc_ids)} resumes in {time.perf_counter() - started:.2f}s; "
+                     f"analyzing the top {min(top_n, len(doc_ids))}")
+
+        ranked = []
+        for name, opener, doc_id, error in indexed:
+            if error:
+                yield {'file': name, 'status': 'error', 'error': error, 'elapsed_seconds': 0.0}
+            else:
+                ranked.append((scores.get(doc_id, 0.0), name, opener))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+
+        for score, name, _ in ranked[top_n:]:
+            yield {'file': name, 'status': 'skipped', 'error': None, 'elapsed_seconds': 0.0, 'rank_score': score}
+        return [(name, opener, {'rank_score': score}) for score, name, opener in ranked[:top_n]]
+
+    def _index_one(self, index, name, opener):
+        """Add one resume to the index; returns (name, opener, doc_id, error)"""
+        from ranking_index import KIND_RESUME
+
+        try:
+            data = opener()
+            source_sha = hashlib.sha256(data).hexdigest()
+            doc_id = index.id_for_source(source_sha)
+            if doc_id is None:
+                resume_content = self._extract_text(name, data)
+                if not resume_content.strip():
+                    raise ValueError("No text content found")
+                doc_id = index.add(resume_content, kind=KIND_RESUME, name=name, source_sha=source_sha)
+            return name, opener, doc_id, None
+        except Exception as e:
+            logging.error(f"Indexing failed for {name}: {e}")
+            return name, opener, None, str(e)
+
+    def _process_one(self, name, opener, job_role, job_description, extra=None):
+        started = time.perf_counter()
+        result = {'file': name, 'status': 'ok', 'error': None}
+        result.update(extra or {})
+
+        try:
+            resume_content = self._extract_text(name, opener())
+            if not resume_content.strip():
+                raise ValueError("No text content found")
+
+            with self._analysis_slots:
+                self._rate_limiter.acquire()
+                analysis = self.analyzer.analyze_resume(resume_content, job_role, job_description)
+
+            analysis.pop('raw_response', None)
+            result.update(analysis)
+        except Exception as e:
+            logging.error(f"Batch analysis failed for {name}: {e}")
+            result['status'] = 'error'
+            result['error'] = str(e)
+
+        result['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return result
+
+    def _extract_text(self, name, data):
+        return self.ingestor.ingest(data, name)['text']
+
+
+def write_jsonl(results, out):
+    """Write each result as one JSON line, flushing as they arrive"""
+    for result in results:
+        out.write(json.dumps(result) + '\n')
+        out.flush()
+
+
+def _csv_row(result):
+    # Keyword match columns come from the nested local analysis
+    local_analysis = result.get('local_analysis') or {}
+    row = {}
+    for field in CSV_FIELDS:
+        value = result.get(field, local_analysis.get(field))
+        if isinstance(value, list):
+            value = '; '.join(value)
+        row[field] = '' if value is None else value
+    return row
+
+
+def write_csv(results, out):
+    """Write results as CSV rows, flushing as they arrive"""
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for result in results:
+        writer.writerow(_csv_row(result))
+        out.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many resumes against one job description")
+    parser.add_argument('source', help="Directory or zip file of PDF/DOCX/TXT resumes")
+    parser.add_argument('--job-role', required=True, help="Target job role")
+    parser.add_argument('--job-description', default="", help="Job description text")
+    parser.add_argument('--job-description-file', help="Read the job description from a file")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('--output', default='-', help="Output file (default: stdout)")
+    parser.add_argument('--workers', type=int, default=8, help="Parallel parse/analysis workers")
+    parser.add_argument('--max-concurrent', type=int, default=4, help="Max Gemini analyses in flight")
+    parser.add_argument('--rate', type=float, default=2.0, help="Max analyses started per second")
+    parser.add_argument('--shortlist', type=int, help="Only analyze this many best-matching resumes")
+    parser.add_argument('--index', default=os.environ.get('RANKING_INDEX_PATH'),
+                        help="Persistent ranking index directory (default: RANKING_INDEX_PATH)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    job_description = args.job_description
+    if args.job_description_file:
+        with open(args.job_description_file, 'r', encoding='utf-8') as f:
+            job_description = f.read()
+
+    from gemini_service import GeminiResumeAnalyzer
+    from pdf_parser import PDFParser
+    from ranking_index import RankingIndex
+
+    ranking_index = RankingIndex(args.index) if args.index else None
+    batch = BatchAnalyzer(GeminiResumeAnalyzer(), PDFParser(), workers=args.workers,
+                          max_concurrent_analyses=args.max_concurrent, rate_per_second=args.rate,
+                          ranking_index=ranking_index)
+    results = batch.run(args.source, args.job_role, job_description, shortlist=args.shortlist)
+    writer = write_csv if args.format == 'csv' else write_jsonl
+
+    if args.output == '-':
+        writer(results, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as out:
+            writer(results, out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Compare the two ways of serving the app under many concurrent users: the
+Procfile's ``gunicorn main:app`` (sync worker, analyses on the job queue's
+thread pool) and ``gunicorn asgi:app -k uvicorn.workers.UvicornWorker``
+(analyses as tasks on the worker's event loop). Each server runs in its own
+subprocess against the stub LLM backend; every simulated user submits a
+resume, then polls its job until the analysis is done.
+
+The app's default rate limit (LLM_RATE_PER_SECOND) applies unless --llm-rate
+overrides it; --llm-rate 0 turns it off to measure the servers alone. The
+analysis cache is always off so every user costs two model calls.
+
+Usage:
+    python benchmarks/bench_asgi.py [--users 200] [--stub-latency-ms 500] [--servers sync,asgi]
+                                    [--llm-rate 5]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import http.client
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_utils import summarize, print_table
+from load_test import JOB_DESCRIPTION
+
+SERVERS = {
+    # What the Procfile runs today, with its defaults
+    'sync': ['gunicorn', 'main:app'],
+    'asgi': ['gunicorn', 'asgi:app', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(name, port, stub_latency_ms, llm_rate=None):
+    env = dict(os.environ, LLM_BACKEND='stub', STUB_LATENCY_MS=str(stub_latency_ms), STUB_JITTER_MS='0',
+               ANALYSIS_CACHE_SIZE='0', LOG_LEVEL='WARNING', PYTHONWARNINGS='ignore')
+    env.pop('LLM_RATE_PER_SECOND', None)
+    if llm_rate is not None:
+        env['LLM_RATE_PER_SECOND'] = str(llm_rate)
+    command = SERVERS[name] + ['--bind', f'127.0.0.1:{port}', '--workers', '1', '--timeout', '300']
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{name} server did not start on port {port}")
+
+
+def one_user(port, i, resume_text, poll_interval=0.2, timeout=300):
+    """Submit one analysis and poll it to completion; returns (seconds, ok)"""
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    body = urllib.parse.urlencode({'job_role': f'Backend Engineer {i}', 'job_description': JOB_DESCRIPTION,
+                                   'resume_text': resume_text})
+    connection.request('POST', '/analyze', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = connection.getresponse()
+    response.read()
+    location = urllib.parse.urlparse(response.getheader('Location') or '').path
+    if response.status != 302 or not location.startswith('/jobs/'):
+        return time.perf_counter() - started, False
+
+    while time.perf_counter() - started < timeout:
+        connection.request('GET', f'{location}/status')
+        status = json.loads(connection.getresponse().read())['status']
+        if status in ('done', 'failed', 'unknown'):
+            return time.perf_counter() - started, status == 'done'
+        time.sleep(poll_interval)
+    return time.perf_counter() - started, False
+
+
+def run_users(port, users, resume_text):
+    latencies, errors = [], 0
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        started = time.perf_counter()
+        for elapsed, ok in pool.map(lambda i: one_user(port, i, resume_text), range(users)):
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+        total = time.perf_counter() - started
+    return summarize(latencies, total, errors)
+
+
+def collect(users=200, stub_latency_ms=500, servers=('sync', 'asgi'), llm_rate=None):
+    """
+    Return {suite: {server: summary}} for one burst of ``users`` analyses per
+    server. llm_rate=None keeps the app's default rate limit.
+    """
+    from fake_model import FAKE_IMPROVED_RESUME
+
+    results = {}
+    for name in servers:
+        port = _free_port()
+        process = start_server(name, port, stub_latency_ms, llm_rate)
+        try:
+            one_user(port, -1, FAKE_IMPROVED_RESUME)  # warm-up
+            results[name] = run_users(port, users, FAKE_IMPROVED_RESUME)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return {f'serve.{users}_users': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200, help="concurrent analyses submitted at once")
+    parser.add_argument('--stub-latency-ms', type=int, default=500, help="latency of each stub model call")
+    parser.add_argument('--servers', default='sync,asgi')
+    parser.add_argument('--llm-rate', type=float, help="LLM_RATE_PER_SECOND for the servers (0 = unlimited); "
+                                                       "default: the app's default")
+    args = parser.parse_args(argv)
+
+    results = collect(args.users, args.stub_latency_ms, args.servers.split(','), args.llm_rate)
+    for suite, cases in results.items():
+        print_table(suite, cases)
+        for server, summary in cases.items():
+            if summary.get('success_rate', 1.0) < 1.0:
+                print(f"  {server}: {summary['success_rate']:.0%} of analyses finished")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark parse time and success rate of the markdown and structured (JSON)
+analysis parsers on the recorded model responses in fixtures/responses.
+
+Usage:
+    python benchmarks/bench_parsing.py [--iterations 2000]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_schema import AnalysisSchemaError, parse_structured_response
+from bench_utils import summarize, time_calls
+from fake_model import FakeStreamingModel
+from gemini_service import GeminiResumeAnalyzer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'responses')
+
+REQUIRED_FIELDS = ('missing_skills', 'section_feedback', 'redundant_language', 'formatting_recommendations')
+
+
+def load_responses(pattern):
+    responses = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, pattern))):
+        with open(path, 'r', encoding='utf-8') as f:
+            responses[os.path.basename(path)] = f.read()
+    return responses
+
+
+def is_complete(analysis):
+    """A parse succeeds only if every section the results page shows came through"""
+    return all(analysis.get(field) for field in REQUIRED_FIELDS)
+
+
+def parse_json(text):
+    try:
+        return parse_structured_response(text)
+    except AnalysisSchemaError:
+        return {}
+
+
+def run(name, parser, responses, iterations):
+    print(f"\n{name} parser ({len(responses)} recorded responses, {iterations} iterations each)")
+    print(f"  {'fixture':32} {'us/parse':>10}  complete")
+    successes = 0
+    total_time = 0.0
+
+    for fixture, text in responses.items():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            analysis = parser(text)
+        elapsed = time.perf_counter() - started
+        total_time += elapsed
+
+        complete = is_complete(analysis)
+        successes += complete
+        print(f"  {fixture:32} {elapsed / iterations * 1e6:10.1f}  {'yes' if complete else 'NO'}")
+
+    count = len(responses) or 1
+    print(f"  success rate: {successes}/{len(responses)} ({successes / count:.0%}), "
+          f"mean {total_time / (count * iterations) * 1e6:.1f} us/parse")
+
+
+def collect(iterations=500):
+    """Per-fixture parse latencies for the benchmark suite: {suite: {case: summary}}"""
+    analyzer = GeminiResumeAnalyzer(model=FakeStreamingModel())
+    suites = {
+        'parse.markdown': (analyzer._parse_analysis_response, load_responses('markdown_*.md')),
+        'parse.json': (parse_json, load_responses('json_*.json')),
+    }
+    return {
+        suite: {fixture: summarize(time_calls(lambda: parser(text), iterations))
+                for fixture, text in responses.items()}
+        for suite, (parser, responses) in suites.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    analyzer = GeminiResumeAnalyzer(model=FakeStreamingModel())
+    run("Markdown", analyzer._parse_analysis_response, load_responses('markdown_*.md'), args.iterations)
+    run("Structured JSON", parse_json, load_responses('json_*.json'), args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark PDF upload parsing (Ingestor.ingest, the path the app uses) on a
+generated corpus of 1-20 page resumes, with the PDFParser in-process and on
+the PDFExtractionEngine process pool.
+
+Usage:
+    python benchmarks/bench_pdf_parser.py [--iterations 20] [--no-engine]
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_utils import summarize, time_calls, print_table
+from resume_corpus import build_corpus
+from pdf_parser import PDFParser
+from ingestion import Ingestor
+from pdf_engine import PDFExtractionEngine
+
+
+def bench_parser(parser, corpus, iterations):
+    ingestor = Ingestor.from_env(parser)
+    results = {}
+    for pages, documents in corpus.items():
+        latencies = []
+        for data in documents:
+            latencies += time_calls(lambda: ingestor.ingest(data, 'resume.pdf'), iterations)
+        results[f"{pages:02d} pages"] = summarize(latencies)
+    return results
+
+
+def collect(iterations=20, use_engine=True, per_size=3):
+    """Return {suite: {case: summary}} for the in-process parser and the engine"""
+    corpus = build_corpus(per_size=per_size)
+    results = {'pdf_parser.in_process': bench_parser(PDFParser(), corpus, iterations)}
+
+    if use_engine:
+        engine = PDFExtractionEngine.from_env()
+        try:
+            results['pdf_parser.engine'] = bench_parser(PDFParser(engine=engine), corpus, iterations)
+        finally:
+            engine.shutdown()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--no-engine', action='store_true', help="skip the process-pool engine")
+    args = parser.parse_args(argv)
+
+    for suite, results in collect(args.iterations, use_engine=not args.no_engine).items():
+        print_table(suite, results)
+
+
+if __name__ == '__main__':
+    main()
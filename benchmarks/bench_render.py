@@ -0,0 +1,133 @@
+"""
+Benchmark improved-resume PDF rendering: the per-request implementation that
+used to live in routes.download_improved_resume against resume_renderer.
+
+Usage:
+    python benchmarks/bench_render.py [--iterations 50]
+"""
+import io
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+from bench_utils import summarize, time_calls
+from fake_model import FAKE_IMPROVED_RESUME
+from resume_renderer import render_resume_pdf
+
+
+def legacy_is_section_header(line):
+    """The keyword-list header check routes used before resume_renderer, kept as the baseline"""
+    section_keywords = [
+        'experience', 'education', 'skills', 'summary', 'objective',
+        'projects', 'certifications', 'achievements', 'awards',
+        'publications', 'languages', 'interests', 'references',
+        'professional experience', 'work experience', 'employment history',
+        'technical skills', 'core competencies', 'qualifications'
+    ]
+
+    line_lower = line.lower().strip()
+
+    # Check if line contains section keywords and is relatively short
+    if len(line.split()) <= 4:
+        for keyword in section_keywords:
+            if keyword in line_lower:
+                return True
+
+    # Check if line is all caps (common for section headers)
+    if line.isupper() and len(line.split()) <= 3:
+        return True
+
+    return False
+
+
+def legacy_render(improved_resume):
+    """Per-request styles, repeated any() scans and a final buffer copy"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=18)
+    styles = getSampleStyleSheet()
+    name_style = ParagraphStyle('NameStyle', parent=styles['Heading1'], fontSize=18, spaceAfter=12, alignment=1)
+    section_header_style = ParagraphStyle('SectionHeader', parent=styles['Heading2'], fontSize=14,
+                                          spaceAfter=8, spaceBefore=16)
+    contact_style = ParagraphStyle('ContactStyle', parent=styles['Normal'], fontSize=10, spaceAfter=12, alignment=1)
+    bullet_style = ParagraphStyle('BulletStyle', parent=styles['Normal'], fontSize=10, leftIndent=20, spaceAfter=6)
+
+    story = []
+    name_found = False
+    for line in improved_resume.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if not name_found and len(line.split()) <= 5 and not any(
+                keyword in line.lower() for keyword in ['email', 'phone', '@', 'linkedin', 'experience', 'education', 'skills']):
+            story.append(Paragraph(f'<b>{line}</b>', name_style))
+            name_found = True
+            story.append(Spacer(1, 12))
+            continue
+        if any(keyword in line.lower() for keyword in ['@', 'phone', 'email', 'linkedin', 'github']):
+            story.append(Paragraph(line, contact_style))
+            continue
+        if legacy_is_section_header(line):
+            story.append(Spacer(1, 16))
+            story.append(Paragraph(f'<b>{line.upper()}</b>', section_header_style))
+            story.append(Spacer(1, 8))
+            continue
+        if line.startswith('•') or line.startswith('-') or line.startswith('*'):
+            story.append(Paragraph(f'• {line[1:].strip()}', bullet_style))
+            continue
+        story.append(Paragraph(line, styles['Normal']))
+        story.append(Spacer(1, 6))
+
+    doc.build(story)
+    buffer.seek(0)
+    return io.BytesIO(buffer.getvalue())
+
+
+def large_resume(roles=40):
+    """A long multi-page resume built from the canned one"""
+    lines = FAKE_IMPROVED_RESUME.strip().split('\n')[:3]
+    lines.append("EXPERIENCE")
+    for i in range(roles):
+        lines.append(f"Software Engineer {i}, Company {i} (20{i % 20:02d} - 20{(i + 1) % 20:02d})")
+        for j in range(6):
+            lines.append(f"- Delivered project {i}.{j} that improved throughput by {j + 10}% across 12 services")
+    return '\n'.join(lines)
+
+
+def bench(func, text, iterations):
+    func(text)  # warm-up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(text)
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def collect(iterations=30):
+    """render_resume_pdf latencies for the benchmark suite: {suite: {case: summary}}"""
+    cases = {"typical": FAKE_IMPROVED_RESUME, "large": large_resume()}
+    return {'render.resume_pdf': {name: summarize(time_calls(lambda: render_resume_pdf(text), iterations))
+                                  for name, text in cases.items()}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    cases = [("typical", FAKE_IMPROVED_RESUME), ("large", large_resume())]
+    print(f"{'resume':10} {'lines':>6} {'legacy ms':>10} {'renderer ms':>12} {'speedup':>8}")
+    for name, text in cases:
+        legacy = bench(legacy_render, text, args.iterations)
+        current = bench(render_resume_pdf, text, args.iterations)
+        print(f"{name:10} {len(text.splitlines()):6} {legacy:10.2f} {current:12.2f} {legacy / current:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
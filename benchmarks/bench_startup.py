@@ -0,0 +1,104 @@
+"""
+Benchmark worker start-up: how long importing the app takes with lazy
+initialization, what eager warm-up (the old import-time cost) adds, and the
+latency of the first PDF upload and first PDF download in a fresh process.
+Each measurement runs in a new interpreter.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_utils import summarize, print_table
+
+# Runs in a fresh interpreter and prints one JSON object of timings in seconds
+PROBE = r"""
+import io, json, sys, time
+started = time.perf_counter()
+from app import app
+import routes
+timings = {'import_app': time.perf_counter() - started}
+timings['heavy_modules_loaded'] = [m for m in ('fitz', 'reportlab.platypus', 'google.generativeai') if m in sys.modules]
+
+if WARM_UP:
+    started = time.perf_counter()
+    routes.warm_up()
+    timings['warm_up'] = time.perf_counter() - started
+
+with open(PDF_PATH, 'rb') as f:
+    pdf = f.read()
+client = app.test_client()
+
+started = time.perf_counter()
+client.post('/analyze', data={'job_role': 'Engineer', 'resume_file': (io.BytesIO(pdf), 'r.pdf')},
+            content_type='multipart/form-data')
+timings['first_pdf_analyze'] = time.perf_counter() - started
+
+started = time.perf_counter()
+client.post('/download_improved_resume', data={'improved_resume': 'Jane Doe\nSKILLS\n- Python'})
+timings['first_pdf_download'] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+
+def probe(warm_up, pdf_path):
+    # The stub backend skips the Gemini SDK import, so the gain shown is a lower bound
+    env = dict(os.environ, LLM_BACKEND='stub', ASYNC_ANALYSIS='false', PDF_PROCESS_POOL='false',
+               LOG_LEVEL='ERROR', PYTHONWARNINGS='ignore')
+    code = f"WARM_UP = {warm_up!r}\nPDF_PATH = {pdf_path!r}\n" + PROBE
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def collect(runs=5):
+    """Return {suite: {case: summary}}: lazy start vs eager warm-up"""
+    from resume_corpus import make_resume_pdf
+
+    # Written here so the probe itself never imports PyMuPDF early
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+        f.write(make_resume_pdf(1))
+    try:
+        samples_by_suite = {suite: [probe(warm_up, f.name) for _ in range(runs)]
+                            for warm_up, suite in ((False, 'startup.lazy'), (True, 'startup.warm_up'))}
+    finally:
+        os.remove(f.name)
+
+    results = {}
+    for suite, samples in samples_by_suite.items():
+        cases = {}
+        for stage in ('import_app', 'warm_up', 'first_pdf_analyze', 'first_pdf_download'):
+            values = [sample[stage] for sample in samples if stage in sample]
+            if values:
+                cases[stage] = summarize(values)
+        if suite == 'startup.lazy':
+            print(f"Heavy modules loaded by 'import app': {samples[0]['heavy_modules_loaded'] or 'none'}")
+        results[suite] = cases
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = collect(args.runs)
+    for suite, cases in results.items():
+        print_table(suite, cases)
+
+    lazy = results['startup.lazy']['import_app']['p50_ms']
+    eager = lazy + results['startup.warm_up']['warm_up']['p50_ms']
+    print(f"\nWorker boot: {lazy:.0f} ms lazy vs {eager:.0f} ms with everything imported up front "
+          f"({eager / lazy:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
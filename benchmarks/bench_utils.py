@@ -0,0 +1,96 @@
+"""
+Shared helpers for the benchmark suite: latency percentiles, result
+formatting and comparison against a stored baseline.
+"""
+import json
+import math
+import time
+
+# Metrics where a larger number is better; everything else is a latency
+HIGHER_IS_BETTER = ('throughput_rps', 'success_rate')
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed=None, errors=0):
+    """p50/p95/p99/mean in milliseconds (and throughput when elapsed is given)"""
+    summary = {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+    }
+    if elapsed:
+        summary['throughput_rps'] = round(len(latencies) / elapsed, 2)
+    if errors or elapsed:
+        total = len(latencies) + errors
+        summary['success_rate'] = round(len(latencies) / total, 4) if total else 0.0
+    return summary
+
+
+def time_calls(func, iterations, warmup=1):
+    """Call func() repeatedly and return a list of per-call durations in seconds"""
+    for _ in range(warmup):
+        func()
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def print_table(title, results):
+    """Print {case: summary} as an aligned table"""
+    print(f"\n{title}")
+    print(f"  {'case':36} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'rps':>8}")
+    for case, summary in results.items():
+        rps = summary.get('throughput_rps')
+        print(f"  {case:36} {summary['count']:6} {summary['p50_ms']:10.3f} {summary['p95_ms']:10.3f} "
+              f"{summary['p99_ms']:10.3f} {rps if rps is not None else '':>8}")
+
+
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(results, baseline, tolerance=0.25, metrics=('p50_ms', 'p95_ms', 'throughput_rps', 'success_rate'),
+            floor_ms=0.01):
+    """
+    Compare {suite: {case: summary}} against a baseline of the same shape.
+    Returns a list of (suite, case, metric, baseline, current, change) for
+    every metric that got worse by more than ``tolerance`` (a fraction).
+    Latency changes smaller than ``floor_ms`` are treated as timer noise.
+    """
+    regressions = []
+    for suite, cases in results.items():
+        for case, summary in cases.items():
+            previous = baseline.get(suite, {}).get(case)
+            if not previous:
+                continue
+            for metric in metrics:
+                if metric not in summary or not previous.get(metric):
+                    continue
+                old, new = previous[metric], summary[metric]
+                change = (new - old) / old
+                worse = -change if metric in HIGHER_IS_BETTER else change
+                if metric.endswith('_ms') and new - old < floor_ms:
+                    continue
+                if worse > tolerance:
+                    regressions.append((suite, case, metric, old, new, change))
+    return regressions
@@ -0,0 +1,173 @@
+"""
+Drive the Flask app end to end (upload -> parse -> analyze -> render) through
+the test client against the stub LLM backend, sequentially and with a
+concurrent load generator, and report throughput and p50/p95/p99 latencies.
+
+Usage:
+    python benchmarks/load_test.py [--requests 100] [--concurrency 16] [--stub-latency-ms 50]
+"""
+import io
+import os
+import re
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_utils import summarize, print_table
+
+JOB_DESCRIPTION = ("We are hiring a backend engineer with Python, Kubernetes, Terraform and AWS "
+                   "experience to build data-heavy web services. Experience with Kafka is a plus.")
+
+_RESULT_ID = re.compile(r'name="result_id" value="([0-9a-f]+)"')
+
+
+def configure_environment(stub_latency_ms=50, stub_jitter_ms=10, stub_error_rate=0.0):
+    """
+    Point the app at the stub backend before it is imported. Caching and the
+    client-side rate limit are off so every request does the full work;
+    anything already set in the environment wins.
+    """
+    defaults = {
+        'LLM_BACKEND': 'stub',
+        'STUB_LATENCY_MS': str(stub_latency_ms),
+        'STUB_JITTER_MS': str(stub_jitter_ms),
+        'STUB_ERROR_RATE': str(stub_error_rate),
+        'STUB_SEED': '7',
+        'LLM_RATE_PER_SECOND': '0',
+        'LLM_MAX_IN_FLIGHT': '64',
+        'ANALYSIS_CACHE_SIZE': '0',
+        'ASYNC_ANALYSIS': 'false',
+        'STREAM_IMPROVED_RESUME': 'false',
+        'LOG_LEVEL': 'WARNING',
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+class Scenario:
+    """One kind of request; ``send`` returns True when the response is a success"""
+
+    def __init__(self, name, send):
+        self.name = name
+        self.send = send
+
+
+def build_scenarios(app, resume_pdf, improved_resume):
+    def analyze_text(client, i):
+        response = client.post('/analyze', data={
+            'job_role': f'Backend Engineer {i}',
+            'job_description': JOB_DESCRIPTION,
+            'resume_text': improved_resume,
+        })
+        return response.status_code == 200
+
+    def analyze_pdf(client, i):
+        response = client.post('/analyze', data={
+            'job_role': f'Backend Engineer {i}',
+            'job_description': JOB_DESCRIPTION,
+            'resume_file': (io.BytesIO(resume_pdf), 'resume.pdf'),
+        }, content_type='multipart/form-data')
+        return response.status_code == 200
+
+    def download_render(client, i):
+        # Posting the text itself skips the result store, so every call renders
+        response = client.post('/download_improved_resume', data={
+            'improved_resume': improved_resume, 'job_role': 'Backend Engineer'})
+        return response.status_code == 200 and response.mimetype == 'application/pdf'
+
+    # One stored result whose PDF is rendered once and then served from cache
+    with app.test_client() as client:
+        page = client.post('/analyze', data={'job_role': 'Backend Engineer',
+                                             'job_description': JOB_DESCRIPTION,
+                                             'resume_text': improved_resume}).get_data(as_text=True)
+    match = _RESULT_ID.search(page)
+    result_id = match.group(1) if match else ''
+
+    def download_cached(client, i):
+        response = client.post('/download_improved_resume', data={'result_id': result_id})
+        return response.status_code == 200 and response.mimetype == 'application/pdf'
+
+    return [
+        Scenario('analyze (pasted text)', analyze_text),
+        Scenario('analyze (pdf upload)', analyze_pdf),
+        Scenario('download_improved_resume (render)', download_render),
+        Scenario('download_improved_resume (cached)', download_cached),
+    ]
+
+
+def run_sequential(app, scenario, requests):
+    latencies, errors = [], 0
+    with app.test_client() as client:
+        scenario.send(client, -1)  # warm-up
+        started = time.perf_counter()
+        for i in range(requests):
+            call_started = time.perf_counter()
+            ok = scenario.send(client, i)
+            if ok:
+                latencies.append(time.perf_counter() - call_started)
+            else:
+                errors += 1
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, errors)
+
+
+def run_concurrent(app, scenario, requests, concurrency):
+    """Fire ``requests`` calls from ``concurrency`` threads, one test client each"""
+    local = threading.local()
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def one(i):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        call_started = time.perf_counter()
+        ok = scenario.send(client, i)
+        elapsed = time.perf_counter() - call_started
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors[0] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, errors[0])
+
+
+def collect(requests=100, concurrency=16):
+    """Return {suite: {case: summary}} for the sequential and concurrent runs"""
+    from app import app
+    from fake_model import FAKE_IMPROVED_RESUME
+    from resume_corpus import make_resume_pdf
+
+    scenarios = build_scenarios(app, make_resume_pdf(2), FAKE_IMPROVED_RESUME)
+    sequential_requests = max(requests // 4, 10)
+    return {
+        'load.sequential': {s.name: run_sequential(app, s, sequential_requests) for s in scenarios},
+        f'load.concurrent_{concurrency}': {s.name: run_concurrent(app, s, requests, concurrency)
+                                           for s in scenarios},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=100, help="requests per concurrent scenario")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--stub-latency-ms', type=int, default=50)
+    parser.add_argument('--stub-error-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    configure_environment(args.stub_latency_ms, stub_error_rate=args.stub_error_rate)
+    for suite, results in collect(args.requests, args.concurrency).items():
+        print_table(suite, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Deterministic corpus of synthetic resume PDFs (1-20 pages) for the parsing
+and load benchmarks. Generated with PyMuPDF, so nothing binary is checked in.
+"""
+import os
+import random
+
+import fitz  # PyMuPDF
+
+DEFAULT_PAGE_COUNTS = (1, 2, 3, 5, 10, 20)
+
+_SKILLS = ('Python', 'Flask', 'PostgreSQL', 'Docker', 'Kubernetes', 'AWS', 'Terraform',
+           'React', 'TypeScript', 'Kafka', 'Redis', 'GraphQL', 'CI/CD', 'Airflow', 'Spark')
+_VERBS = ('Built', 'Led', 'Reduced', 'Designed', 'Migrated', 'Automated', 'Scaled', 'Shipped')
+
+
+def resume_lines(pages, seed=0):
+    """Plain-text resume long enough to fill roughly ``pages`` pages"""
+    rng = random.Random(seed)
+    lines = [f"Candidate {seed}", f"candidate{seed}@example.com | (555) 010-{seed % 10000:04d}", "",
+             "SUMMARY", "Backend engineer focused on reliable data-heavy web services.", "",
+             "SKILLS", ", ".join(rng.sample(_SKILLS, 8)), "", "EXPERIENCE"]
+    # About 45 lines fit on a page at the font size used below
+    role = 0
+    while len(lines) < pages * 45 - 6:
+        role += 1
+        lines.append(f"Software Engineer, Company {role} (20{role % 20:02d} - 20{(role + 2) % 20:02d})")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(f"- {rng.choice(_VERBS)} {rng.choice(_SKILLS)} services handling "
+                         f"{rng.randint(2, 90)}k requests/day, cutting latency by {rng.randint(5, 60)}%")
+    lines += ["", "EDUCATION", "B.Sc. Computer Science, State University"]
+    return lines
+
+
+def make_resume_pdf(pages, seed=0):
+    """Return the bytes of a synthetic resume PDF with exactly ``pages`` pages"""
+    lines = resume_lines(pages, seed)
+    per_page = (len(lines) + pages - 1) // pages
+    doc = fitz.open()
+    try:
+        for start in range(0, per_page * pages, per_page):
+            page = doc.new_page()
+            y = 50
+            for line in lines[start:start + per_page]:
+                page.insert_text((50, y), line, fontsize=9)
+                y += 15
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def build_corpus(page_counts=DEFAULT_PAGE_COUNTS, per_size=3):
+    """{page_count: [pdf bytes, ...]} with ``per_size`` different resumes per size"""
+    return {pages: [make_resume_pdf(pages, seed=pages * 100 + i) for i in range(per_size)]
+            for pages in page_counts}
+
+
+def write_corpus(directory, page_counts=DEFAULT_PAGE_COUNTS, per_size=3):
+    """Write the corpus to ``directory`` and return the file paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for pages, documents in build_corpus(page_counts, per_size).items():
+        for i, data in enumerate(documents):
+            path = os.path.join(directory, f"resume_{pages:02d}p_{i}.pdf")
+            with open(path, 'wb') as f:
+                f.write(data)
+            paths.append(path)
+    return paths
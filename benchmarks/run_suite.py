@@ -0,0 +1,82 @@
+"""
+Run the whole benchmark suite (PDF parsing, response parsing, PDF rendering,
+worker start-up and the end-to-end load test) and compare it with the stored baseline.
+Exits non-zero when a p50/p95 latency, throughput or success rate is worse
+than the baseline by more than the tolerance.
+
+Usage:
+    python benchmarks/run_suite.py [--quick] [--save-baseline] [--tolerance 0.25] [--floor-ms 0.01]
+                                   [--baseline benchmarks/baseline.json] [--output results.json]
+"""
+import os
+import sys
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import load_test
+from bench_utils import print_table, load_baseline, save_baseline, compare
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+
+def collect(quick=False):
+    # The app reads its configuration at import time, so set it up first
+    load_test.configure_environment()
+
+    import bench_parsing
+    import bench_pdf_parser
+    import bench_render
+    import bench_startup
+
+    results = {}
+    results.update(bench_pdf_parser.collect(iterations=3 if quick else 20, per_size=1 if quick else 3))
+    results.update(bench_parsing.collect(iterations=100 if quick else 500))
+    results.update(bench_render.collect(iterations=5 if quick else 30))
+    results.update(bench_startup.collect(runs=2 if quick else 5))
+    results.update(load_test.collect(requests=40 if quick else 200, concurrency=16))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--quick', action='store_true', help="fewer iterations, for a smoke run")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="overwrite the baseline with this run")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown before a case counts as a regression")
+    parser.add_argument('--floor-ms', type=float, default=0.01,
+                        help="ignore latency changes smaller than this many milliseconds")
+    parser.add_argument('--output', help="also write this run's results to a JSON file")
+    args = parser.parse_args(argv)
+
+    results = collect(args.quick)
+    for suite, cases in results.items():
+        print_table(suite, cases)
+
+    if args.output:
+        save_baseline(args.output, results)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.tolerance, floor_ms=args.floor_ms)
+    if not regressions:
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        return 0
+
+    print(f"\n{len(regressions)} regression(s) against {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for suite, case, metric, old, new, change in regressions:
+        print(f"  {suite} / {case} / {metric}: {old} -> {new} ({change:+.0%})")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
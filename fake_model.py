@@ -0,0 +1,133 @@
+import time
+import json
+
+FAKE_ANALYSIS_RESPONSE = """
+## MISSING SKILLS & KEYWORDS
+- Cloud platforms (AWS, Azure or GCP)
+- CI/CD pipelines
+- Containerization with Docker and Kubernetes
+- Automated testing frameworks
+- Agile/Scrum methodologies
+
+## SECTION-WISE FEEDBACK
+
+### Education
+- Education is relevant; add coursework that matches the target role.
+
+### Experience
+- Quantify accomplishments with metrics such as users served or time saved.
+- Lead each bullet with a strong action verb.
+
+### Skills
+- Group skills into categories and put the most relevant ones first.
+
+### Overall Structure
+- Add a short professional summary at the top.
+
+## REDUNDANT/VAGUE LANGUAGE
+- "Responsible for" - replace with an action verb such as "Led" or "Built"
+- "Team player" - show collaboration through a concrete example
+
+## FORMATTING & CLARITY RECOMMENDATIONS
+- Use consistent date formats across all roles
+- Keep the resume to one or two pages
+"""
+
+FAKE_IMPROVED_RESUME = """Jane Doe
+jane.doe@example.com | (555) 123-4567 | linkedin.com/in/janedoe
+
+PROFESSIONAL SUMMARY
+Software engineer with 5 years of experience building scalable web services.
+
+EXPERIENCE
+Senior Software Engineer, Example Corp (2021 - Present)
+- Led migration of 12 services to Kubernetes, cutting deployment time by 60%
+- Built CI/CD pipelines that reduced release defects by 35%
+
+EDUCATION
+B.S. Computer Science, Example University
+
+SKILLS
+Python, Flask, AWS, Docker, Kubernetes, CI/CD, PostgreSQL
+"""
+
+
+FAKE_STRUCTURED_RESPONSE = {
+    "missing_skills": [
+        "Cloud platforms (AWS, Azure or GCP)",
+        "CI/CD pipelines",
+        "Containerization with Docker and Kubernetes",
+        "Automated testing frameworks",
+        "Agile/Scrum methodologies"
+    ],
+    "section_feedback": {
+        "Education": "Education is relevant; add coursework that matches the target role.",
+        "Experience": "Quantify accomplishments with metrics and lead each bullet with an action verb.",
+        "Skills": "Group skills into categories and put the most relevant ones first.",
+        "Overall Structure": "Add a short professional summary at the top."
+    },
+    "redundant_language": [
+        "\"Responsible for\" - replace with an action verb such as \"Led\" or \"Built\"",
+        "\"Team player\" - show collaboration through a concrete example"
+    ],
+    "formatting_recommendations": [
+        "Use consistent date formats across all roles",
+        "Keep the resume to one or two pages"
+    ]
+}
+
+
+class FakeResponse:
+    """Minimal stand-in for a Gemini response or streamed chunk"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStreamingModel:
+    """
+    Offline replacement for genai.GenerativeModel. Returns canned responses
+    and supports stream=True by yielding the text a few words at a time.
+    """
+
+    model_name = "fake-streaming-model"
+
+    def __init__(self, chunk_words=3, chunk_delay=0.0, analysis_text=None, improved_resume_text=None):
+        self.chunk_words = chunk_words
+        self.chunk_delay = chunk_delay
+        self.analysis_text = analysis_text or FAKE_ANALYSIS_RESPONSE
+        self.improved_resume_text = improved_resume_text or FAKE_IMPROVED_RESUME
+
+    def _response_text_for(self, prompt, generation_config=None):
+        if prompt.rstrip().endswith("IMPROVED RESUME:"):
+            return self.improved_resume_text
+        if generation_config and generation_config.get("response_mime_type") == "application/json":
+            structured = dict(FAKE_STRUCTURED_RESPONSE)
+            if '"improved_resume"' in prompt:
+                structured["improved_resume"] = self.improved_resume_text
+            return json.dumps(structured)
+        if '"## IMPROVED RESUME"' in prompt:
+            # Single-pass markdown prompts ask for the improved resume as a final section
+            return f"{self.analysis_text.rstrip()}\n\n## IMPROVED RESUME\n{self.improved_resume_text}"
+        return self.analysis_text
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        text = self._response_text_for(prompt, generation_config)
+        if stream:
+            return self._stream(text)
+        return FakeResponse(text)
+
+    def _stream(self, text):
+        for chunk in self._stream_chunks(text):
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield FakeResponse(chunk)
+
+    def _stream_chunks(self, text):
+        # Split on spaces but keep them so the joined chunks equal the original text
+        words = text.split(' ')
+        for i in range(0, len(words), self.chunk_words):
+            chunk = ' '.join(words[i:i + self.chunk_words])
+            if i + self.chunk_words < len(words):
+                chunk += ' '
+            yield chunk
@@ -1,44 +1,576 @@
 import os
+import asyncio
 import logging
+import contextvars
+import re
 import json
-import google.generativeai as genai
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from analysis_cache import AnalysisCache, make_analysis_key
+from llm_backends import create_backend
+from llm_client import ResilientBackend
+from prompt_budget import PromptBudget, estimate_tokens
+from analysis_schema import AnalysisSchemaError, parse_structured_response, json_schema_description
+from local_analysis import LocalAnalyzer
+from resume_sections import segment_text, format_for_prompt, section_types
+from incremental_analysis import merge_analysis, splice_improved_resume, feedback_title
+from metrics import timed, record_stage, CACHE_EVENTS, BYTES_PROCESSED, ERRORS
+
+# Bump whenever the prompts or the parsed output shape change so stale
+# cached analyses are not served
+PROMPT_VERSION = "4"
+
+IMPROVED_RESUME_UNAVAILABLE = "Unable to generate improved resume."
+IMPROVED_RESUME_ERROR = "Error generating improved resume. Please try again."
+IMPROVED_RESUME_MARKER = "## IMPROVED RESUME"
+
+# Execution modes, selected with the ANALYSIS_MODE environment variable
+MODE_SEQUENTIAL = "sequential"
+MODE_CONCURRENT = "concurrent"
+MODE_SINGLE_PASS = "single_pass"
+ANALYSIS_MODES = (MODE_SEQUENTIAL, MODE_CONCURRENT, MODE_SINGLE_PASS)
+# Internal mode used when the improved resume is streamed separately
+MODE_ANALYSIS_ONLY = "analysis_only"
+
+# Response formats, selected with the ANALYSIS_OUTPUT_FORMAT environment variable
+OUTPUT_MARKDOWN = "markdown"
+OUTPUT_JSON = "json"
+OUTPUT_FORMATS = (OUTPUT_MARKDOWN, OUTPUT_JSON)
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+# Section-wise feedback asked for, in this order, when the resume has that section
+FEEDBACK_GUIDANCE = {
+    'summary': ("- Whether the summary speaks to the target role",
+                "- A sharper framing if it does not"),
+    'experience': ("- Analysis of work experience relevance to the target role",
+                   "- Feedback on accomplishment descriptions and quantification",
+                   "- Suggestions for better positioning"),
+    'projects': ("- Relevance of the projects to the target role",
+                 "- How clearly their scope and results are shown"),
+    'education': ("- Specific feedback on education section relevance and presentation",
+                  "- Suggestions for improvement"),
+    'skills': ("- Review of technical and soft skills listed",
+               "- Recommendations for skills to add or reframe",
+               "- Suggestions for better organization"),
+    'certifications': ("- Which certifications matter for this role and any worth adding",),
+}
+# Always covered, present in the resume or not
+CORE_FEEDBACK_SECTIONS = ('education', 'experience', 'skills')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _merge_keywords(*keyword_lists):
+    """Concatenate keyword lists, dropping case-insensitive duplicates"""
+    merged = []
+    seen = set()
+    for keywords in keyword_lists:
+        for keyword in keywords:
+            key = keyword.lower().strip()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(keyword)
+    return merged
+
+def feedback_sections(sections):
+    """
+    Section types to ask feedback for: those the resume has (in FEEDBACK_GUIDANCE
+    order), and the core ones it is missing listed separately
+    """
+    present = set(section_types(sections or []))
+    if not present & set(FEEDBACK_GUIDANCE):
+        return [section for section in FEEDBACK_GUIDANCE if section in CORE_FEEDBACK_SECTIONS], []
+    return ([section for section in FEEDBACK_GUIDANCE if section in present],
+            [section for section in CORE_FEEDBACK_SECTIONS if section not in present])
+
+def _get_executor():
+    """Shared pool for concurrent-mode generations, created on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.environ.get("ANALYSIS_CONCURRENT_WORKERS", 8))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini")
+        return _executor
 
 class GeminiResumeAnalyzer:
-    def __init__(self):
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
+    def __init__(self, cache=None, mode=None, model=None, output_format=None, prompt_budget=None,
+                 local_analyzer=None):
+        # Any LLMBackend (or object with a compatible generate_content); by
+        # default chosen by LLM_BACKEND so the app can run against the stub
+        if model is None:
+            model = create_backend()
+            if os.environ.get("LLM_RESILIENCE", "true").lower() in ("1", "true", "yes"):
+                model = ResilientBackend.from_env(model)
+        self.model = model
+        self.model_name = getattr(self.model, 'model_name', 'unknown')
+        self.cache = cache if cache is not None else AnalysisCache.from_env()
+        self.prompt_budget = prompt_budget if prompt_budget is not None else PromptBudget.from_env()
+        self.local_analyzer = local_analyzer if local_analyzer is not None else LocalAnalyzer()
         
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+        self.mode = (mode or os.environ.get("ANALYSIS_MODE", MODE_SEQUENTIAL)).lower()
+        if self.mode not in ANALYSIS_MODES:
+            logging.warning(f"Unknown ANALYSIS_MODE '{self.mode}', falling back to {MODE_SEQUENTIAL}")
+            self.mode = MODE_SEQUENTIAL
+        
+        self.output_format = (output_format or os.environ.get("ANALYSIS_OUTPUT_FORMAT", OUTPUT_MARKDOWN)).lower()
+        if self.output_format not in OUTPUT_FORMATS:
+            logging.warning(f"Unknown ANALYSIS_OUTPUT_FORMAT '{self.output_format}', falling back to {OUTPUT_MARKDOWN}")
+            self.output_format = OUTPUT_MARKDOWN
+        self.latency_stats = {}
+        self._latency_lock = threading.Lock()
     
-    def analyze_resume(self, resume_content, job_role, job_description=""):
+    def analyze_resume(self, resume_content, job_role, job_description="", include_improved_resume=True,
+                       local_analysis=None, sections=None):
         """
-        Analyze resume and provide comprehensive feedback
+        Analyze resume and provide comprehensive feedback. With
+        include_improved_resume=False only the analysis is generated; the
+        improved resume can then be fetched with stream_improved_resume().
+        A LocalAnalyzer result already computed by the caller can be passed
+        in as local_analysis; it is returned under the same key. Sections
+        from resume_sections (e.g. from the PDF layout) are segmented from
+        the text when not given.
         """
+        request = self._start_analysis(resume_content, job_role, job_description, include_improved_resume, sections)
+        cached = self._cached_analysis(request)
+        if cached is not None:
+            return cached
+        
         try:
-            # Create comprehensive prompt for analysis
-            prompt = self._create_analysis_prompt(resume_content, job_role, job_description)
+            started = time.perf_counter()
+            if local_analysis is None:
+                local_analysis = self.run_local_analysis(resume_content, job_role, request['job_description'])
             
-            response = self.model.generate_content(prompt)
+            mode, resume_content, job_description, sections = (
+                request['mode'], request['resume_content'], request['job_description'], request['sections'])
+            if mode == MODE_ANALYSIS_ONLY:
+                analysis = self._run_analysis(resume_content, job_role, job_description, sections)
+            elif mode == MODE_SINGLE_PASS:
+                analysis = self._analyze_single_pass(resume_content, job_role, job_description, sections)
+            elif mode == MODE_CONCURRENT:
+                analysis = self._analyze_concurrent(resume_content, job_role, job_description, local_analysis,
+                                                    sections)
+            else:
+                analysis = self._analyze_sequential(resume_content, job_role, job_description, local_analysis,
+                                                    sections)
+            analysis = self._finish_analysis(request, analysis, local_analysis, started)
+            self._store_analysis(request, analysis)
+            return analysis
             
-            if not response.text:
-                raise Exception("Empty response from Gemini API")
+        except Exception as e:
+            raise self._analysis_error(e) from e
+    
+    async def analyze_resume_async(self, resume_content, job_role, job_description="", include_improved_resume=True,
+                                   local_analysis=None, sections=None):
+        """
+        analyze_resume() for the event loop: the same prompts and parsing,
+        with every model call awaited instead of holding a thread and the
+        cache (possibly SQLite) read and written on a worker thread
+        """
+        request = self._start_analysis(resume_content, job_role, job_description, include_improved_resume, sections)
+        cached = await asyncio.to_thread(self._cached_analysis, request)
+        if cached is not None:
+            return cached
+        
+        try:
+            started = time.perf_counter()
+            if local_analysis is None:
+                local_analysis = self.run_local_analysis(resume_content, job_role, request['job_description'])
             
-            # Parse the structured response
-            analysis = self._parse_analysis_response(response.text)
+            mode, resume_content, job_description, sections = (
+                request['mode'], request['resume_content'], request['job_description'], request['sections'])
+            if mode == MODE_ANALYSIS_ONLY:
+                analysis = await self._run_analysis_async(resume_content, job_role, job_description, sections)
+            elif mode == MODE_SINGLE_PASS:
+                analysis = await self._analyze_single_pass_async(resume_content, job_role, job_description, sections)
+            elif mode == MODE_CONCURRENT:
+                # Both prompts in flight at once, without a thread each
+                analysis, improved_resume = await asyncio.gather(
+                    self._run_analysis_async(resume_content, job_role, job_description, sections),
+                    self._generate_improved_resume_async(resume_content, job_role, job_description,
+                                                         {'local_analysis': local_analysis}))
+                analysis['improved_resume'] = improved_resume
+            else:
+                analysis = await self._run_analysis_async(resume_content, job_role, job_description, sections)
+                analysis['local_analysis'] = local_analysis
+                analysis['improved_resume'] = await self._generate_improved_resume_async(
+                    resume_content, job_role, job_description, analysis)
+            analysis = self._finish_analysis(request, analysis, local_analysis, started)
+            await asyncio.to_thread(self._store_analysis, request, analysis)
+            return analysis
             
-            # Generate improved resume
-            improved_resume = self._generate_improved_resume(resume_content, job_role, job_description, analysis)
-            analysis['improved_resume'] = improved_resume
+        except Exception as e:
+            raise self._analysis_error(e) from e
+    
+    def _start_analysis(self, resume_content, job_role, job_description, include_improved_resume, sections):
+        """Prompt inputs and cache key for an analysis"""
+        mode = self.mode if include_improved_resume else MODE_ANALYSIS_ONLY
+        if sections is None:
+            sections = segment_text(resume_content)
+        prompt_resume, prompt_job_description = self.prepare_inputs(resume_content, job_description, sections)
+        # Keyed on the inputs as submitted: trimming can make different postings look alike
+        cache_key = make_analysis_key(resume_content, job_role, job_description,
+                                      self.model_name, f"{PROMPT_VERSION}:{mode}:{self.output_format}")
+        return {'mode': mode, 'sections': sections, 'resume_content': prompt_resume,
+                'job_description': prompt_job_description, 'cache_key': cache_key}
+    
+    def _cached_analysis(self, request):
+        """A copy of the cached result for this request, or None"""
+        cached = self.cache.get(request['cache_key'])
+        if cached is None:
+            CACHE_EVENTS.inc(cache='analysis', result='miss')
+            return None
+        CACHE_EVENTS.inc(cache='analysis', result='hit')
+        logging.info(f"Analysis cache hit ({request['cache_key'][:12]})")
+        return dict(cached)
+    
+    def _finish_analysis(self, request, analysis, local_analysis, started):
+        analysis['local_analysis'] = local_analysis
+        
+        elapsed = time.perf_counter() - started
+        self._record_latency(request['mode'], elapsed)
+        record_stage('analysis_total', elapsed)
+        return analysis
+    
+    def _store_analysis(self, request, analysis):
+        # Only cache complete results, never the error placeholder
+        if analysis.get('improved_resume') not in (IMPROVED_RESUME_UNAVAILABLE, IMPROVED_RESUME_ERROR):
+            self.cache.set(request['cache_key'], dict(analysis))
+    
+    def _analysis_error(self, error, label="Gemini analysis"):
+        ERRORS.inc(stage='analysis')
+        logging.error(f"Error in {label}: {error}")
+        return Exception(f"Failed to analyze resume: {str(error)}")
+    
+    def reanalyze_resume(self, resume_content, job_role, job_description, sections, previous, plan,
+                         include_improved_resume=True, local_analysis=None):
+        """
+        Re-review an edited resume against a previous result. Only the
+        sections in ``plan`` (from incremental_analysis.plan_reanalysis) go to
+        the model, in one call that also rewrites them for the improved
+        resume; everything else is carried over from the previous analysis.
+        """
+        previous_analysis, previous_improved = self._previous_analysis(previous)
+        try:
+            started = time.perf_counter()
+            if local_analysis is None:
+                local_analysis = self.run_local_analysis(resume_content, job_role, job_description)
             
-            return analysis
+            prompt = self._incremental_request(resume_content, job_role, job_description, plan,
+                                               previous_analysis, previous_improved)
+            if prompt is None:
+                analysis = self._reuse_previous(previous_analysis, previous_improved)
+            else:
+                response = self._generate(prompt, "incremental analysis")
+                analysis = self._merge_incremental(response, resume_content, sections, plan,
+                                                   previous_analysis, previous_improved)
+            
+            if not analysis.get('improved_resume'):
+                analysis.pop('improved_resume', None)
+                if include_improved_resume:
+                    full_resume, full_job_description = self.prepare_inputs(resume_content, job_description, sections)
+                    analysis['improved_resume'] = self._generate_improved_resume(
+                        full_resume, job_role, full_job_description, dict(analysis, local_analysis=local_analysis))
+            
+            return self._finish_reanalysis(analysis, local_analysis, previous, plan, prompt, started)
+        
+        except Exception as e:
+            raise self._analysis_error(e, "incremental Gemini analysis") from e
+    
+    async def reanalyze_resume_async(self, resume_content, job_role, job_description, sections, previous, plan,
+                                     include_improved_resume=True, local_analysis=None):
+        """reanalyze_resume() for the event loop"""
+        previous_analysis, previous_improved = self._previous_analysis(previous)
+        try:
+            started = time.perf_counter()
+            if local_analysis is None:
+                local_analysis = self.run_local_analysis(resume_content, job_role, job_description)
+            
+            prompt = self._incremental_request(resume_content, job_role, job_description, plan,
+                                               previous_analysis, previous_improved)
+            if prompt is None:
+                analysis = self._reuse_previous(previous_analysis, previous_improved)
+            else:
+                response = await self._generate_async(prompt, "incremental analysis")
+                analysis = self._merge_incremental(response, resume_content, sections, plan,
+                                                   previous_analysis, previous_improved)
+            
+            if not analysis.get('improved_resume'):
+                analysis.pop('improved_resume', None)
+                if include_improved_resume:
+                    full_resume, full_job_description = self.prepare_inputs(resume_content, job_description, sections)
+                    analysis['improved_resume'] = await self._generate_improved_resume_async(
+                        full_resume, job_role, full_job_description, dict(analysis, local_analysis=local_analysis))
             
+            return self._finish_reanalysis(analysis, local_analysis, previous, plan, prompt, started)
+        
         except Exception as e:
-            logging.error(f"Error in Gemini analysis: {e}")
-            raise Exception(f"Failed to analyze resume: {str(e)}")
+            raise self._analysis_error(e, "incremental Gemini analysis") from e
+    
+    def _previous_analysis(self, previous):
+        """(analysis, improved resume) of a stored result; placeholders count as no improved resume"""
+        previous_analysis = previous['analysis']
+        previous_improved = previous_analysis.get('improved_resume')
+        if previous_improved in (IMPROVED_RESUME_UNAVAILABLE, IMPROVED_RESUME_ERROR):
+            previous_improved = None
+        return previous_analysis, previous_improved
+    
+    def _incremental_request(self, resume_content, job_role, job_description, plan, previous_analysis,
+                             previous_improved):
+        """Prompt for the sections to re-review, or None when nothing needs the model"""
+        if not plan['rerun'] and not plan['removed'] and not plan['structure_changed']:
+            return None
+        rerun_resume, job_description = self.prepare_inputs(resume_content, job_description, plan['rerun'])
+        return self._create_incremental_prompt(rerun_resume, job_role, job_description, plan,
+                                               previous_analysis, rewrite=bool(previous_improved))
+    
+    def _reuse_previous(self, previous_analysis, previous_improved):
+        # Only whitespace or case changed; the previous answers still apply
+        analysis = {key: previous_analysis[key] for key in
+                    ('missing_skills', 'section_feedback', 'redundant_language', 'formatting_recommendations')
+                    if key in previous_analysis}
+        analysis['improved_resume'] = previous_improved
+        analysis['raw_response'] = previous_analysis.get('raw_response', '')
+        return analysis
     
-    def _create_analysis_prompt(self, resume_content, job_role, job_description):
+    def _merge_incremental(self, response, resume_content, sections, plan, previous_analysis, previous_improved):
+        """Previous analysis updated with an incremental response, and its rewrites spliced in"""
+        if not response.text:
+            raise Exception("Empty response from Gemini API")
+        
+        analysis_text, _, rewritten = response.text.partition(IMPROVED_RESUME_MARKER)
+        with timed('parse_response'):
+            partial = self._parse_analysis_response(analysis_text)
+        analysis = merge_analysis(previous_analysis, partial, plan, resume_content)
+        analysis['raw_response'] = response.text
+        
+        remaining_types = {section['type'] for section in sections}
+        removed_types = {section['type'] for section in plan['removed']} - remaining_types
+        analysis['improved_resume'] = splice_improved_resume(previous_improved, rewritten, removed_types)
+        return analysis
+    
+    def _finish_reanalysis(self, analysis, local_analysis, previous, plan, prompt, started):
+        analysis['local_analysis'] = local_analysis
+        analysis['incremental'] = {
+            'previous_result_id': previous.get('result_id'),
+            'changed_sections': [feedback_title(section) for section in plan['rerun']],
+            'removed_sections': [feedback_title(section) for section in plan['removed']],
+            'reused_sections': [feedback_title(section) for section in plan['unchanged']],
+            'change_ratio': plan['change_ratio'],
+            'prompt_tokens': estimate_tokens(prompt) if prompt else 0,
+        }
+        
+        elapsed = time.perf_counter() - started
+        self._record_latency("incremental", elapsed)
+        record_stage('analysis_total', elapsed)
+        return analysis
+    
+    def prepare_inputs(self, resume_content, job_description, sections=None):
+        """
+        Prompt-ready (resume, job description): the resume as labeled sections
+        without the ones prompts skip, both normalized and fitted to the budget
+        """
+        if sections:
+            resume_content = format_for_prompt(sections) or resume_content
+        return self.prompt_budget.prepare(resume_content, job_description)
+    
+    def run_local_analysis(self, resume_content, job_role, job_description=""):
+        """Keyword match score and missing keywords, computed without a model call"""
+        with timed('local_analysis'):
+            return self.local_analyzer.analyze(resume_content, job_description, job_role)
+    
+    def _run_analysis(self, resume_content, job_role, job_description, sections=None):
+        """Run the analysis prompt and parse its response"""
+        if self.output_format == OUTPUT_JSON:
+            return self._run_structured_analysis(resume_content, job_role, job_description, sections=sections)
+        
+        prompt = self._create_analysis_prompt(resume_content, job_role, job_description, sections)
+        
+        response = self._generate(prompt, "analysis")
+        
+        with timed('parse_response'):
+            return self._parse_analysis_response(self._response_text(response))
+    
+    async def _run_analysis_async(self, resume_content, job_role, job_description, sections=None):
+        if self.output_format == OUTPUT_JSON:
+            return await self._run_structured_analysis_async(resume_content, job_role, job_description,
+                                                             sections=sections)
+        
+        prompt = self._create_analysis_prompt(resume_content, job_role, job_description, sections)
+        
+        response = await self._generate_async(prompt, "analysis")
+        
+        with timed('parse_response'):
+            return self._parse_analysis_response(self._response_text(response))
+    
+    def _response_text(self, response):
+        if not response.text:
+            raise Exception("Empty response from Gemini API")
+        return response.text
+    
+    def _analyze_sequential(self, resume_content, job_role, job_description, local_analysis, sections=None):
+        """Analysis first, then the improved resume seeded with its missing skills"""
+        analysis = self._run_analysis(resume_content, job_role, job_description, sections)
+        analysis['local_analysis'] = local_analysis
+        analysis['improved_resume'] = self._generate_improved_resume(
+            resume_content, job_role, job_description, analysis)
+        return analysis
+    
+    def _analyze_concurrent(self, resume_content, job_role, job_description, local_analysis, sections=None):
+        """
+        Run both prompts at once. The improved-resume prompt gets its missing
+        keywords from the local analysis instead of waiting on the model's.
+        """
+        pre_analysis = {'local_analysis': local_analysis}
+        # Copy the context so the pool thread records its stage timings with this request's
+        improved_future = _get_executor().submit(
+            contextvars.copy_context().run,
+            self._generate_improved_resume, resume_content, job_role, job_description, pre_analysis)
+        
+        analysis = self._run_analysis(resume_content, job_role, job_description, sections)
+        analysis['improved_resume'] = improved_future.result()
+        return analysis
+    
+    def _run_structured_analysis(self, resume_content, job_role, job_description, include_improved_resume=False,
+                                 sections=None):
+        """
+        Ask for a JSON response and validate it against the analysis schema.
+        One retry on schema failure, then fall back to the markdown parser.
+        """
+        prompt = self._create_json_analysis_prompt(resume_content, job_role, job_description,
+                                                   include_improved_resume, sections)
+        response_text = ""
+        
+        for attempt in range(2):
+            response = self._generate(prompt, "structured analysis", generation_config=JSON_GENERATION_CONFIG)
+            response_text = self._response_text(response)
+            analysis, prompt = self._parse_structured_attempt(response_text, prompt, include_improved_resume, attempt)
+            if analysis is not None:
+                return analysis
+        
+        return self._structured_fallback(response_text, include_improved_resume)
+    
+    async def _run_structured_analysis_async(self, resume_content, job_role, job_description,
+                                             include_improved_resume=False, sections=None):
+        prompt = self._create_json_analysis_prompt(resume_content, job_role, job_description,
+                                                   include_improved_resume, sections)
+        response_text = ""
+        
+        for attempt in range(2):
+            response = await self._generate_async(prompt, "structured analysis",
+                                                  generation_config=JSON_GENERATION_CONFIG)
+            response_text = self._response_text(response)
+            analysis, prompt = self._parse_structured_attempt(response_text, prompt, include_improved_resume, attempt)
+            if analysis is not None:
+                return analysis
+        
+        return self._structured_fallback(response_text, include_improved_resume)
+    
+    def _parse_structured_attempt(self, response_text, prompt, include_improved_resume, attempt):
+        """(analysis, prompt); on a schema failure the analysis is None and the prompt asks again"""
+        try:
+            with timed('parse_response'):
+                return parse_structured_response(response_text, require_improved_resume=include_improved_resume), prompt
+        except AnalysisSchemaError as e:
+            logging.warning(f"Structured response failed validation (attempt {attempt + 1}): {e}")
+            prompt += f"\nYour previous reply was rejected ({e}). Reply with one JSON object that matches the format exactly.\n"
+            return None, prompt
+    
+    def _structured_fallback(self, response_text, include_improved_resume):
+        analysis = self._parse_analysis_response(response_text)
+        if include_improved_resume:
+            analysis['improved_resume'] = IMPROVED_RESUME_UNAVAILABLE
+        return analysis
+    
+    def _analyze_single_pass(self, resume_content, job_role, job_description, sections=None):
+        """One prompt that returns the analysis followed by the improved resume"""
+        if self.output_format == OUTPUT_JSON:
+            return self._run_structured_analysis(resume_content, job_role, job_description,
+                                                 include_improved_resume=True, sections=sections)
+        
+        prompt = self._create_single_pass_prompt(resume_content, job_role, job_description, sections)
+        response = self._generate(prompt, "single-pass analysis")
+        return self._parse_single_pass_response(self._response_text(response))
+    
+    async def _analyze_single_pass_async(self, resume_content, job_role, job_description, sections=None):
+        if self.output_format == OUTPUT_JSON:
+            return await self._run_structured_analysis_async(resume_content, job_role, job_description,
+                                                             include_improved_resume=True, sections=sections)
+        
+        prompt = self._create_single_pass_prompt(resume_content, job_role, job_description, sections)
+        response = await self._generate_async(prompt, "single-pass analysis")
+        return self._parse_single_pass_response(self._response_text(response))
+    
+    def _create_single_pass_prompt(self, resume_content, job_role, job_description, sections=None):
+        prompt = self._create_analysis_prompt(resume_content, job_role, job_description, sections)
+        prompt += f"""
+FINAL SECTION:
+After the sections above, add a final section that starts with the exact line "## IMPROVED RESUME" and contains a complete improved version of the resume. It should incorporate the missing skills naturally, replace weak or vague language with specific, quantified achievements, use action verbs, and be ATS-friendly and tailored for the {job_role} position. Do not use "##" or the bracketed section labels anywhere inside the improved resume.
+"""
+        return prompt
+    
+    def _parse_single_pass_response(self, response_text):
+        # Split the resume off first so its own headings never reach the section parser
+        analysis_text, marker, improved_resume = response_text.partition(IMPROVED_RESUME_MARKER)
+        if not marker:
+            analysis_text, improved_resume = response_text, ""
+        
+        with timed('parse_response'):
+            analysis = self._parse_analysis_response(analysis_text)
+        improved_resume = improved_resume.strip()
+        analysis['improved_resume'] = improved_resume if improved_resume else IMPROVED_RESUME_UNAVAILABLE
+        return analysis
+    
+    def _generate(self, prompt, label, **kwargs):
+        """Call the model, logging the estimated input size and timing every call"""
+        self._log_call(prompt, label)
+        
+        # Streams are lazy and timed by the caller as they are consumed
+        if kwargs.get('stream'):
+            return self.model.generate_content(prompt, **kwargs)
+        
+        with timed(self._call_stage(label)):
+            response = self.model.generate_content(prompt, **kwargs)
+        BYTES_PROCESSED.inc(len(response.text or ''), kind='response')
+        return response
+    
+    async def _generate_async(self, prompt, label, **kwargs):
+        """_generate() through the model's async API; a stream comes back as an async iterable"""
+        self._log_call(prompt, label)
+        
+        if kwargs.get('stream'):
+            return await self.model.generate_content_async(prompt, **kwargs)
+        
+        with timed(self._call_stage(label)):
+            response = await self.model.generate_content_async(prompt, **kwargs)
+        BYTES_PROCESSED.inc(len(response.text or ''), kind='response')
+        return response
+    
+    def _log_call(self, prompt, label):
+        logging.info(f"Gemini {label} call: ~{estimate_tokens(prompt)} input tokens")
+        BYTES_PROCESSED.inc(len(prompt), kind='prompt')
+    
+    def _call_stage(self, label):
+        return 'llm_' + re.sub(r'[^a-z]+', '_', label.lower()).strip('_')
+    
+    def _record_latency(self, mode, elapsed):
+        """Track wall-clock latency per execution mode"""
+        with self._latency_lock:
+            stats = self.latency_stats.setdefault(mode, {'count': 0, 'total_seconds': 0.0, 'last_seconds': 0.0})
+            stats['count'] += 1
+            stats['total_seconds'] += elapsed
+            stats['last_seconds'] = elapsed
+        logging.info(f"Resume analysis ({mode} mode) took {elapsed:.2f}s")
+    
+    def get_latency_stats(self):
+        """Return per-mode latency counters with averages"""
+        with self._latency_lock:
+            return {
+                mode: dict(stats, avg_seconds=stats['total_seconds'] / stats['count'])
+                for mode, stats in self.latency_stats.items()
+            }
+    
+    def _create_analysis_prompt(self, resume_content, job_role, job_description, sections=None):
         """Create structured prompt for resume analysis"""
         prompt = f"""
 You are an expert resume reviewer and career consultant. Analyze the following resume for a {job_role} position.
@@ -57,25 +589,7 @@ Please provide a comprehensive analysis in the following structured format:
 - Focus on technical skills, certifications, tools, and industry-specific terms
 
 ## SECTION-WISE FEEDBACK
-
-### Education
-- Specific feedback on education section relevance and presentation
-- Suggestions for improvement
-
-### Experience  
-- Analysis of work experience relevance to the target role
-- Feedback on accomplishment descriptions and quantification
-- Suggestions for better positioning
-
-### Skills
-- Review of technical and soft skills listed
-- Recommendations for skills to add or reframe
-- Suggestions for better organization
-
-### Overall Structure
-- Feedback on resume format, organization, and flow
-- Professional presentation assessment
-
+{self._section_feedback_outline(sections)}
 ## REDUNDANT/VAGUE LANGUAGE
 - Identify specific phrases, buzzwords, or descriptions that are overused or unclear
 - Provide alternatives for weak language
@@ -89,6 +603,105 @@ Provide detailed, actionable feedback that would help a job seeker improve their
 """
         return prompt
     
+    def _section_feedback_outline(self, sections):
+        """'###' subsections for the sections this resume has, then Overall Structure"""
+        present, missing = feedback_sections(sections)
+        outline = []
+        for section in present:
+            outline.append(f"### {section.title()}")
+            outline.extend(FEEDBACK_GUIDANCE[section])
+            outline.append("")
+        outline.append("### Overall Structure")
+        outline.append("- Feedback on resume format, organization, and flow")
+        outline.append("- Professional presentation assessment")
+        for section in missing:
+            outline.append(f"- The resume has no {section.title()} section; say whether it needs one")
+        return "\n".join(outline)
+    
+    def _create_incremental_prompt(self, rerun_resume, job_role, job_description, plan, previous_analysis, rewrite):
+        """Prompt covering only the edited sections (and those that depend on them)"""
+        outline = []
+        for section in plan['rerun']:
+            if section['type'] == 'header':
+                continue
+            outline.append(f"### {feedback_title(section)}")
+            outline.extend(FEEDBACK_GUIDANCE.get(section['type'],
+                                                 ("- Relevance and presentation of this section for the target role",)))
+            outline.append("")
+        if plan['structure_changed']:
+            outline.append("### Overall Structure")
+            outline.append("- Feedback on the new organization and flow of the resume")
+        
+        unchanged = ', '.join(feedback_title(section) for section in plan['unchanged']) or "None"
+        removed = ', '.join(feedback_title(section) for section in plan['removed']) or "None"
+        previous_missing = ', '.join(previous_analysis.get('missing_skills', [])) or "None"
+        
+        prompt = f"""
+You are an expert resume reviewer and career consultant. You already reviewed an earlier version of this resume for a {job_role} position. The candidate has since edited it. Review only the sections below, which are new or changed, or depend on a changed section.
+
+CHANGED SECTIONS:
+{rerun_resume}
+
+UNCHANGED SECTIONS (already reviewed, not shown): {unchanged}
+REMOVED SECTIONS: {removed}
+MISSING SKILLS FROM THE EARLIER REVIEW: {previous_missing}
+
+TARGET JOB ROLE: {job_role}
+
+JOB DESCRIPTION: {job_description if job_description else "Not provided"}
+
+Please respond in the following structured format:
+
+## MISSING SKILLS & KEYWORDS
+- The updated list of 5-8 missing skills, keywords, or qualifications for this role
+- Drop earlier ones the changed sections now cover and keep the rest
+
+## SECTION-WISE FEEDBACK
+{chr(10).join(outline)}
+
+## REDUNDANT/VAGUE LANGUAGE
+- Only phrases from the changed sections, quoted exactly, each with a stronger alternative
+"""
+        if plan['structure_changed']:
+            prompt += """
+## FORMATTING & CLARITY RECOMMENDATIONS
+- Specific suggestions for the new layout and information hierarchy
+"""
+        if rewrite:
+            prompt += f"""
+FINAL SECTION:
+After the sections above, add a final section that starts with the exact line "## IMPROVED RESUME" and contains improved versions of the changed sections only, each starting with its heading line (the name and contact lines need no heading). Incorporate missing skills naturally, use specific, quantified achievements and action verbs, and tailor them for the {job_role} position. Do not use "##" or the bracketed section labels anywhere inside the improved sections.
+"""
+        return prompt
+    
+    def _create_json_analysis_prompt(self, resume_content, job_role, job_description, include_improved_resume=False,
+                                     sections=None):
+        """Create prompt for the structured (JSON) analysis"""
+        prompt = f"""
+You are an expert resume reviewer and career consultant. Analyze the following resume for a {job_role} position.
+
+RESUME CONTENT:
+{resume_content}
+
+TARGET JOB ROLE: {job_role}
+
+JOB DESCRIPTION: {job_description if job_description else "Not provided"}
+
+Respond with a single JSON object and nothing else, using exactly this structure:
+{json_schema_description(include_improved_resume, self._feedback_titles(sections))}
+
+Give 5-8 missing skills focused on technical skills, certifications, tools and industry-specific terms. Make all feedback detailed, specific and actionable for the {job_role} position.
+"""
+        if include_improved_resume:
+            prompt += f"""
+The improved resume should incorporate the missing skills naturally, replace weak or vague language with specific, quantified achievements, use action verbs, and be ATS-friendly and tailored for the {job_role} position.
+"""
+        return prompt
+    
+    def _feedback_titles(self, sections):
+        present, _ = feedback_sections(sections)
+        return [section.title() for section in present] + ["Overall Structure"]
+    
     def _parse_analysis_response(self, response_text):
         """Parse the structured response from Gemini"""
         analysis = {
@@ -99,8 +712,9 @@ Provide detailed, actionable feedback that would help a job seeker improve their
         }
         
         try:
-            # Simple parsing based on headers
-            sections = response_text.split('##')
+            # Simple parsing based on level-2 headers; '###' subsections stay
+            # inside their parent section
+            sections = re.split(r'^\s*##(?!#)', response_text, flags=re.MULTILINE)
             
             for section in sections:
                 section = section.strip()
@@ -166,10 +780,22 @@ Provide detailed, actionable feedback that would help a job seeker improve their
         
         return feedback
     
-    def _generate_improved_resume(self, resume_content, job_role, job_description, analysis):
-        """Generate an improved version of the resume"""
-        try:
-            prompt = f"""
+    def _create_improved_resume_prompt(self, resume_content, job_role, job_description, analysis):
+        """Create prompt for the improved resume"""
+        local_analysis = analysis.get('local_analysis') or {}
+        missing_skills = _merge_keywords(analysis.get('missing_skills', []),
+                                         local_analysis.get('missing_keywords', []))
+        matched_keywords = local_analysis.get('matched_keywords', [])
+        
+        if matched_keywords or local_analysis.get('missing_keywords'):
+            # The local keyword pass already distilled the posting; send that instead of the text
+            job_context = f"KEY JOB REQUIREMENTS: {', '.join(_merge_keywords(local_analysis.get('missing_keywords', []), matched_keywords))}"
+        else:
+            # The analysis prompt already used the full posting; context is enough here
+            job_description = self.prompt_budget.shorten_job_description(job_description)
+            job_context = f"JOB DESCRIPTION: {job_description if job_description else 'Not provided'}"
+        
+        prompt = f"""
 Based on the following resume analysis, create an improved version of the resume that addresses the feedback and is optimized for a {job_role} position.
 
 ORIGINAL RESUME:
@@ -177,10 +803,11 @@ ORIGINAL RESUME:
 
 TARGET JOB ROLE: {job_role}
 
-JOB DESCRIPTION: {job_description if job_description else "Not provided"}
+{job_context}
 
 ANALYSIS FEEDBACK:
-- Missing Skills: {', '.join(analysis.get('missing_skills', []))}
+- Missing Skills: {', '.join(missing_skills)}
+- Keywords Already Covered (keep them): {', '.join(matched_keywords) if matched_keywords else "None identified"}
 - Key areas for improvement based on the detailed analysis provided
 
 Please create an improved resume that:
@@ -190,15 +817,76 @@ Please create an improved resume that:
 4. Maintains the person's authentic experience while optimizing presentation
 5. Uses action verbs and quantified results where possible
 
-Format the improved resume professionally with clear sections and bullet points. Make it ATS-friendly and tailored for the {job_role} position.
+Format the improved resume professionally with clear sections and bullet points, without the bracketed section labels used above. Make it ATS-friendly and tailored for the {job_role} position.
 
 IMPROVED RESUME:
 """
+        return prompt
+    
+    def _generate_improved_resume(self, resume_content, job_role, job_description, analysis):
+        """Generate an improved version of the resume"""
+        try:
+            prompt = self._create_improved_resume_prompt(resume_content, job_role, job_description, analysis)
+            
+            response = self._generate(prompt, "improved resume")
+            
+            return response.text if response.text else IMPROVED_RESUME_UNAVAILABLE
+            
+        except Exception as e:
+            logging.error(f"Error generating improved resume: {e}")
+            return IMPROVED_RESUME_ERROR
+    
+    async def _generate_improved_resume_async(self, resume_content, job_role, job_description, analysis):
+        try:
+            prompt = self._create_improved_resume_prompt(resume_content, job_role, job_description, analysis)
             
-            response = self.model.generate_content(prompt)
+            response = await self._generate_async(prompt, "improved resume")
             
-            return response.text if response.text else "Unable to generate improved resume."
+            return response.text if response.text else IMPROVED_RESUME_UNAVAILABLE
             
         except Exception as e:
             logging.error(f"Error generating improved resume: {e}")
-            return "Error generating improved resume. Please try again."
+            return IMPROVED_RESUME_ERROR
+    
+    def stream_improved_resume(self, resume_content, job_role, job_description, analysis, sections=None):
+        """
+        Generate the improved resume as a stream of text chunks
+        """
+        prompt = self._stream_prompt(resume_content, job_role, job_description, analysis, sections)
+        started = time.perf_counter()
+        try:
+            for chunk in self._generate(prompt, "improved resume (streaming)", stream=True):
+                text = self._chunk_text(chunk)
+                if text:
+                    yield text
+            record_stage('llm_improved_resume_stream', time.perf_counter() - started)
+        except Exception as e:
+            raise self._stream_error(e)
+    
+    async def stream_improved_resume_async(self, resume_content, job_role, job_description, analysis, sections=None):
+        """stream_improved_resume() as an async generator of text chunks"""
+        prompt = self._stream_prompt(resume_content, job_role, job_description, analysis, sections)
+        started = time.perf_counter()
+        try:
+            async for chunk in await self._generate_async(prompt, "improved resume (streaming)", stream=True):
+                text = self._chunk_text(chunk)
+                if text:
+                    yield text
+            record_stage('llm_improved_resume_stream', time.perf_counter() - started)
+        except Exception as e:
+            raise self._stream_error(e)
+    
+    def _stream_prompt(self, resume_content, job_role, job_description, analysis, sections):
+        resume_content, job_description = self.prepare_inputs(resume_content, job_description, sections)
+        return self._create_improved_resume_prompt(resume_content, job_role, job_description, analysis)
+    
+    def _chunk_text(self, chunk):
+        text = getattr(chunk, 'text', '')
+        if text:
+            BYTES_PROCESSED.inc(len(text), kind='response')
+        return text
+    
+    def _stream_error(self, error):
+        ERRORS.inc(stage='llm_improved_resume_stream')
+        logging.error(f"Error streaming improved resume: {error}")
+        return Exception(f"Failed to stream improved resume: {str(error)}")
@@ -0,0 +1,36 @@
+"""
+Gunicorn settings, picked up automatically from the working directory.
+
+GUNICORN_PRELOAD=true loads the app once in the master and calls
+routes.warm_up() there, so workers fork with PyMuPDF, ReportLab and the
+Gemini SDK already imported and share those pages copy-on-write. The model
+client, PDF process pool and thread pools are still created lazily inside
+each worker. Without preload, GUNICORN_WARM_UP=true runs the same warm-up in
+every worker before it accepts requests.
+"""
+import gc
+import os
+
+
+def _env_flag(name, default='false'):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
+preload_app = _env_flag('GUNICORN_PRELOAD')
+_warm_up = _env_flag('GUNICORN_WARM_UP', 'true' if preload_app else 'false')
+
+
+def when_ready(server):
+    if preload_app and _warm_up:
+        from routes import warm_up as warm_up_app
+        warm_up_app()
+        server.log.info("Warmed up application in the master before forking workers")
+        # Move everything loaded so far out of the collector's reach, so GC
+        # passes in workers do not touch (and un-share) the preloaded pages
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    if _warm_up and not preload_app:
+        from routes import warm_up as warm_up_app
+        warm_up_app()
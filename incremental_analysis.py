@@ -0,0 +1,191 @@
+"""
+Incremental re-analysis of an edited resume: diff its sections against the
+previous submission, decide what the model has to look at again, and merge
+the partial answer into the previous analysis dict.
+"""
+import re
+import difflib
+import hashlib
+from resume_sections import SECTION_HEADER, segment_text, section_type_for_title
+
+# Feedback on these sections also goes stale when a section they summarize changes
+SECTION_DEPENDENTS = {
+    'experience': ('summary',),
+    'projects': ('summary',),
+    'skills': ('summary',),
+}
+OVERALL_FEEDBACK = "Overall Structure"
+
+_QUOTED_PHRASE = re.compile(r'^["“]([^"”]+)["”]')
+
+
+def _normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def _fingerprint(section):
+    return hashlib.sha256(_normalize(section['text']).encode('utf-8')).hexdigest()
+
+
+def _header_fingerprint(sections):
+    return _fingerprint({'text': '\n'.join(section['text'] for section in sections
+                                           if section['type'] == SECTION_HEADER)})
+
+
+def _edited_chars(old_text, new_text):
+    """Characters in the words inserted, deleted or replaced between two versions of a section"""
+    old_words, new_words = _normalize(old_text).split(), _normalize(new_text).split()
+    matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+    edited = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            edited += max(sum(len(word) + 1 for word in old_words[i1:i2]),
+                          sum(len(word) + 1 for word in new_words[j1:j2]))
+    return edited
+
+
+def _keyed(sections):
+    """{(type, title, occurrence): section}, so repeated 'other' sections stay distinct"""
+    keyed = {}
+    seen = {}
+    for section in sections:
+        base = (section['type'], _normalize(section['title']))
+        seen[base] = seen.get(base, 0) + 1
+        keyed[base + (seen[base],)] = section
+    return keyed
+
+
+def feedback_title(section):
+    """Key the section's feedback is stored under in analysis['section_feedback']"""
+    if section['type'] == SECTION_HEADER:
+        return "Name and Contact"
+    return section['title'] if section['type'] == 'other' else section['type'].title()
+
+
+def plan_reanalysis(previous, sections, job_role, job_description, max_change=0.5):
+    """
+    Compare a stored result with a new submission. Returns None when a full
+    analysis is needed (different job, a different candidate's name and
+    contact lines, nothing to reuse, or more than ``max_change`` of the
+    characters edited), else a plan dict:
+    'rerun' (sections of the new resume to review again), 'removed',
+    'unchanged', 'structure_changed' and 'change_ratio'.
+    """
+    if not previous or not previous.get('sections') or not sections:
+        return None
+    analysis = previous.get('analysis') or {}
+    if not analysis.get('section_feedback'):
+        return None
+    if (_normalize(previous.get('job_role')) != _normalize(job_role)
+            or _normalize(previous.get('job_description')) != _normalize(job_description)):
+        return None
+
+    # A changed header means another candidate's resume, not an edit of this one
+    if _header_fingerprint(previous['sections']) != _header_fingerprint(sections):
+        return None
+
+    old = _keyed(previous['sections'])
+    new = _keyed(sections)
+    changed = [key for key, section in new.items()
+               if key not in old or _fingerprint(old[key]) != _fingerprint(section)]
+    removed = [old[key] for key in old if key not in new]
+
+    # Only the edited characters count, so fixing one bullet in a long section stays incremental
+    changed_chars = (sum(_edited_chars(old[key]['text'] if key in old else '', new[key]['text']) for key in changed)
+                     + sum(len(_normalize(section['text'])) for section in removed))
+    total_chars = max(sum(len(_normalize(section['text'])) for section in sections), 1)
+    change_ratio = changed_chars / total_chars
+    if change_ratio > max_change:
+        return None
+
+    changed_types = {new[key]['type'] for key in changed} | {section['type'] for section in removed}
+    dependent_types = {dependent for section_type in changed_types
+                       for dependent in SECTION_DEPENDENTS.get(section_type, ())}
+    rerun_keys = [key for key in new if key in changed or new[key]['type'] in dependent_types]
+
+    return {
+        'rerun': [new[key] for key in rerun_keys],
+        'removed': removed,
+        'unchanged': [new[key] for key in new if key not in rerun_keys],
+        'structure_changed': [key[0] for key in old] != [key[0] for key in new],
+        'change_ratio': round(change_ratio, 3),
+    }
+
+
+def merge_analysis(previous_analysis, partial, plan, resume_content):
+    """
+    Previous analysis with the partial one's answers for the re-reviewed
+    sections swapped in. Feedback for removed sections is dropped; phrases
+    flagged as vague earlier are kept only while they are still in the resume.
+    """
+    rerun_titles = {feedback_title(section) for section in plan['rerun']}
+    stale_titles = rerun_titles | {feedback_title(section) for section in plan['removed']}
+    stale_types = {section['type'] for section in plan['rerun'] + plan['removed']}
+    new_feedback = partial.get('section_feedback') or {}
+
+    section_feedback = {}
+    for title, feedback in (previous_analysis.get('section_feedback') or {}).items():
+        is_stale = title in stale_titles or section_type_for_title(title) in stale_types
+        if title in new_feedback:
+            section_feedback[title] = new_feedback[title]
+        elif not is_stale:
+            section_feedback[title] = feedback
+    for title, feedback in new_feedback.items():
+        section_feedback.setdefault(title, feedback)
+    # Keep Overall Structure last, where the full analysis puts it
+    if OVERALL_FEEDBACK in section_feedback:
+        section_feedback[OVERALL_FEEDBACK] = section_feedback.pop(OVERALL_FEEDBACK)
+
+    resume_lower = _normalize(resume_content)
+    redundant_language = []
+    seen = set()
+    for item in (previous_analysis.get('redundant_language') or []):
+        quoted = _QUOTED_PHRASE.match(item.strip())
+        if quoted and _normalize(quoted.group(1)) not in resume_lower:
+            continue
+        redundant_language.append(item)
+        seen.add(_normalize(item))
+    for item in (partial.get('redundant_language') or []):
+        if _normalize(item) not in seen:
+            redundant_language.append(item)
+            seen.add(_normalize(item))
+
+    return {
+        'missing_skills': partial.get('missing_skills') or previous_analysis.get('missing_skills', []),
+        'section_feedback': section_feedback,
+        'redundant_language': redundant_language,
+        'formatting_recommendations': (partial.get('formatting_recommendations')
+                                       or previous_analysis.get('formatting_recommendations', [])),
+    }
+
+
+def _section_text(section):
+    if section['type'] == SECTION_HEADER:
+        return section['text']
+    return f"{section['title'].upper()}\n{section['text']}".strip()
+
+
+def splice_improved_resume(previous_improved, rewritten, removed_types=()):
+    """
+    Previous improved resume with each section found in ``rewritten`` replaced
+    by its new version (matched by type, and by title for untyped sections).
+    Sections with no counterpart are appended. Returns None when there is
+    nothing to splice into.
+    """
+    if not previous_improved or not rewritten or not rewritten.strip():
+        return None
+    sections = [section for section in segment_text(previous_improved) if section['type'] not in removed_types]
+
+    for replacement in segment_text(rewritten):
+        for index, section in enumerate(sections):
+            if section['type'] == replacement['type'] and (
+                    section['type'] != 'other' or _normalize(section['title']) == _normalize(replacement['title'])):
+                sections[index] = replacement
+                break
+        else:
+            if replacement['type'] == SECTION_HEADER:
+                sections.insert(0, replacement)
+            else:
+                sections.append(replacement)
+
+    return '\n\n'.join(_section_text(section) for section in sections)
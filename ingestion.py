@@ -0,0 +1,359 @@
+"""
+Turns an uploaded resume into text, whatever its format. Each format has a
+streaming extractor that yields pieces in document order: PDF pages, DOCX
+paragraphs or decoded TXT chunks. Reading stops as soon as the character
+budget is reached, so a huge upload costs no more than the text that would
+be kept anyway. A PDF whose first pages are images without a text layer is
+rejected as a scan before the rest of it is touched.
+"""
+import os
+import io
+import abc
+import codecs
+import logging
+import zipfile
+from xml.etree import ElementTree
+from metrics import timed, BYTES_PROCESSED
+from resume_sections import segment_layout, segment_text
+
+# Far more than any resume; the prompt budget trims what reaches the model
+DEFAULT_MAX_CHARS = 100_000
+# Pages checked for a text layer before a PDF is treated as a scan
+DEFAULT_SAMPLE_PAGES = 3
+# Fewer non-blank characters than this on the sampled pages means no text layer
+DEFAULT_MIN_TEXT_CHARS = 50
+
+TXT_CHUNK_BYTES = 64 * 1024
+
+# charset_normalizer guesses used for non-UTF-8 text; anything else is read as Windows-1252
+GUESSED_ENCODINGS = ('cp1251', 'cp1253', 'cp1254', 'cp1255', 'cp1256', 'cp932', 'cp949', 'gb18030', 'big5')
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class IngestionError(Exception):
+    """An upload that cannot be used; the message is safe to show the user"""
+    pass
+
+
+class UnsupportedFormatError(IngestionError):
+    pass
+
+
+class ImageOnlyPDFError(IngestionError):
+    pass
+
+
+def _is_bytes(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def read_pieces(pieces, max_chars=DEFAULT_MAX_CHARS, separator='\n'):
+    """
+    Collect pieces (dicts with 'text') until their joined text reaches
+    max_chars, then close the generator so the extractor stops reading.
+    Returns (pieces, truncated).
+    """
+    collected = []
+    total = 0
+    truncated = False
+    try:
+        for piece in pieces:
+            collected.append(piece)
+            total += len(piece['text']) + (len(separator) if len(collected) > 1 else 0)
+            if max_chars and total >= max_chars:
+                truncated = True
+                break
+    finally:
+        if hasattr(pieces, 'close'):
+            pieces.close()
+    return collected, truncated
+
+
+class Extractor(abc.ABC):
+    """
+    Streams one file format as text pieces. Subclasses set ``extensions``
+    and ``separator`` (what goes between pieces) and implement iter_pieces().
+    """
+
+    name = 'text'
+    extensions = ()
+    separator = '\n'
+
+    @abc.abstractmethod
+    def iter_pieces(self, source):
+        """Yield {'text': ...} dicts from a path or bytes, in document order"""
+
+    def read(self, source, max_chars):
+        """(pieces, truncated) for up to max_chars of text"""
+        return read_pieces(self.iter_pieces(source), max_chars, self.separator)
+
+    def clean(self, text):
+        return text
+
+    def sections(self, text, pieces, truncated):
+        return segment_text(text)
+
+
+class TextExtractor(Extractor):
+    """Plain text, decoded chunk by chunk in the detected encoding"""
+
+    name = 'txt'
+    extensions = ('txt',)
+    separator = ''
+
+    def __init__(self, chunk_bytes=TXT_CHUNK_BYTES):
+        self.chunk_bytes = chunk_bytes
+
+    def iter_pieces(self, source):
+        stream = io.BytesIO(source) if _is_bytes(source) else open(source, 'rb')
+        try:
+            first = stream.read(self.chunk_bytes)
+            encoding = detect_encoding(first)
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            chunk = first
+            while chunk:
+                text = decoder.decode(chunk)
+                if text:
+                    yield {'text': text}
+                chunk = stream.read(self.chunk_bytes)
+            text = decoder.decode(b'', final=True)
+            if text:
+                yield {'text': text}
+        finally:
+            stream.close()
+
+    def clean(self, text):
+        return text.replace('\r\n', '\n').replace('\r', '\n').replace('\x00', '')
+
+
+def detect_encoding(sample):
+    """
+    Encoding of a text file from its first bytes: a BOM if there is one,
+    else UTF-8 when the sample decodes as UTF-8, else Windows-1252 unless
+    charset_normalizer (when installed) ranks one of GUESSED_ENCODINGS higher
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # Incremental, so a character split at the end of the sample is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return 'cp1252'
+    # Short samples often rank DOS and Baltic code pages first for Western
+    # text ("Müller" read as cp775 is "M³ller"), so only trust its guesses
+    # for scripts Windows-1252 cannot represent
+    for match in from_bytes(sample):
+        if match.encoding in ('cp1252', 'latin_1'):
+            break
+        if match.encoding in GUESSED_ENCODINGS:
+            return match.encoding
+    return 'cp1252'
+
+
+class DocxExtractor(Extractor):
+    """
+    Word documents, one piece per paragraph. word/document.xml is parsed
+    incrementally straight from the zip, so reading stops with the budget
+    and needs no extra dependency.
+    """
+
+    name = 'docx'
+    extensions = ('docx',)
+
+    def iter_pieces(self, source):
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(source) if _is_bytes(source) else source)
+        except zipfile.BadZipFile:
+            raise IngestionError("This DOCX file is damaged or not a Word document.")
+        try:
+            try:
+                document = archive.open('word/document.xml')
+            except KeyError:
+                raise IngestionError("This DOCX file has no document body.")
+            with document:
+                for event, element in ElementTree.iterparse(document, events=('end',)):
+                    if element.tag != f'{_WORD_NS}p':
+                        continue
+                    text = _paragraph_text(element)
+                    # Drop the parsed paragraph so memory stays flat on long documents
+                    element.clear()
+                    yield {'text': text}
+        except ElementTree.ParseError:
+            raise IngestionError("This DOCX file is damaged or not a Word document.")
+        finally:
+            archive.close()
+
+    def clean(self, text):
+        return clean_text(text)
+
+
+def _paragraph_text(paragraph):
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == f'{_WORD_NS}t':
+            parts.append(node.text or '')
+        elif node.tag == f'{_WORD_NS}tab':
+            parts.append('\t')
+        elif node.tag in (f'{_WORD_NS}br', f'{_WORD_NS}cr'):
+            parts.append('\n')
+    return ''.join(parts)
+
+
+class PDFExtractor(Extractor):
+    """
+    PDFs, one piece per page, read through a PDFParser (in-process or on its
+    extraction engine's parallel page ranges). If the first ``sample_pages``
+    pages hold images but almost no text, the document is rejected as a scan
+    before the rest is read.
+    """
+
+    name = 'pdf'
+    extensions = ('pdf',)
+
+    def __init__(self, parser=None, sample_pages=DEFAULT_SAMPLE_PAGES, min_text_chars=DEFAULT_MIN_TEXT_CHARS):
+        if parser is None:
+            from pdf_parser import PDFParser
+            parser = PDFParser()
+        self.parser = parser
+        self.sample_pages = sample_pages
+        self.min_text_chars = min_text_chars
+
+    def iter_pieces(self, source):
+        from pdf_engine import PDFOpenError
+
+        pages = self.parser.iter_pages(bytes(source) if _is_bytes(source) else source, self.parser.layout)
+        text_chars = 0
+        image_count = 0
+        page = None
+        try:
+            for page in pages:
+                if text_chars < self.min_text_chars:
+                    text_chars += len(''.join(page['text'].split()))
+                    image_count += page['image_count']
+                    if page['page_number'] == self.sample_pages and text_chars < self.min_text_chars and image_count:
+                        raise self._scanned()
+                yield page
+        except PDFOpenError as e:
+            raise IngestionError("This PDF could not be opened. It may be damaged or password protected.") from e
+        finally:
+            pages.close()
+        if page is None:
+            raise IngestionError("This PDF has no pages.")
+        # Short documents, or text that only starts after the sampled pages
+        if text_chars < self.min_text_chars and image_count:
+            raise self._scanned()
+
+    def _scanned(self):
+        return ImageOnlyPDFError("This PDF looks like a scanned image with no selectable text. "
+                                 "Please upload a text-based PDF or paste your resume as text.")
+
+    def clean(self, text):
+        return clean_text(text)
+
+    def sections(self, text, pieces, truncated):
+        # A cut-off last page no longer matches its layout lines
+        if self.parser.layout and not truncated and all('lines' in page for page in pieces):
+            return segment_layout([line for page in pieces for line in page['lines']])
+        return segment_text(text)
+
+
+def clean_text(text):
+    """Collapse runs of blank lines and strip each line, keeping paragraph breaks"""
+    lines = []
+    for line in (text or '').split('\n'):
+        line = line.strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return '\n'.join(lines).strip('\n')
+
+
+class Ingestor:
+    """
+    Picks the extractor for an upload by file extension and reads it within
+    the character budget. Register an Extractor to support another format.
+    """
+
+    def __init__(self, extractors=None, max_chars=DEFAULT_MAX_CHARS):
+        self.max_chars = max_chars
+        self.extractors = {}
+        for extractor in extractors if extractors is not None else (PDFExtractor(), DocxExtractor(), TextExtractor()):
+            self.register(extractor)
+
+    @classmethod
+    def from_env(cls, pdf_parser=None):
+        """
+        Ingestor configured from environment variables. PDFs are read with
+        pdf_parser (its engine, page limit and layout setting) when given.
+        """
+        if pdf_parser is None:
+            from pdf_parser import PDFParser
+            pdf_parser = PDFParser(max_pages=int(os.environ.get('PDF_MAX_PAGES', 50)))
+        pdf = PDFExtractor(
+            pdf_parser,
+            sample_pages=int(os.environ.get('INGEST_SCAN_SAMPLE_PAGES', DEFAULT_SAMPLE_PAGES)),
+            min_text_chars=int(os.environ.get('INGEST_MIN_TEXT_CHARS', DEFAULT_MIN_TEXT_CHARS)),
+        )
+        return cls([pdf, DocxExtractor(), TextExtractor()],
+                   max_chars=int(os.environ.get('INGEST_MAX_CHARS', DEFAULT_MAX_CHARS)))
+
+    def register(self, extractor):
+        for extension in extractor.extensions:
+            self.extractors[extension.lower()] = extractor
+
+    def extensions(self):
+        return set(self.extractors)
+
+    def extractor_for(self, filename):
+        extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        extractor = self.extractors.get(extension)
+        if extractor is None:
+            raise UnsupportedFormatError(f"Unsupported file type. Please upload one of: "
+                                         f"{', '.join(sorted(self.extractors)).upper()}.")
+        return extractor
+
+    def ingest(self, source, filename):
+        """
+        Read an upload (path or bytes). Returns a dict with 'text',
+        'sections', 'format', 'truncated' and 'pieces' (pages, paragraphs or
+        chunks read).
+        """
+        extractor = self.extractor_for(filename)
+        size = len(source) if _is_bytes(source) else os.path.getsize(source)
+        BYTES_PROCESSED.inc(size, kind=extractor.name)
+
+        with timed(f'{extractor.name}_extract'):
+            pieces, truncated = extractor.read(source, self.max_chars)
+
+        for piece in pieces:
+            if piece.get('error'):
+                logging.warning(f"Skipped page {piece['page_number']} of {filename}: {piece['error']}")
+
+        with timed('text_clean'):
+            text = extractor.clean(extractor.separator.join(piece['text'] for piece in pieces))
+        if truncated:
+            text = text[:self.max_chars]
+            logging.warning(f"{filename} is longer than {self.max_chars} characters; the rest was not read")
+        BYTES_PROCESSED.inc(len(text), kind='extracted_text')
+
+        if not text.strip():
+            raise IngestionError(f"No text content could be found in this {extractor.name.upper()} file.")
+
+        with timed('segment_sections'):
+            sections = extractor.sections(text, pieces, truncated)
+        return {'text': text, 'sections': sections, 'format': extractor.name, 'truncated': truncated,
+                'pieces': len(pieces)}
@@ -0,0 +1,179 @@
+import os
+import time
+import uuid
+import asyncio
+import inspect
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# Job states
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Shown for failures whose exception does not set ``user_message = True``;
+# arbitrary exception text can leak paths, keys or provider responses
+GENERIC_ERROR = "An error occurred while analyzing your resume. Please try again."
+
+
+class JobQueue:
+    """
+    In-process background job runner backed by a bounded thread pool.
+    Once an event loop is attached (the ASGI server does this), coroutine
+    functions run as tasks on that loop instead, up to ``max_async_jobs`` at
+    a time. Finished jobs are kept for ``ttl`` seconds so their result page
+    can be polled and revisited, then dropped.
+    """
+
+    def __init__(self, max_workers=4, ttl=1800, max_jobs=1000, max_async_jobs=256):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.max_async_jobs = max_async_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Per thread for pool jobs, per task for coroutine jobs
+        self._current = contextvars.ContextVar('current_job', default=None)
+        self._loop = None
+        self._async_slots = None
+
+    @classmethod
+    def from_env(cls):
+        """Create a queue configured from environment variables"""
+        return cls(
+            max_workers=int(os.environ.get('ANALYSIS_WORKERS', 4)),
+            ttl=int(os.environ.get('ANALYSIS_JOB_TTL', 1800)),
+            max_jobs=int(os.environ.get('ANALYSIS_MAX_JOBS', 1000)),
+            max_async_jobs=int(os.environ.get('ANALYSIS_ASYNC_JOBS', 256)),
+        )
+
+    def attach_loop(self, loop):
+        """Run coroutine jobs on this event loop from now on; None detaches it"""
+        self._loop = loop
+        self._async_slots = None
+
+    def has_event_loop(self):
+        return self._loop is not None and not self._loop.is_closed()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue func(*args, **kwargs) and return the new job id immediately. A
+        coroutine function is scheduled on the attached event loop.
+        """
+        is_coroutine = inspect.iscoroutinefunction(func)
+        if is_coroutine and not self.has_event_loop():
+            raise RuntimeError("Coroutine jobs need an event loop; call attach_loop() first")
+
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': JOB_PENDING,
+            'result': None,
+            'error': None,
+            'progress': None,
+            'created_at': time.time(),
+            'finished_at': None,
+        }
+        with self._lock:
+            self._evict_locked()
+            self._jobs[job_id] = job
+
+        if is_coroutine:
+            asyncio.run_coroutine_threadsafe(self._run_async(job, func, args, kwargs), self._loop)
+        else:
+            self._executor.submit(self._run, job, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        """Return a snapshot of the job, or None if unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if self._expired(job):
+                del self._jobs[job_id]
+                return None
+            return dict(job)
+
+    def report_progress(self, progress):
+        """
+        Attach partial results to the job running on this thread (or task), so
+        pollers can show them before the job finishes. A no-op outside a job.
+        """
+        job = self._current.get()
+        if job is None:
+            return
+        with self._lock:
+            job['progress'] = progress
+
+    def pending_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job['status'] in (JOB_PENDING, JOB_RUNNING))
+
+    def _run(self, job, func, args, kwargs):
+        self._start(job)
+        token = self._current.set(job)
+        try:
+            self._finish(job, result=func(*args, **kwargs))
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            self._current.reset(token)
+
+    async def _run_async(self, job, func, args, kwargs):
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_async_jobs)
+        async with self._async_slots:
+            self._start(job)
+            self._current.set(job)
+            try:
+                self._finish(job, result=await func(*args, **kwargs))
+            except Exception as e:
+                self._fail(job, e)
+
+    def _start(self, job):
+        with self._lock:
+            job['status'] = JOB_RUNNING
+
+    def _finish(self, job, result):
+        with self._lock:
+            job['result'] = result
+            job['status'] = JOB_DONE
+            job['finished_at'] = time.time()
+
+    def _fail(self, job, error):
+        if getattr(error, 'user_message', False):
+            logging.error(f"Background job {job['id']} failed: {error}")
+            message = str(error)
+        else:
+            logging.error(f"Background job {job['id']} failed: {error}", exc_info=error)
+            message = GENERIC_ERROR
+        with self._lock:
+            job['error'] = message
+            job['status'] = JOB_FAILED
+            job['finished_at'] = time.time()
+
+    def _expired(self, job):
+        return (self.ttl > 0 and job['finished_at'] is not None
+                and time.time() - job['finished_at'] > self.ttl)
+
+    def _evict_locked(self):
+        # Caller must hold self._lock
+        for job_id in [job_id for job_id, job in self._jobs.items() if self._expired(job)]:
+            del self._jobs[job_id]
+
+        # Over capacity: drop the oldest finished jobs first
+        if len(self._jobs) >= self.max_jobs:
+            finished = sorted(
+                (job for job in self._jobs.values() if job['finished_at'] is not None),
+                key=lambda job: job['finished_at']
+            )
+            for job in finished[:len(self._jobs) - self.max_jobs + 1]:
+                del self._jobs[job['id']]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
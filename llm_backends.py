@@ -0,0 +1,168 @@
+import os
+import abc
+import time
+import random
+import asyncio
+import logging
+import threading
+from fake_model import FakeStreamingModel, FakeResponse
+
+DEFAULT_GEMINI_MODEL = "gemini-1.5-flash"
+
+
+class LLMBackend(abc.ABC):
+    """
+    Interface every text-generation backend implements. Mirrors the subset of
+    genai.GenerativeModel that GeminiResumeAnalyzer uses: generate_content()
+    returns an object with ``.text``, or an iterable of such chunks when
+    stream=True.
+    """
+
+    model_name = "unknown"
+
+    @abc.abstractmethod
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        pass
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None, **kwargs):
+        """
+        Awaitable generate_content; with stream=True, returns an async
+        iterable of chunks. This default runs the blocking call in a thread;
+        backends with a native async client override it.
+        """
+        if not stream:
+            return await asyncio.to_thread(self.generate_content, prompt,
+                                           generation_config=generation_config, **kwargs)
+        chunks = await asyncio.to_thread(
+            lambda: list(self.generate_content(prompt, stream=True, generation_config=generation_config, **kwargs)))
+        return _iterate_async(chunks)
+
+
+async def _iterate_async(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini via the google-generativeai SDK"""
+
+    def __init__(self, model_name=None, api_key=None):
+        api_key = api_key or os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable not set")
+
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name or os.environ.get("GEMINI_MODEL", DEFAULT_GEMINI_MODEL)
+        self._model = genai.GenerativeModel(self.model_name)
+
+    def generate_content(self, prompt, stream=False, generation_config=None, timeout=None, **kwargs):
+        if generation_config is not None:
+            kwargs['generation_config'] = generation_config
+        if timeout:
+            kwargs['request_options'] = {'timeout': timeout}
+        return self._model.generate_content(prompt, stream=stream, **kwargs)
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None, timeout=None, **kwargs):
+        # The SDK's async client; a stream comes back as an async iterable response
+        if generation_config is not None:
+            kwargs['generation_config'] = generation_config
+        if timeout:
+            kwargs['request_options'] = {'timeout': timeout}
+        return await self._model.generate_content_async(prompt, stream=stream, **kwargs)
+
+
+class StubBackendError(Exception):
+    """Injected failure, shaped like a provider quota/availability error"""
+    retryable = True
+
+
+class StubBackend(FakeStreamingModel, LLMBackend):
+    """
+    Local deterministic backend for offline runs and load tests. Returns the
+    canned FakeStreamingModel responses after a configurable latency (plus
+    jitter) and fails a configurable fraction of calls.
+    """
+
+    model_name = "stub"
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=None, chunk_delay=0.0, **kwargs):
+        super().__init__(chunk_delay=chunk_delay, **kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls):
+        """Create a stub configured from environment variables (times in ms)"""
+        seed = os.environ.get("STUB_SEED")
+        return cls(
+            latency=float(os.environ.get("STUB_LATENCY_MS", 0)) / 1000,
+            jitter=float(os.environ.get("STUB_JITTER_MS", 0)) / 1000,
+            error_rate=float(os.environ.get("STUB_ERROR_RATE", 0)),
+            seed=int(seed) if seed is not None else None,
+            chunk_delay=float(os.environ.get("STUB_CHUNK_DELAY_MS", 0)) / 1000,
+        )
+
+    def _next_call(self):
+        """(delay, fail) for the next call"""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        return delay, fail
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        delay, fail = self._next_call()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise StubBackendError("429 Resource has been exhausted (injected by stub backend)")
+
+        return super().generate_content(prompt, stream=stream, generation_config=generation_config, **kwargs)
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None, **kwargs):
+        # Same latency and failures, but waiting never blocks the event loop
+        delay, fail = self._next_call()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if fail:
+            raise StubBackendError("429 Resource has been exhausted (injected by stub backend)")
+
+        text = self._response_text_for(prompt, generation_config)
+        if stream:
+            return self._stream_async(text)
+        return FakeResponse(text)
+
+    async def _stream_async(self, text):
+        for chunk in self._stream_chunks(text):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield FakeResponse(chunk)
+
+
+def configured_backend_name():
+    """
+    The backend selected by the LLM_BACKEND environment variable: 'gemini'
+    (default) or 'stub'. GEMINI_FAKE_MODEL=true is kept as an alias for the
+    stub with no latency.
+    """
+    if os.environ.get("GEMINI_FAKE_MODEL", "").lower() in ("1", "true", "yes"):
+        return "stub"
+    return os.environ.get("LLM_BACKEND", "gemini").lower()
+
+
+def create_backend(name=None):
+    """Build the backend named by ``name``, or the configured one"""
+    name = (name or configured_backend_name()).lower()
+
+    if name == "stub":
+        logging.info("Using stub LLM backend (no network calls)")
+        return StubBackend.from_env()
+    if name == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Unknown LLM_BACKEND '{name}' (expected 'gemini' or 'stub')")
@@ -0,0 +1,417 @@
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+from llm_backends import LLMBackend
+
+
+class LLMUnavailableError(Exception):
+    """The model could not be reached within our limits; safe to retry later"""
+    pass
+
+
+class CircuitOpenError(LLMUnavailableError):
+    pass
+
+
+class QueueTimeoutError(LLMUnavailableError):
+    pass
+
+
+class RetriesExhaustedError(LLMUnavailableError):
+    pass
+
+
+# HTTP status at the start of an error message ("503 Service Unavailable", "429: quota")
+_LEADING_STATUS_RE = re.compile(r'^\s*(\d{3})\b')
+RETRYABLE_STATUS_CODES = (408, 429)
+RETRYABLE_MESSAGES = ('resource has been exhausted', 'quota', 'unavailable', 'deadline', 'internal error')
+
+
+def is_retryable(error):
+    """Quota, server-side (5xx), timeout and connection errors are worth retrying; bad requests are not"""
+    if getattr(error, 'retryable', False):
+        return True
+
+    try:
+        from google.api_core import exceptions as google_exceptions
+        if isinstance(error, (google_exceptions.TooManyRequests,
+                              google_exceptions.ResourceExhausted,
+                              google_exceptions.ServerError,
+                              google_exceptions.DeadlineExceeded)):
+            return True
+    except ImportError:
+        pass
+
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+
+    # Google API errors carry the HTTP status as .code; other clients use .status_code
+    status = _status_code(error)
+    if status is None:
+        match = _LEADING_STATUS_RE.match(str(error))
+        status = int(match.group(1)) if match else None
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or 500 <= status < 600
+
+    message = str(error).lower()
+    return any(marker in message for marker in RETRYABLE_MESSAGES)
+
+
+def _status_code(error):
+    for attribute in ('code', 'status_code'):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``capacity``"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available; else return the seconds until one is"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def _next_wait(self, wait, deadline):
+        """Seconds to wait before trying again, or None once the deadline has passed"""
+        if deadline is None:
+            return wait
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        return min(wait, remaining)
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to timeout seconds. Returns False on timeout."""
+        if not self.rate or self.rate <= 0:
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            wait = self._next_wait(wait, deadline)
+            if wait is None:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, timeout=None):
+        """acquire() for coroutines: waits without blocking the event loop"""
+        if not self.rate or self.rate <= 0:
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            wait = self._next_wait(wait, deadline)
+            if wait is None:
+                return False
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls for
+    ``reset_timeout`` seconds, then lets a single trial call through (half-open)
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give up a half-open trial slot without recording an outcome"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning(f"LLM circuit breaker opened after {self._failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ResilientBackend(LLMBackend):
+    """
+    Wraps any LLMBackend with a shared token-bucket rate limit, a cap on
+    in-flight calls, per-call timeouts, exponential backoff with jitter on
+    retryable errors and a circuit breaker. One instance is shared by every
+    thread in the process. Coroutines on the event loop share the same rate
+    limit and breaker but get their own pool of ``max_in_flight`` slots.
+    """
+
+    def __init__(self, backend, rate_per_second=5.0, burst=10, max_in_flight=8, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, timeout=60.0, queue_timeout=30.0,
+                 circuit_failures=5, circuit_reset=30.0):
+        self.backend = backend
+        self.model_name = getattr(backend, 'model_name', 'unknown')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.rate_limiter = TokenBucket(rate_per_second, burst)
+        self.circuit = CircuitBreaker(circuit_failures, circuit_reset)
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._async_slots = None  # asyncio.Semaphore, created on the event loop that first needs it
+        self._lock = threading.Lock()
+        self.metrics = {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'retries': 0,
+            'circuit_rejections': 0,
+            'queue_timeouts': 0,
+            'in_flight': 0,
+            'queue_depth': 0,
+            'max_queue_depth': 0,
+        }
+
+    @classmethod
+    def from_env(cls, backend):
+        """Wrap backend with limits configured from environment variables"""
+        return cls(
+            backend,
+            rate_per_second=float(os.environ.get('LLM_RATE_PER_SECOND', 5)),
+            burst=int(os.environ.get('LLM_BURST', 10)),
+            max_in_flight=int(os.environ.get('LLM_MAX_IN_FLIGHT', 8)),
+            max_retries=int(os.environ.get('LLM_MAX_RETRIES', 3)),
+            backoff_base=float(os.environ.get('LLM_BACKOFF_BASE', 0.5)),
+            backoff_max=float(os.environ.get('LLM_BACKOFF_MAX', 8)),
+            timeout=float(os.environ.get('LLM_TIMEOUT', 60)),
+            queue_timeout=float(os.environ.get('LLM_QUEUE_TIMEOUT', 30)),
+            circuit_failures=int(os.environ.get('LLM_CIRCUIT_FAILURES', 5)),
+            circuit_reset=float(os.environ.get('LLM_CIRCUIT_RESET', 30)),
+        )
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self.metrics[name] += delta
+            if name == 'queue_depth' and self.metrics['queue_depth'] > self.metrics['max_queue_depth']:
+                self.metrics['max_queue_depth'] = self.metrics['queue_depth']
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics['circuit_state'] = self.circuit.state
+        return metrics
+
+    def _acquire_slot(self):
+        """Wait for both a rate-limit token and an in-flight slot"""
+        self._count('queue_depth')
+        try:
+            deadline = time.monotonic() + self.queue_timeout
+            if not self.rate_limiter.acquire(timeout=self.queue_timeout):
+                self._count('queue_timeouts')
+                raise QueueTimeoutError("Timed out waiting for the LLM rate limiter")
+            if not self._slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                self._count('queue_timeouts')
+                raise QueueTimeoutError("Timed out waiting for a free LLM request slot")
+        finally:
+            self._count('queue_depth', -1)
+        self._count('in_flight')
+
+    def _release_slot(self):
+        self._count('in_flight', -1)
+        self._slots.release()
+
+    async def _acquire_slot_async(self):
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_in_flight)
+        self._count('queue_depth')
+        try:
+            deadline = time.monotonic() + self.queue_timeout
+            if not await self.rate_limiter.acquire_async(timeout=self.queue_timeout):
+                self._count('queue_timeouts')
+                raise QueueTimeoutError("Timed out waiting for the LLM rate limiter")
+            try:
+                await asyncio.wait_for(self._async_slots.acquire(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self._count('queue_timeouts')
+                raise QueueTimeoutError("Timed out waiting for a free LLM request slot") from None
+        finally:
+            self._count('queue_depth', -1)
+        self._count('in_flight')
+
+    def _release_slot_async(self):
+        self._count('in_flight', -1)
+        self._async_slots.release()
+
+    def _backoff(self, attempt):
+        # Full jitter: sleep a random amount up to the exponential cap
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        if self.timeout:
+            kwargs.setdefault('timeout', self.timeout)
+        if stream:
+            return self._generate_stream(prompt, generation_config, kwargs)
+        return self._call_with_retries(
+            lambda: self.backend.generate_content(prompt, generation_config=generation_config, **kwargs))
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None, **kwargs):
+        if self.timeout:
+            kwargs.setdefault('timeout', self.timeout)
+        if stream:
+            return await self._generate_stream_async(prompt, generation_config, kwargs)
+        return await self._call_with_retries_async(
+            lambda: self.backend.generate_content_async(prompt, generation_config=generation_config, **kwargs))
+
+    def _record_error(self, error, attempt):
+        """Count a failed attempt; returns the backoff delay, or raises when it should not be retried"""
+        if not is_retryable(error):
+            # A rejected request says nothing about the provider's health, so it
+            # must not trip the breaker; just hand back a half-open trial slot
+            self.circuit.release_trial()
+            self._count('failures')
+            raise error
+        self.circuit.record_failure()
+        if attempt == self.max_retries:
+            self._count('failures')
+            raise RetriesExhaustedError(f"LLM call failed after {attempt + 1} attempts: {error}") from error
+        delay = self._backoff(attempt)
+        logging.warning(f"Retryable LLM error (attempt {attempt + 1}), retrying in {delay:.2f}s: {error}")
+        self._count('retries')
+        return delay
+
+    def _call_with_retries(self, call):
+        self._count('calls')
+        for attempt in range(self.max_retries + 1):
+            if not self.circuit.allow():
+                self._count('circuit_rejections')
+                raise CircuitOpenError("LLM circuit breaker is open; not calling the model")
+
+            try:
+                self._acquire_slot()
+            except QueueTimeoutError:
+                self.circuit.release_trial()
+                raise
+
+            try:
+                result = call()
+            except Exception as e:
+                delay = self._record_error(e, attempt)
+            else:
+                self.circuit.record_success()
+                self._count('successes')
+                return result
+            finally:
+                self._release_slot()
+            time.sleep(delay)
+
+    async def _call_with_retries_async(self, call):
+        """_call_with_retries for a coroutine factory"""
+        self._count('calls')
+        for attempt in range(self.max_retries + 1):
+            if not self.circuit.allow():
+                self._count('circuit_rejections')
+                raise CircuitOpenError("LLM circuit breaker is open; not calling the model")
+
+            try:
+                await self._acquire_slot_async()
+            except (QueueTimeoutError, asyncio.CancelledError):
+                self.circuit.release_trial()
+                raise
+
+            try:
+                result = await call()
+            except asyncio.CancelledError:
+                self.circuit.release_trial()
+                raise
+            except Exception as e:
+                delay = self._record_error(e, attempt)
+            else:
+                self.circuit.record_success()
+                self._count('successes')
+                return result
+            finally:
+                self._release_slot_async()
+            await asyncio.sleep(delay)
+
+    def _generate_stream(self, prompt, generation_config, kwargs):
+        # Only opening the stream is retried (and holds a slot); once chunks
+        # have been sent to the client a retry would duplicate text
+        def open_stream():
+            chunks = iter(self.backend.generate_content(prompt, stream=True,
+                                                        generation_config=generation_config, **kwargs))
+            return chunks, next(chunks, None)
+
+        chunks, first = self._call_with_retries(open_stream)
+        if first is not None:
+            yield first
+        yield from chunks
+
+    async def _generate_stream_async(self, prompt, generation_config, kwargs):
+        async def open_stream():
+            response = await self.backend.generate_content_async(prompt, stream=True,
+                                                                 generation_config=generation_config, **kwargs)
+            chunks = response.__aiter__()
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = None
+            return chunks, first
+
+        chunks, first = await self._call_with_retries_async(open_stream)
+        return _prepend_async(first, chunks)
+
+
+async def _prepend_async(first, chunks):
+    if first is not None:
+        yield first
+    async for chunk in chunks:
+        yield chunk
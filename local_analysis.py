@@ -0,0 +1,234 @@
+import re
+import math
+import time
+from collections import Counter
+
+# Canonical skill name -> extra spellings. Matched case-insensitively on
+# token n-grams, so multi-word names ("machine learning") work too. Names
+# that are also ordinary English words ("go", "rest", "excel") are only
+# matched through unambiguous spellings.
+SKILL_TERMS = {
+    # Languages
+    'Python': (), 'Java': (), 'JavaScript': ('js', 'ecmascript'), 'TypeScript': ('ts',),
+    'Golang': ('go lang',), 'Rust': (), 'C++': ('cpp',), 'C#': ('csharp', 'c sharp'), 'Ruby': (),
+    'PHP': (), 'Kotlin': (), 'Swift': (), 'Scala': (), 'SQL': (), 'Bash': ('shell scripting',),
+    'HTML': ('html5',), 'CSS': ('css3',), 'MATLAB': (),
+    # Frameworks and libraries
+    'React': ('react.js', 'reactjs'), 'Angular': ('angularjs',), 'Vue': ('vue.js', 'vuejs'),
+    'Node.js': ('node', 'nodejs'), 'Django': (), 'Flask': (), 'FastAPI': (), 'Spring Boot': ('spring framework',),
+    'Express.js': ('expressjs',), '.NET': ('dotnet', 'asp.net'), 'Rails': ('ruby on rails',),
+    'Pandas': (), 'NumPy': (), 'scikit-learn': ('sklearn',), 'TensorFlow': (), 'PyTorch': (),
+    'Spark': ('apache spark', 'pyspark'), 'Hadoop': (), 'Kafka': ('apache kafka',), 'Airflow': ('apache airflow',),
+    'GraphQL': (), 'REST APIs': ('restful', 'rest api', 'restful apis', 'restful services'), 'gRPC': (),
+    # Data stores
+    'PostgreSQL': ('postgres',), 'MySQL': (), 'MongoDB': ('mongo',), 'Redis': (), 'Elasticsearch': ('elastic search',),
+    'Cassandra': (), 'DynamoDB': (), 'Snowflake': (), 'BigQuery': (), 'SQLite': (), 'Oracle': (),
+    # Cloud and infrastructure
+    'AWS': ('amazon web services',), 'Azure': ('microsoft azure',), 'GCP': ('google cloud', 'google cloud platform'),
+    'Docker': (), 'Kubernetes': ('k8s',), 'Terraform': (), 'Ansible': (), 'Jenkins': (),
+    'CI/CD': ('ci cd', 'continuous integration', 'continuous delivery', 'continuous deployment'),
+    'GitHub Actions': (), 'Git': (), 'Linux': (), 'Microservices': ('microservice',), 'Serverless': ('lambda',),
+    'Prometheus': (), 'Grafana': (), 'Nginx': (),
+    # Data and ML
+    'Machine Learning': ('ml',), 'Deep Learning': (), 'NLP': ('natural language processing',),
+    'Computer Vision': (), 'Data Analysis': ('data analytics',), 'Data Visualization': (),
+    'ETL': ('data pipelines', 'data pipeline'), 'Statistics': ('statistical analysis',), 'A/B Testing': ('ab testing',),
+    'Tableau': (), 'Power BI': ('powerbi',), 'Microsoft Excel': ('ms excel', 'excel spreadsheets'), 'LLMs': ('llm', 'large language models'),
+    # Practices
+    'Agile': (), 'Scrum': (), 'Kanban': (), 'TDD': ('test driven development', 'test-driven development'),
+    'Unit Testing': ('unit tests',), 'System Design': (), 'Distributed Systems': (), 'Security': ('cybersecurity',),
+    'OAuth': ('oauth2',), 'Performance Tuning': ('performance optimization',), 'Observability': ('monitoring',),
+    # Business and soft skills
+    'Project Management': (), 'Product Management': (), 'Stakeholder Management': (), 'Leadership': (),
+    'Mentoring': ('mentorship',), 'Communication': (), 'Jira': (), 'Figma': (), 'SEO': (), 'CRM': ('salesforce',),
+    'PMP': (), 'Six Sigma': (), 'Budgeting': (), 'Forecasting': (),
+}
+
+# Generic resume and job-posting vocabulary that says nothing about fit
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could do does
+each either etc for from had has have having he her his how i if in into is it its just may me more
+most must my no not of on one or other our out over per plus she should so some such than that the
+their them then there these they this those through to under up us use used using very via was we
+were what when where which while who will with within without would you your yours
+ability able across apply applicant applicants benefits best candidate candidates company degree
+demonstrated description duties environment equivalent excellent experience experienced familiarity
+fast good great help hiring ideal including job join knowledge looking new nice opportunity paced
+plus position preferred proficiency proficient qualifications related required requirements
+responsibilities responsible role seeking skills solid strong successful team teams understanding
+work working world year years
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./-]*")
+_SENTENCE = re.compile(r"[\n.;!?]+\s*")
+# Longest plain phrase (outside the skill dictionary) treated as one keyword
+MAX_NGRAM = 2
+
+
+def tokenize(text):
+    """Lowercase word tokens; keeps symbols used in skill names (c++, c#, node.js, ci/cd)"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        token = token.rstrip('./-')
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def ngrams(tokens, n):
+    """All n-grams of a token list, as space-joined strings"""
+    return [' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+
+def _normalize_term(term):
+    # Light plural folding so 'microservices' and 'microservice' meet
+    if len(term) > 4 and term.endswith('s') and not term.endswith('ss'):
+        return term[:-1]
+    return term
+
+
+class SkillIndex:
+    """Maps every spelling of every known skill (as token n-grams) to its canonical name"""
+
+    def __init__(self, skill_terms=None):
+        self.skill_terms = skill_terms if skill_terms is not None else SKILL_TERMS
+        self._aliases = {}
+        for canonical, aliases in self.skill_terms.items():
+            for spelling in (canonical,) + tuple(aliases):
+                key = ' '.join(tokenize(spelling))
+                if key:
+                    self._aliases[key] = canonical
+        self.max_words = max((key.count(' ') + 1 for key in self._aliases), default=1)
+
+    def match(self, tokens):
+        """List of (start, end, canonical) skill mentions, longest match first"""
+        matches = []
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self.max_words, len(tokens) - i), 0, -1):
+                canonical = self._aliases.get(' '.join(tokens[i:i + n]))
+                if canonical:
+                    matches.append((i, i + n, canonical))
+                    i += n
+                    break
+            else:
+                i += 1
+        return matches
+
+    def find(self, tokens):
+        """Counter of canonical skills mentioned in a token list"""
+        return Counter(canonical for _, _, canonical in self.match(tokens))
+
+
+class LocalAnalyzer:
+    """
+    Deterministic resume vs job description comparison: no model call, a few
+    milliseconds per resume. Job description terms (known skills plus
+    significant words and repeated phrases) are weighted TF-IDF style, with
+    the posting's sentences as documents, and the resume's coverage of that
+    weight is the ATS-style match score.
+    """
+
+    def __init__(self, skill_index=None, max_keywords=12, skill_boost=2.0):
+        self.skill_index = skill_index if skill_index is not None else SkillIndex()
+        self.max_keywords = max_keywords
+        self.skill_boost = skill_boost
+
+    def analyze(self, resume_content, job_description, job_role=""):
+        """
+        Return a dict with 'match_score' (0-100, None without a job
+        description), 'matched_keywords', 'missing_keywords',
+        'resume_skills', 'job_skills' and 'elapsed_ms'
+        """
+        started = time.perf_counter()
+        resume_tokens = tokenize(resume_content or "")
+        resume_skills = self.skill_index.find(resume_tokens)
+        result = {
+            'match_score': None,
+            'matched_keywords': [],
+            'missing_keywords': [],
+            'resume_skills': sorted(resume_skills),
+            'job_skills': [],
+        }
+
+        # The role title alone still names skills ("Python Developer")
+        target = "\n".join(part for part in (job_role, job_description) if part)
+        weights = self.keyword_weights(target)
+        if weights:
+            resume_terms = self._term_set(resume_tokens) | {skill.lower() for skill in resume_skills}
+            matched, missing = [], []
+            for term, (display, weight) in sorted(weights.items(), key=lambda item: -item[1][1]):
+                (matched if term in resume_terms else missing).append((display, weight))
+
+            total = sum(weight for _, weight in matched) + sum(weight for _, weight in missing)
+            result['match_score'] = round(100 * sum(weight for _, weight in matched) / total) if total else None
+            result['matched_keywords'] = self._top_keywords(matched)
+            result['missing_keywords'] = self._top_keywords(missing)
+            result['job_skills'] = sorted(display for term, (display, _) in weights.items()
+                                          if display in self.skill_index.skill_terms)
+
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return result
+
+    def keyword_weights(self, text):
+        """{normalized term: (display name, weight)} for the significant terms in text"""
+        sentences = [tokenize(sentence) for sentence in _SENTENCE.split(text or "")]
+        sentences = [tokens for tokens in sentences if tokens]
+        if not sentences:
+            return {}
+
+        term_frequency = Counter()
+        document_frequency = Counter()
+        display = {}
+        skill_terms = set()
+
+        for tokens in sentences:
+            seen = set()
+            covered = [False] * len(tokens)
+            for start, end, skill in self.skill_index.match(tokens):
+                key = skill.lower()
+                term_frequency[key] += 1
+                display[key] = skill
+                skill_terms.add(key)
+                seen.add(key)
+                covered[start:end] = [True] * (end - start)
+
+            # Words inside a skill mention ("learning" in "machine learning") are not separate terms
+            for n in range(1, MAX_NGRAM + 1):
+                for start in range(len(tokens) - n + 1):
+                    words = tokens[start:start + n]
+                    if any(covered[start:start + n]) or any(word in STOPWORDS or word.isdigit() for word in words):
+                        continue
+                    gram = ' '.join(words)
+                    key = _normalize_term(gram)
+                    if len(key) < 3:
+                        continue
+                    term_frequency[key] += 1
+                    display.setdefault(key, gram)
+                    seen.add(key)
+            document_frequency.update(seen)
+
+        # Plain words and phrases have to recur to count; skills count on first mention
+        documents = len(sentences)
+        weights = {}
+        for key, frequency in term_frequency.items():
+            is_skill = key in skill_terms
+            if not is_skill and frequency < 2:
+                continue
+            idf = math.log(1 + documents / document_frequency[key])
+            weight = (1 + math.log(frequency)) * idf * (self.skill_boost if is_skill else 1.0)
+            weights[key] = (display[key], weight)
+        return weights
+
+    def _top_keywords(self, ranked):
+        """Highest-weighted display names, without single words already inside a listed phrase"""
+        phrase_words = {word for display, _ in ranked if ' ' in display for word in display.lower().split()}
+        keywords = [display for display, _ in ranked
+                    if ' ' in display or display.lower() not in phrase_words or display in self.skill_index.skill_terms]
+        return keywords[:self.max_keywords]
+
+    def _term_set(self, tokens):
+        terms = {_normalize_term(token) for token in tokens}
+        for n in range(2, MAX_NGRAM + 1):
+            terms.update(_normalize_term(gram) for gram in ngrams(tokens, n))
+        return terms
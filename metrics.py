@@ -0,0 +1,211 @@
+import os
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Prometheus' default buckets, which suit request and stage latencies
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self, name):
+        return [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+
+    def render(self):
+        lines = self._header(self.name)
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally split by labels"""
+
+    kind = 'counter'
+
+    def _header(self, name):
+        # The 0.0.4 text format names counters by their _total sample
+        return super()._header(f"{name}_total")
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with a running sum and count per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        # Per-bucket (non-cumulative) counts keep observe() O(log n); render() sums them
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _render_sample(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose value is read from a callable at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        return self._header(self.name) + [f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    """Holds every metric in the process and renders the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'resume_http_request_duration_seconds', 'HTTP request latency by endpoint',
+    labelnames=('endpoint', 'method', 'status')))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'resume_stage_duration_seconds', 'Time spent in each stage of the analysis pipeline',
+    labelnames=('stage',)))
+ERRORS = REGISTRY.register(Counter(
+    'resume_errors', 'Errors by pipeline stage', labelnames=('stage',)))
+CACHE_EVENTS = REGISTRY.register(Counter(
+    'resume_cache_events', 'Cache lookups by cache and result (hit/miss)', labelnames=('cache', 'result')))
+BYTES_PROCESSED = REGISTRY.register(Counter(
+    'resume_bytes_processed', 'Bytes (or characters, for text) processed by kind', labelnames=('kind',)))
+
+# Stage timings for the current request or job, when a collector is active.
+# A context variable, so jobs sharing the event loop thread each get their own.
+_timings = contextvars.ContextVar('stage_timings', default=None)
+
+
+def start_timings():
+    """Begin collecting stage timings for the work done on this thread (or task)"""
+    timings = {}
+    _timings.set(timings)
+    return timings
+
+
+def finish_timings():
+    """Stop collecting and return {stage: milliseconds} for this thread (or task)"""
+    timings = _timings.get() or {}
+    _timings.set(None)
+    return {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
+
+
+def record_stage(stage, seconds):
+    """Record a stage duration measured elsewhere"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage):
+    """
+    Time a block as one pipeline stage. Exceptions leaving the block are
+    counted in resume_errors_total{stage=...} and re-raised.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started)
@@ -0,0 +1,209 @@
+import os
+import time
+import logging
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+
+from resume_sections import page_lines, lines_to_text
+
+
+class PDFOpenError(Exception):
+    """The document could not be opened (damaged, encrypted or not a PDF)"""
+    pass
+
+
+def open_document(source):
+    import fitz  # PyMuPDF
+    try:
+        if isinstance(source, bytes):
+            return fitz.open(stream=source, filetype="pdf")
+        return fitz.open(source)
+    except Exception as e:
+        # A plain message pickles back from a pool worker, unlike some PyMuPDF errors
+        raise PDFOpenError(str(e)) from e
+
+
+def _count_pages(source):
+    """Worker task: return the document's page count"""
+    doc = open_document(source)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def extract_page(page, page_number, layout=False):
+    """
+    Result dict for one page. With layout, the page's lines with font size
+    and weight are included for section detection and the text is built from them.
+    'image_count' lets callers tell a scanned page from a blank one.
+    """
+    if layout:
+        lines = page_lines(page)
+        text = lines_to_text(lines)
+        return {'page_number': page_number, 'text': text, 'char_count': len(text),
+                'error': None, 'image_count': len(page.get_images()), 'lines': lines}
+    text = page.get_text()
+    return {'page_number': page_number, 'text': text, 'char_count': len(text), 'error': None,
+            'image_count': len(page.get_images())}
+
+
+def iter_document_pages(doc, start, end, layout=False):
+    """
+    Result dicts for pages [start, end) of an open document. A page that fails
+    to extract is reported with an error instead of failing the whole range.
+    """
+    for page_num in range(start, min(end, doc.page_count)):
+        try:
+            yield extract_page(doc.load_page(page_num), page_num + 1, layout)
+        except Exception as e:
+            yield {'page_number': page_num + 1, 'text': '', 'char_count': 0, 'error': str(e),
+                   'image_count': 0}
+
+
+def _extract_page_range(source, start, end, layout=False):
+    """Worker task: extract pages [start, end) and return one result dict per page"""
+    doc = open_document(source)
+    try:
+        return list(iter_document_pages(doc, start, end, layout))
+    finally:
+        doc.close()
+
+
+class PDFExtractionTimeout(Exception):
+    pass
+
+
+class PDFExtractionEngine:
+    """
+    Runs PyMuPDF extraction in a separate process pool so a malformed or huge
+    PDF cannot pin a web worker. Each document gets a wall-clock deadline and a
+    page limit; long documents are split into page ranges extracted in parallel.
+    """
+
+    def __init__(self, processes=2, timeout=20, max_pages=50, parallel_threshold=8,
+                 pages_per_task=4, start_method='spawn'):
+        self.processes = processes
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.parallel_threshold = parallel_threshold
+        self.pages_per_task = pages_per_task
+        self.start_method = start_method
+        self._pool = None
+        # Extractions using each pool, and pools retired after a timeout that
+        # are terminated once their last extraction lets go of them
+        self._users = {}
+        self._retired = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Create an engine configured from environment variables"""
+        return cls(
+            processes=int(os.environ.get('PDF_POOL_PROCESSES', 2)),
+            timeout=float(os.environ.get('PDF_EXTRACT_TIMEOUT', 20)),
+            max_pages=int(os.environ.get('PDF_MAX_PAGES', 50)),
+            parallel_threshold=int(os.environ.get('PDF_PARALLEL_THRESHOLD', 8)),
+            pages_per_task=int(os.environ.get('PDF_PAGES_PER_TASK', 4)),
+            start_method=os.environ.get('PDF_POOL_START_METHOD', 'spawn'),
+        )
+
+    def _acquire_pool(self):
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context(self.start_method)
+                # Recycle workers periodically so leaks in native code cannot accumulate
+                self._pool = context.Pool(processes=self.processes, maxtasksperchild=100)
+            self._users[self._pool] = self._users.get(self._pool, 0) + 1
+            return self._pool
+
+    def _release_pool(self, pool):
+        with self._lock:
+            self._users[pool] -= 1
+            done = pool in self._retired and not self._users[pool]
+            if done:
+                self._retired.discard(pool)
+                del self._users[pool]
+        if done:
+            # Kills the stuck worker; every other extraction on this pool has finished
+            pool.terminate()
+            pool.join()
+
+    def _retire_pool(self, pool):
+        """
+        Send new extractions to a fresh pool. The old one, with its stuck
+        worker, is terminated only after the extractions still using it finish
+        or time out, so one slow PDF does not fail everyone else's.
+        """
+        with self._lock:
+            # Another thread may already have replaced the pool that timed out
+            if self._pool is pool:
+                self._pool = None
+            self._retired.add(pool)
+
+    def iter_pages(self, source, layout=False):
+        """
+        Yield the page result dicts of a PDF path or PDF bytes in order, up to
+        the page limit. Long documents are split into page ranges extracted in
+        parallel; only one range per worker is queued ahead of the reader, so
+        a reader that stops early leaves the rest of the document unread.
+        Bytes are written to a temporary file once so tasks only send its path.
+        """
+        label = "<memory>" if isinstance(source, bytes) else source
+        deadline = time.monotonic() + self.timeout
+        spooled = None
+        if isinstance(source, bytes):
+            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as spool:
+                spool.write(source)
+            spooled = source = spool.name
+        pool = self._acquire_pool()
+
+        try:
+            page_count = pool.apply_async(_count_pages, (source,)).get(self._remaining(deadline))
+            pages_to_read = min(page_count, self.max_pages)
+            if page_count > self.max_pages:
+                logging.warning(f"PDF has {page_count} pages; only the first {self.max_pages} are extracted")
+
+            if pages_to_read > self.parallel_threshold:
+                ranges = iter([(start, min(start + self.pages_per_task, pages_to_read))
+                               for start in range(0, pages_to_read, self.pages_per_task)])
+            else:
+                ranges = iter([(0, pages_to_read)])
+
+            def submit(page_range):
+                return pool.apply_async(_extract_page_range, (source, *page_range, layout))
+
+            window = deque(submit(page_range) for _, page_range in zip(range(self.processes), ranges))
+            while window:
+                pages = window.popleft().get(self._remaining(deadline))
+                next_range = next(ranges, None)
+                if next_range is not None:
+                    window.append(submit(next_range))
+                yield from pages
+
+        except multiprocessing.TimeoutError:
+            logging.error(f"PDF extraction exceeded {self.timeout}s for {label}; retiring pool")
+            self._retire_pool(pool)
+            raise PDFExtractionTimeout(f"PDF extraction timed out after {self.timeout} seconds")
+        finally:
+            self._release_pool(pool)
+            # Ranges still queued fail to open the removed file, and nobody reads them
+            if spooled is not None:
+                os.remove(spooled)
+
+    def _remaining(self, deadline):
+        return max(deadline - time.monotonic(), 0.001)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            retired, self._retired = list(self._retired), set()
+            self._users.clear()
+        if pool is not None:
+            pool.close()
+            pool.join()
+        for pool in retired:
+            pool.terminate()
+            pool.join()
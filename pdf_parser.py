@@ -1,78 +1,134 @@
 import logging
-import fitz  # PyMuPDF
 import os
+from metrics import timed, BYTES_PROCESSED
+from pdf_engine import open_document, iter_document_pages
+from ingestion import clean_text
+from resume_sections import segment_layout, segment_text
 
 class PDFParser:
-    def __init__(self):
-        pass
+    def __init__(self, engine=None, max_pages=50, layout=False):
+        # Optional PDFExtractionEngine; without one extraction runs in-process
+        self.engine = engine
+        self.max_pages = max_pages
+        # Read font sizes and weights so extract_resume_* can find sections from the layout
+        self.layout = layout
+    
+    def iter_pages(self, source, layout=False):
+        """
+        Yield page results ('page_number', 'text', 'char_count', 'error',
+        'image_count', plus 'lines' with layout) from a PDF path or in-memory
+        PDF bytes, in order, up to the page limit. Pages are read as they are
+        consumed, so a caller that stops early skips the rest of the document.
+        Raises PDFOpenError when the document cannot be opened.
+        """
+        from_memory = isinstance(source, (bytes, bytearray, memoryview))
+        
+        if not from_memory and not os.path.exists(source):
+            raise FileNotFoundError(f"PDF file not found: {source}")
+        
+        if self.engine is not None:
+            yield from self.engine.iter_pages(bytes(source) if from_memory else source, layout)
+            return
+        
+        doc = open_document(bytes(source) if from_memory else source)
+        try:
+            if doc.page_count > self.max_pages:
+                logging.warning(f"PDF has {doc.page_count} pages; only the first {self.max_pages} are extracted")
+            yield from iter_document_pages(doc, 0, self.max_pages, layout)
+        finally:
+            # Close document
+            doc.close()
     
     def extract_text_from_pdf(self, pdf_path):
         """
         Extract text content from PDF file using PyMuPDF
         """
+        return self._extract_text(pdf_path, pdf_path)
+    
+    def extract_text_from_bytes(self, data):
+        """
+        Extract text content from PDF bytes held in memory
+        """
+        return self._extract_text(data, "<memory>")
+    
+    def extract_text_from_stream(self, stream):
+        """
+        Extract text content from a binary file-like object (e.g. an upload's stream)
+        """
+        return self._extract_text(stream.read(), "<stream>")
+    
+    def extract_resume_from_pdf(self, pdf_path):
+        """
+        Extract a PDF file's text and split it into sections. Returns a dict
+        with 'text' (as extract_text_from_pdf) and 'sections' (see resume_sections)
+        """
+        return self._extract_resume(pdf_path, pdf_path)
+    
+    def extract_resume_from_bytes(self, data):
+        """
+        Extract in-memory PDF bytes' text and split it into sections
+        """
+        return self._extract_resume(data, "<memory>")
+    
+    def _extract_resume(self, source, label):
+        text_content, pages = self._extract(source, label, self.layout)
+        with timed('segment_sections'):
+            if self.layout and all('lines' in page for page in pages):
+                sections = segment_layout([line for page in pages for line in page['lines']])
+            else:
+                sections = segment_text(text_content)
+        return {'text': text_content, 'sections': sections}
+    
+    def _extract_text(self, source, label):
+        return self._extract(source, label)[0]
+    
+    def _extract(self, source, label, layout=False):
         try:
-            if not os.path.exists(pdf_path):
-                raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                BYTES_PROCESSED.inc(len(source), kind='pdf')
+            elif os.path.exists(source):
+                BYTES_PROCESSED.inc(os.path.getsize(source), kind='pdf')
             
-            # Open PDF document
-            doc = fitz.open(pdf_path)
+            with timed('pdf_extract'):
+                pages = list(self.iter_pages(source, layout))
             
-            if doc.page_count == 0:
+            if not pages:
                 raise ValueError("PDF file contains no pages")
             
-            text_content = ""
+            for page in pages:
+                if page['error']:
+                    logging.warning(f"Skipped page {page['page_number']} of {label}: {page['error']}")
             
-            # Extract text from each page
-            for page_num in range(doc.page_count):
-                page = doc.load_page(page_num)
-                page_text = page.get_text()
-                text_content += page_text + "\n"
-            
-            # Close document
-            doc.close()
+            # Join once instead of concatenating page by page
+            text_content = "\n".join(page['text'] for page in pages)
             
             # Clean up extracted text
-            text_content = self._clean_extracted_text(text_content)
+            with timed('text_clean'):
+                text_content = self._clean_extracted_text(text_content)
+            BYTES_PROCESSED.inc(len(text_content), kind='extracted_text')
             
             if not text_content.strip():
                 raise ValueError("No text content could be extracted from the PDF")
             
             logging.info(f"Successfully extracted {len(text_content)} characters from PDF")
-            return text_content
+            return text_content, pages
             
         except Exception as e:
-            logging.error(f"Error extracting text from PDF {pdf_path}: {e}")
+            logging.error(f"Error extracting text from PDF {label}: {e}")
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
     
     def _clean_extracted_text(self, text):
         """
         Clean and normalize extracted text
         """
-        if not text:
-            return ""
-        
-        # Replace multiple consecutive newlines with double newlines
-        import re
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
-        
-        # Remove excessive whitespace while preserving structure
-        lines = text.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            # Strip whitespace from each line
-            cleaned_line = line.strip()
-            if cleaned_line:
-                cleaned_lines.append(cleaned_line)
-            elif cleaned_lines and cleaned_lines[-1]:  # Preserve single empty lines for structure
-                cleaned_lines.append('')
-        
-        return '\n'.join(cleaned_lines)
+        return clean_text(text)
     
     def validate_pdf(self, pdf_path):
         """
         Validate if the file is a valid PDF and can be processed
         """
+        import fitz  # PyMuPDF
+        
         try:
             doc = fitz.open(pdf_path)
             page_count = doc.page_count
@@ -0,0 +1,159 @@
+import os
+import re
+import logging
+
+TRUNCATION_MARKER = "[... truncated to fit the prompt budget]"
+
+# Rough average for English text with Gemini's tokenizer; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Equal-opportunity and legal boilerplate that adds tokens but nothing the model can use
+_BOILERPLATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"equal (employment )?opportunity",
+    r"without regard to (race|age|sex|gender|religion|color)",
+    r"protected veteran",
+    r"reasonable accommodations?",
+    r"e-verify",
+    r"affirmative action",
+    r"drug[- ]free workplace",
+    r"background check",
+    r"pay transparency",
+    r"(fair chance|ban the box)",
+)]
+
+# Sentence ends inside a line; boilerplate is dropped a sentence at a time
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+_HORIZONTAL_SPACE = re.compile(r"[ \t\u00a0\u200b]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting and logging"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize_whitespace(text):
+    """Collapse runs of spaces/tabs, strip line ends and limit blank lines to one"""
+    if not text:
+        return ""
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = [_HORIZONTAL_SPACE.sub(' ', line).strip() for line in text.split('\n')]
+    return _BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def _strip_boilerplate_sentences(line):
+    """Drop the EEO/legal sentences from one line, keeping everything else"""
+    if not any(pattern.search(line) for pattern in _BOILERPLATE_PATTERNS):
+        return line
+    sentences = [sentence for sentence in _SENTENCE_BREAK.split(line)
+                 if not any(pattern.search(sentence) for pattern in _BOILERPLATE_PATTERNS)]
+    return ' '.join(sentences)
+
+
+def strip_boilerplate(job_description):
+    """
+    Drop EEO/legal sentences and repeated lines from a pasted job description.
+    Text that matches no boilerplate pattern is always kept, so a posting
+    pasted as one paragraph loses only its legal sentences.
+    """
+    if not job_description:
+        return ""
+
+    kept = []
+    seen = set()
+    for paragraph in job_description.split('\n\n'):
+        lines = []
+        for line in paragraph.split('\n'):
+            stripped = _strip_boilerplate_sentences(line)
+            if line.strip() and not stripped.strip():
+                continue
+            key = stripped.lower().strip(' -*•')
+            # Repeated lines (pasted twice, copied headers) only count once
+            if key and key in seen:
+                continue
+            if key:
+                seen.add(key)
+            lines.append(stripped)
+
+        if any(line.strip() for line in lines):
+            kept.append('\n'.join(lines))
+
+    return '\n\n'.join(kept)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text at a line boundary so it fits in max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    max_chars = max(max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER) - 1, 0)
+    cut = text.rfind('\n', 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return text[:cut].rstrip() + '\n' + TRUNCATION_MARKER
+
+
+class PromptBudget:
+    """
+    Normalizes resume and job description inputs and fits them into a token
+    budget. Sections are trimmed in priority order: the job description gives
+    way first (down to ``min_job_description_tokens``), then the resume. The
+    improved-resume prompt only needs the posting for context, so it gets a
+    tighter job description allowance.
+    """
+
+    def __init__(self, max_input_tokens=8000, min_job_description_tokens=400,
+                 improved_resume_job_description_tokens=600, enabled=True):
+        self.max_input_tokens = max_input_tokens
+        self.min_job_description_tokens = min_job_description_tokens
+        self.improved_resume_job_description_tokens = improved_resume_job_description_tokens
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls):
+        """Create a budget configured from environment variables"""
+        return cls(
+            max_input_tokens=int(os.environ.get('PROMPT_TOKEN_BUDGET', 8000)),
+            min_job_description_tokens=int(os.environ.get('PROMPT_MIN_JOB_DESCRIPTION_TOKENS', 400)),
+            improved_resume_job_description_tokens=int(os.environ.get('PROMPT_IMPROVED_RESUME_JD_TOKENS', 600)),
+            enabled=os.environ.get('PROMPT_PREPROCESS', 'true').lower() in ('1', 'true', 'yes'),
+        )
+
+    def prepare(self, resume_content, job_description, max_tokens=None):
+        """
+        Return (resume_content, job_description) normalized and trimmed to
+        max_tokens (default: the configured budget)
+        """
+        if not self.enabled:
+            return resume_content, job_description
+
+        budget = max_tokens if max_tokens is not None else self.max_input_tokens
+        resume = normalize_whitespace(resume_content)
+        description = normalize_whitespace(strip_boilerplate(normalize_whitespace(job_description)))
+
+        resume_tokens = estimate_tokens(resume)
+        description_tokens = estimate_tokens(description)
+
+        if resume_tokens + description_tokens > budget:
+            # Job description goes first, but keeps a floor so the role context survives
+            description_floor = min(description_tokens, self.min_job_description_tokens)
+            description_limit = max(budget - resume_tokens, description_floor)
+            description = truncate_to_tokens(description, description_limit)
+
+            resume = truncate_to_tokens(resume, budget - estimate_tokens(description))
+
+            logging.info(f"Prompt inputs trimmed from ~{resume_tokens + description_tokens} "
+                         f"to ~{estimate_tokens(resume) + estimate_tokens(description)} tokens")
+
+        return resume, description
+
+    def shorten_job_description(self, job_description):
+        """Trim an already prepared job description for the improved-resume prompt"""
+        if not self.enabled:
+            return job_description
+        return truncate_to_tokens(job_description, self.improved_resume_job_description_tokens)
@@ -0,0 +1,503 @@
+"""
+Persistent, memory-mapped index of resumes and job postings as hashed
+feature vectors, for cheap batched similarity ranking ahead of the model.
+
+Usage:
+    python ranking_index.py add resumes.zip --index data/rank_index
+    python ranking_index.py add postings/ --kind job --index data/rank_index
+    python ranking_index.py rank --index data/rank_index --job-description-file posting.txt --top 20
+    python ranking_index.py rank --index data/rank_index --resume-file resume.pdf --kind job
+"""
+import os
+import sys
+import json
+import math
+import time
+import zlib
+import hashlib
+import logging
+import argparse
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writing process per index
+    fcntl = None
+
+import numpy as np
+
+from local_analysis import SkillIndex, STOPWORDS, tokenize
+
+KIND_RESUME = 'resume'
+KIND_JOB = 'job'
+KINDS = (KIND_RESUME, KIND_JOB)
+
+HEADER_FILE = 'index.json'
+VECTORS_FILE = 'vectors.f32'
+META_FILE = 'meta.jsonl'
+DF_FILE = 'df.npy'
+LOCK_FILE = 'index.lock'
+INDEX_VERSION = 1
+
+
+def _plural_fold(term):
+    if len(term) > 4 and term.endswith('s') and not term.endswith('ss'):
+        return term[:-1]
+    return term
+
+
+class HashingVectorizer:
+    """
+    Signed feature hashing of words, two-word phrases and known skills into a
+    fixed number of dimensions. Stateless, so vectors from different runs and
+    processes are comparable.
+    """
+
+    def __init__(self, dim=4096, skill_index=None, skill_weight=2.0, phrase_weight=1.5):
+        self.dim = dim
+        self.skill_index = skill_index if skill_index is not None else SkillIndex()
+        self.skill_weight = skill_weight
+        self.phrase_weight = phrase_weight
+
+    def features(self, text):
+        """Counter of weighted feature names for one document"""
+        tokens = tokenize(text or "")
+        features = Counter()
+        for _, _, skill in self.skill_index.match(tokens):
+            features['s:' + skill.lower()] += self.skill_weight
+
+        words = [None if token in STOPWORDS or token.isdigit() else _plural_fold(token) for token in tokens]
+        for i, word in enumerate(words):
+            if word is None or len(word) < 2:
+                continue
+            features['w:' + word] += 1
+            following = words[i + 1] if i + 1 < len(words) else None
+            if following is not None:
+                features[f'b:{word} {following}'] += self.phrase_weight
+        return features
+
+    def transform(self, text):
+        """Hashed, sublinear-TF, L2-normalized float32 vector"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in self.features(text).items():
+            # crc32 is stable across processes, unlike hash()
+            digest = zlib.crc32(feature.encode('utf-8'))
+            sign = -1.0 if digest & 0x80000000 else 1.0
+            vector[digest % self.dim] += sign * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def transform_many(self, texts):
+        return np.vstack([self.transform(text) for text in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+
+class RankingIndex:
+    """
+    Append-only matrix of document vectors, memory-mapped from ``path`` (or
+    held in memory when path is None), with a JSON-lines metadata sidecar.
+    Documents are added incrementally; identical texts (or source files) are
+    stored once. Ranking applies corpus IDF at query time, so scores improve
+    as the index grows without re-vectorizing anything.
+
+    Several processes (web workers, the CLI) may share one directory: appends
+    hold an exclusive file lock and first pick up rows the others added.
+    """
+
+    def __init__(self, path=None, dim=4096, initial_capacity=1024, chunk_rows=8192, vectorizer=None):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self.meta = []
+        self._meta_offset = 0
+        self._rows_by_id = {}
+        self._ids_by_source = {}
+
+        header = self._read_header() if path else None
+        if header:
+            dim = header['dim']
+        self.vectorizer = vectorizer if vectorizer is not None else HashingVectorizer(dim)
+        if self.vectorizer.dim != dim:
+            raise ValueError(f"Index at {path} has dim {dim}, vectorizer has {self.vectorizer.dim}")
+        self.dim = dim
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            with self._file_lock():
+                self._load_meta()
+                self._open_vectors(max(initial_capacity, len(self.meta), self._file_capacity()))
+                self.document_frequency = self._load_document_frequency()
+                self._write_header()
+        else:
+            self.vectors = np.zeros((initial_capacity, dim), dtype=np.float32)
+            self.document_frequency = np.zeros(dim, np.int64)
+        self.kinds = np.array([KINDS.index(entry['kind']) for entry in self.meta], dtype=np.int8)
+
+    @classmethod
+    def from_env(cls):
+        """Open the index at RANKING_INDEX_PATH, or None when it is not configured"""
+        path = os.environ.get('RANKING_INDEX_PATH')
+        if not path:
+            return None
+        return cls(path, dim=int(os.environ.get('RANKING_INDEX_DIM', 4096)))
+
+    def __len__(self):
+        return len(self.meta)
+
+    # Storage
+
+    def _read_header(self):
+        header_path = os.path.join(self.path, HEADER_FILE)
+        if not os.path.exists(header_path):
+            return None
+        with open(header_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_header(self):
+        header_path = os.path.join(self.path, HEADER_FILE)
+        with open(header_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'dim': self.dim, 'count': len(self.meta),
+                       'capacity': self.vectors.shape[0]}, f)
+        os.replace(header_path + '.tmp', header_path)
+
+    def _load_meta(self):
+        meta_path = os.path.join(self.path, META_FILE)
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, 'rb') as f:
+            data = f.read()
+        # Called under the file lock, so an unterminated last line is a torn append, not one in progress
+        complete = data[:data.rfind(b'\n') + 1]
+        torn = len(complete) < len(data)
+        for line in complete.decode('utf-8').splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A torn line from an interrupted append; its vector row is reused
+                logging.warning(f"Dropping unreadable metadata line in {meta_path}")
+                torn = True
+                continue
+            self._remember(entry)
+        if torn:
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                for entry in self.meta:
+                    f.write(json.dumps(entry) + '\n')
+            os.replace(meta_path + '.tmp', meta_path)
+        self._meta_offset = os.path.getsize(meta_path)
+
+    def _refresh(self):
+        """Pick up rows other processes appended since this one last read the metadata"""
+        meta_path = os.path.join(self.path, META_FILE)
+        if not os.path.exists(meta_path) or os.path.getsize(meta_path) <= self._meta_offset:
+            return
+        with open(meta_path, 'rb') as f:
+            f.seek(self._meta_offset)
+            data = f.read()
+        # A writer may be mid-line; its row is picked up next time
+        complete = data[:data.rfind(b'\n') + 1]
+        added = []
+        for line in complete.decode('utf-8').splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                self._remember(entry)
+                added.append(KINDS.index(entry['kind']))
+        self._meta_offset += len(complete)
+        if added:
+            self.kinds = np.concatenate([self.kinds, np.array(added, dtype=np.int8)])
+            self.document_frequency = self._load_document_frequency()
+            if len(self.meta) > self.vectors.shape[0]:
+                self._reopen_vectors(self._file_capacity())
+
+    @contextmanager
+    def _file_lock(self):
+        if not self.path or fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.path, LOCK_FILE), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_document_frequency(self):
+        df_path = os.path.join(self.path, DF_FILE)
+        return np.load(df_path) if os.path.exists(df_path) else np.zeros(self.dim, np.int64)
+
+    def _save_document_frequency(self):
+        # Replaced atomically so a process refreshing without the lock never reads half a file
+        df_path = os.path.join(self.path, DF_FILE)
+        with open(df_path + '.tmp', 'wb') as f:
+            np.save(f, self.document_frequency)
+        os.replace(df_path + '.tmp', df_path)
+
+    def _file_capacity(self):
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        return os.path.getsize(vectors_path) // (4 * self.dim) if os.path.exists(vectors_path) else 0
+
+    def _remember(self, entry):
+        self._rows_by_id[entry['id']] = len(self.meta)
+        if entry.get('source_sha'):
+            self._ids_by_source[entry['source_sha']] = entry['id']
+        self.meta.append(entry)
+
+    def _open_vectors(self, capacity):
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        size = capacity * self.dim * 4
+        with open(vectors_path, 'ab') as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self.vectors = np.memmap(vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+
+    def _reopen_vectors(self, capacity):
+        self.vectors.flush()
+        del self.vectors
+        self._open_vectors(capacity)
+
+    def _ensure_capacity(self, rows):
+        capacity = self.vectors.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        if self.path:
+            self._reopen_vectors(capacity)
+        else:
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:len(self.meta)] = self.vectors[:len(self.meta)]
+            self.vectors = grown
+
+    # Updates
+
+    def contains(self, doc_id):
+        return doc_id in self._rows_by_id
+
+    def id_for_source(self, source_sha):
+        """Id of the document indexed from a source file with this sha256, if any"""
+        return self._ids_by_source.get(source_sha)
+
+    def get(self, doc_id):
+        row = self._rows_by_id.get(doc_id)
+        return None if row is None else dict(self.meta[row])
+
+    def add(self, text, kind=KIND_RESUME, name=None, source_sha=None, metadata=None):
+        """Index one document and return its id (the existing id for a duplicate)"""
+        return self.add_many([{'text': text, 'kind': kind, 'name': name,
+                               'source_sha': source_sha, 'metadata': metadata}])[0]
+
+    def add_many(self, documents):
+        """
+        Index dicts with 'text' and optional 'kind', 'name', 'source_sha' and
+        'metadata'. Vectors are written before their metadata line, so an
+        interrupted update never leaves metadata without a vector.
+        """
+        ids = []
+        new = []
+        new_ids = set()
+        for document in documents:
+            kind = document.get('kind') or KIND_RESUME
+            if kind not in KINDS:
+                raise ValueError(f"Unknown document kind '{kind}' (expected one of {KINDS})")
+            text = document['text'] or ""
+            doc_id = hashlib.sha256(f"{kind}\n{text}".encode('utf-8')).hexdigest()[:20]
+            ids.append(doc_id)
+            if doc_id in self._rows_by_id or doc_id in new_ids:
+                continue
+            new_ids.add(doc_id)
+            entry = {
+                'id': doc_id,
+                'kind': kind,
+                'name': document.get('name') or doc_id,
+                'source_sha': document.get('source_sha'),
+                'chars': len(text),
+                'skills': sorted(self.vectorizer.skill_index.find(tokenize(text))),
+                'added_at': round(time.time(), 3),
+            }
+            if document.get('metadata'):
+                entry['metadata'] = document['metadata']
+            new.append((entry, self.vectorizer.transform(text)))
+
+        if not new:
+            return ids
+
+        with self._lock, self._file_lock():
+            if self.path:
+                self._refresh()
+            # Another thread or process may have indexed the same text while this one vectorized it
+            new = [(entry, vector) for entry, vector in new if entry['id'] not in self._rows_by_id]
+            if not new:
+                return ids
+            start = len(self.meta)
+            self._ensure_capacity(start + len(new))
+            block = np.vstack([vector for _, vector in new])
+            self.vectors[start:start + len(new)] = block
+            self.document_frequency += (block != 0).sum(axis=0)
+
+            if self.path:
+                self.vectors.flush()
+                self._save_document_frequency()
+                meta_path = os.path.join(self.path, META_FILE)
+                with open(meta_path, 'a', encoding='utf-8') as f:
+                    if f.tell() > self._meta_offset:
+                        # Unterminated tail of an append that died; nothing else writes under the lock
+                        f.truncate(self._meta_offset)
+                    for entry, _ in new:
+                        f.write(json.dumps(entry) + '\n')
+                self._meta_offset = os.path.getsize(meta_path)
+
+            for entry, _ in new:
+                self._remember(entry)
+            self.kinds = np.concatenate([self.kinds, np.array([KINDS.index(entry['kind']) for entry, _ in new],
+                                                              dtype=np.int8)])
+            if self.path:
+                self._write_header()
+        return ids
+
+    # Ranking
+
+    def _idf(self):
+        documents = max(len(self.meta), 1)
+        return (np.log((1 + documents) / (1 + self.document_frequency)) + 1).astype(np.float32)
+
+    def rank(self, text, kind=KIND_RESUME, top_n=10, ids=None):
+        """Top ``top_n`` documents of ``kind`` most similar to text, best first"""
+        return self.rank_many([text], kind, top_n, ids)[0]
+
+    def rank_resumes(self, job_description, top_n=10, ids=None):
+        return self.rank(job_description, KIND_RESUME, top_n, ids)
+
+    def rank_postings(self, resume_text, top_n=10, ids=None):
+        return self.rank(resume_text, KIND_JOB, top_n, ids)
+
+    def rank_many(self, texts, kind=KIND_RESUME, top_n=10, ids=None):
+        """
+        Rank the stored documents of ``kind`` (optionally only ``ids``) against
+        every query text in one pass over the matrix. Returns one list of
+        {'id', 'name', 'score', ...metadata} per query, best first. Scores are
+        IDF-weighted cosine similarities in [-1, 1].
+        """
+        with self._lock:
+            if self.path:
+                self._refresh()
+            count = len(self.meta)
+            idf_squared = self._idf() ** 2
+            mask = self.kinds[:count] == KINDS.index(kind)
+            if ids is not None:
+                subset = np.zeros(count, dtype=bool)
+                subset[[self._rows_by_id[doc_id] for doc_id in ids if doc_id in self._rows_by_id]] = True
+                mask &= subset
+
+        queries = self.vectorizer.transform_many(list(texts))
+        if not len(queries) or not mask.any():
+            return [[] for _ in queries]
+
+        weighted = queries * idf_squared                                  # (q, dim)
+        query_norms = np.sqrt((queries ** 2) @ idf_squared)               # (q,)
+        query_norms[query_norms == 0] = 1.0
+        rows = np.flatnonzero(mask)
+        top_n = min(top_n, len(rows))
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+
+        # Chunked so memory stays bounded however large the memory-mapped matrix is
+        for start in range(0, len(rows), self.chunk_rows):
+            chunk_rows = rows[start:start + self.chunk_rows]
+            block = np.asarray(self.vectors[chunk_rows])                  # (c, dim)
+            row_norms = np.sqrt((block ** 2) @ idf_squared)
+            row_norms[row_norms == 0] = 1.0
+            scores = (block @ weighted.T) / row_norms[:, None] / query_norms[None, :]  # (c, q)
+
+            best_scores = np.concatenate([best_scores, scores.T], axis=1)
+            best_rows = np.concatenate([best_rows, np.broadcast_to(chunk_rows, scores.T.shape)], axis=1)
+            if best_scores.shape[1] > top_n:
+                keep = np.argpartition(-best_scores, top_n - 1, axis=1)[:, :top_n]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        results = []
+        for query_scores, query_rows in zip(best_scores, best_rows):
+            order = np.argsort(-query_scores)
+            results.append([dict(self.meta[row], score=round(float(query_scores[i]), 4))
+                            for i, row in zip(order, query_rows[order])])
+        return results
+
+    def close(self):
+        if self.path and isinstance(self.vectors, np.memmap):
+            self.vectors.flush()
+
+
+def _read_text(name, data, ingestor):
+    return ingestor.ingest(data, name)['text']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index resumes and postings, and rank them by similarity")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="Index every PDF/DOCX/TXT file in a directory or zip")
+    add.add_argument('source')
+    add.add_argument('--kind', choices=KINDS, default=KIND_RESUME)
+
+    rank = commands.add_parser('rank', help="Rank stored documents against a query")
+    query = rank.add_mutually_exclusive_group(required=True)
+    query.add_argument('--job-description-file', help="Rank stored resumes against this posting")
+    query.add_argument('--resume-file', help="Rank stored documents against this resume (PDF, DOCX or TXT)")
+    rank.add_argument('--kind', choices=KINDS, help="Kind of document to rank (default: the opposite of the query)")
+    rank.add_argument('--top', type=int, default=10)
+
+    for command in (add, rank):
+        command.add_argument('--index', default=os.environ.get('RANKING_INDEX_PATH'), required=not os.environ.get('RANKING_INDEX_PATH'),
+                             help="Index directory (default: RANKING_INDEX_PATH)")
+        command.add_argument('--dim', type=int, default=int(os.environ.get('RANKING_INDEX_DIM', 4096)),
+                             help="Vector size for a new index")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    from batch_analyzer import iter_resume_files
+    from ingestion import Ingestor
+
+    index = RankingIndex(args.index, dim=args.dim)
+    ingestor = Ingestor.from_env()
+
+    if args.command == 'add':
+        before = len(index)
+        for name, opener in iter_resume_files(args.source):
+            data = opener()
+            source_sha = hashlib.sha256(data).hexdigest()
+            if index.id_for_source(source_sha):
+                continue
+            try:
+                text = _read_text(name, data, ingestor)
+            except Exception as e:
+                logging.error(f"Skipping {name}: {e}")
+                continue
+            if not text.strip():
+                logging.error(f"Skipping {name}: no text content found")
+                continue
+            index.add(text, kind=args.kind, name=name, source_sha=source_sha)
+        index.close()
+        print(f"Indexed {len(index) - before} new document(s); {len(index)} in total")
+        return
+
+    if args.job_description_file:
+        with open(args.job_description_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+        kind = args.kind or KIND_RESUME
+    else:
+        with open(args.resume_file, 'rb') as f:
+            text = _read_text(args.resume_file, f.read(), ingestor)
+        kind = args.kind or KIND_JOB
+
+    for position, match in enumerate(index.rank(text, kind, args.top), 1):
+        print(f"{position:3}. {match['score']:.4f}  {match['name']}")
+
+
+if __name__ == '__main__':
+    main()
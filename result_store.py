@@ -0,0 +1,53 @@
+import os
+import uuid
+import hashlib
+from analysis_cache import AnalysisCache
+
+
+class ResultStore:
+    """
+    Server-side store for finished analyses, keyed by an opaque result id, so
+    the results page and downloads reference an id instead of round-tripping
+    the resume through the browser. Rendered PDFs are cached alongside each
+    result. Backed by AnalysisCache: memory LRU plus optional SQLite, with TTL.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    @classmethod
+    def from_env(cls):
+        """Create a store configured from environment variables"""
+        return cls(AnalysisCache(
+            max_entries=int(os.environ.get('RESULT_STORE_SIZE', 500)),
+            ttl=int(os.environ.get('RESULT_STORE_TTL', 86400)),
+            db_path=os.environ.get('RESULT_STORE_DB') or None,
+            max_db_entries=int(os.environ.get('RESULT_STORE_DB_SIZE', 10000)),
+        ))
+
+    def save(self, result):
+        """Store a result dict and return its new id"""
+        result_id = uuid.uuid4().hex
+        self.cache.set(f"result:{result_id}", result)
+        return result_id
+
+    def get(self, result_id):
+        """Return the stored result, or None if unknown or expired"""
+        if not result_id:
+            return None
+        return self.cache.get(f"result:{result_id}")
+
+    def update(self, result_id, result):
+        self.cache.set(f"result:{result_id}", result)
+
+    def _pdf_key(self, result_id, text):
+        # Keyed on the text too, so a regenerated resume never gets a stale PDF
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        return f"pdf:{result_id}:{digest}"
+
+    def get_pdf(self, result_id, text):
+        """Return cached PDF bytes for this result's text, or None"""
+        return self.cache.get(self._pdf_key(result_id, text))
+
+    def set_pdf(self, result_id, text, pdf_bytes):
+        self.cache.set(self._pdf_key(result_id, text), pdf_bytes)
@@ -0,0 +1,126 @@
+import io
+from functools import lru_cache
+from xml.sax.saxutils import escape
+from resume_sections import (SECTION_HEADER, BULLET_PREFIXES, classify_heading, is_contact_line,
+                             is_name_line, segment_text)
+
+# ReportLab is imported inside the rendering functions: it is only needed for
+# downloads and is one of the slowest imports at worker start
+
+
+def is_section_header(line):
+    """Determine if a line is a section header"""
+    return classify_heading(line) is not None
+
+
+@lru_cache(maxsize=1)
+def get_styles():
+    """Build the resume paragraph styles once per process"""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    
+    styles = getSampleStyleSheet()
+
+    return {
+        'normal': styles['Normal'],
+        'name': ParagraphStyle(
+            'NameStyle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            spaceAfter=12,
+            alignment=1,  # Center alignment
+        ),
+        'section_header': ParagraphStyle(
+            'SectionHeader',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=8,
+            spaceBefore=16,
+        ),
+        'contact': ParagraphStyle(
+            'ContactStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            spaceAfter=12,
+            alignment=1  # Center alignment
+        ),
+        'bullet': ParagraphStyle(
+            'BulletStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            leftIndent=20,
+            spaceAfter=6,
+        ),
+    }
+
+
+def build_story(resume_text, sections=None):
+    """
+    Turn resume text into ReportLab flowables. Sections already split by
+    resume_sections can be passed in; otherwise the text is segmented here.
+    """
+    from reportlab.platypus import Paragraph, Spacer
+    
+    styles = get_styles()
+    story = []
+    if sections is None:
+        sections = segment_text(resume_text)
+
+    for section in sections:
+        if section['type'] == SECTION_HEADER:
+            _add_header(story, section['text'], styles)
+            continue
+
+        story.append(Spacer(1, 16))
+        # ReportLab parses paragraph text as markup, so '&' or '<' must be escaped
+        title = escape(section['title'].upper())
+        story.append(Paragraph(f'<b>{title}</b>', styles['section_header']))
+        story.append(Spacer(1, 8))
+        for line in section['text'].split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(BULLET_PREFIXES):
+                story.append(Paragraph(f'• {escape(line[1:].strip())}', styles['bullet']))
+            else:
+                story.append(Paragraph(escape(line), styles['normal']))
+                story.append(Spacer(1, 6))
+
+    return story
+
+
+def _add_header(story, text, styles):
+    """Name (the first short line), contact lines and any other opening text"""
+    from reportlab.platypus import Paragraph, Spacer
+
+    name_found = False
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if not name_found and is_name_line(line):
+            story.append(Paragraph(f'<b>{escape(line)}</b>', styles['name']))
+            story.append(Spacer(1, 12))
+            name_found = True
+        elif is_contact_line(line):
+            story.append(Paragraph(escape(line), styles['contact']))
+        else:
+            story.append(Paragraph(escape(line), styles['normal']))
+            story.append(Spacer(1, 6))
+
+
+def render_resume_pdf(resume_text, sections=None):
+    """
+    Render resume text (or its precomputed sections) to a PDF. Returns the
+    BytesIO buffer rewound to the start, ready to hand to send_file without
+    another copy.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+    
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter,
+                            rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=18)
+    doc.build(build_story(resume_text, sections))
+    buffer.seek(0)
+    return buffer
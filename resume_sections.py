@@ -0,0 +1,278 @@
+"""
+Splits a resume into typed sections once, so parsing, prompting and PDF
+rendering all agree on where each section starts. PDFs are segmented from
+PyMuPDF line layout (font size and weight); pasted text and model output
+fall back to heading heuristics on plain lines.
+"""
+import re
+from collections import Counter
+
+# Section type -> heading phrases that introduce it (lowercase)
+SECTION_TYPES = {
+    'summary': ('summary', 'professional summary', 'profile', 'professional profile', 'objective',
+                'career objective', 'about me'),
+    'experience': ('experience', 'work experience', 'professional experience', 'employment history',
+                   'employment', 'work history', 'career history', 'relevant experience'),
+    'education': ('education', 'academic background', 'education and training'),
+    'skills': ('skills', 'technical skills', 'core competencies', 'competencies', 'qualifications',
+               'technologies', 'tools', 'skills and tools'),
+    'projects': ('projects', 'personal projects', 'selected projects', 'key projects'),
+    'certifications': ('certifications', 'certificates', 'licenses', 'licenses and certifications'),
+    'awards': ('awards', 'achievements', 'honors', 'honors and awards', 'accomplishments'),
+    'publications': ('publications',),
+    'languages': ('languages',),
+    'volunteering': ('volunteer', 'volunteering', 'volunteer experience'),
+    'interests': ('interests', 'hobbies'),
+    'references': ('references',),
+}
+SECTION_HEADER = 'header'  # Name and contact lines before the first heading
+SECTION_OTHER = 'other'    # A heading that matches no known type
+
+# Types left out of model prompts; they never change the feedback
+PROMPT_EXCLUDED_TYPES = ('references',)
+
+CONTACT_KEYWORDS = ('@', 'phone', 'email', 'linkedin', 'github')
+NAME_EXCLUDE_KEYWORDS = ('email', 'phone', '@', 'linkedin', 'experience', 'education', 'skills')
+BULLET_PREFIXES = ('•', '-', '*')
+
+_ALIASES = {alias: section_type for section_type, aliases in SECTION_TYPES.items() for alias in aliases}
+_ALIAS_RE = re.compile(r'\b(' + '|'.join(sorted((re.escape(alias) for alias in _ALIASES), key=len, reverse=True)) + r')\b')
+_CONTACT_RE = re.compile('|'.join(re.escape(keyword) for keyword in CONTACT_KEYWORDS))
+_NAME_EXCLUDE_RE = re.compile('|'.join(re.escape(keyword) for keyword in NAME_EXCLUDE_KEYWORDS))
+# Markdown decoration models put around headings ("## Skills", "**EXPERIENCE:**")
+_HEADING_DECORATION = '#*_:=- \t'
+
+# A line this much larger than the body text reads as a heading
+HEADING_SIZE_RATIO = 1.12
+
+# "Skills: Python, Docker" - a section label with its content on the same line
+_INLINE_HEADING_RE = re.compile(r'^[#*_\s]*([^:]{1,40}?)[*_\s]*:[*_\s]*(\S.*)$')
+# Sections whose entries carry labelled detail lines ("Tools: Docker", "Languages: Go")
+# that belong to the entry rather than opening a section of their own
+_INLINE_DETAIL_TYPES = ('experience', 'projects', 'volunteering', 'skills')
+
+
+def heading_title(line):
+    """A line with markdown decoration and trailing colons removed"""
+    return line.strip().strip(_HEADING_DECORATION).strip()
+
+
+def section_type_for_title(title):
+    """Known section type named by a heading or feedback title, or None"""
+    match = _ALIAS_RE.search(heading_title(title).lower().replace('&', 'and'))
+    return _ALIASES[match.group(1)] if match else None
+
+
+def classify_heading(line):
+    """
+    Section type if a plain text line is a section heading, else None. A
+    heading is a short line naming a known section, or a short all-caps line
+    (typed SECTION_OTHER when it names none). A line with content after a
+    colon is not a heading; see split_inline_heading.
+    """
+    if line.lstrip().startswith(('• ', '- ', '* ')):
+        return None
+    title = heading_title(line)
+    if not title or title.endswith('.') or ':' in title or any(char.isdigit() for char in title):
+        return None
+    word_count = len(title.split())
+    section_type = section_type_for_title(title) if word_count <= 4 else None
+    if section_type:
+        return section_type
+    if word_count <= 3 and title.isupper():
+        return SECTION_OTHER
+    return None
+
+
+def split_inline_heading(line):
+    """(section type, label, content) for a "Skills: Python, SQL" line naming a known section, else None"""
+    match = _INLINE_HEADING_RE.match(line)
+    if not match:
+        return None
+    label, content = match.group(1).strip(), match.group(2).strip()
+    if len(label.split()) > 4 or is_contact_line(label):
+        return None
+    section_type = section_type_for_title(label)
+    return (section_type, label, content) if section_type else None
+
+
+def is_contact_line(line):
+    return bool(_CONTACT_RE.search(line.lower()))
+
+
+def is_name_line(line):
+    """Short line that is not contact info or a section name"""
+    return len(line.split()) <= 5 and not _NAME_EXCLUDE_RE.search(line.lower())
+
+
+def _new_section(section_type, title):
+    return {'type': section_type, 'title': title, 'lines': []}
+
+
+def _finish(sections):
+    """Drop empty preambles and join each section's lines into its text"""
+    finished = []
+    for section in sections:
+        lines = section.pop('lines')
+        while lines and not lines[-1]:
+            lines.pop()
+        section['text'] = '\n'.join(lines)
+        if section['type'] != SECTION_HEADER or section['text']:
+            finished.append(section)
+    return finished
+
+
+def segment_text(text):
+    """
+    Split plain resume text into a list of section dicts ('type', 'title',
+    'text'). Lines before the first heading form a SECTION_HEADER section.
+    """
+    lines = [raw_line.strip() for raw_line in (text or '').split('\n')]
+    return _segment(lines, lambda index: classify_heading(lines[index]))
+
+
+def _segment(lines, heading_type):
+    """
+    Group stripped lines into sections. heading_type(index) is the section
+    type lines[index] would start as a heading, or None.
+    """
+    sections = [_new_section(SECTION_HEADER, '')]
+    for index, line in enumerate(lines):
+        current = sections[-1]
+        inline = split_inline_heading(line) if line else None
+        if inline and _starts_inline_section(inline[0], current):
+            section_type, title, content = inline
+            sections.append(_new_section(section_type, title))
+            sections[-1]['lines'].append(content)
+            continue
+
+        section_type = heading_type(index) if line and not inline else None
+        if section_type == SECTION_OTHER and not _starts_other_section(lines, index, current, heading_type):
+            section_type = None
+        if section_type:
+            sections.append(_new_section(section_type, heading_title(line)))
+        elif line or (current['lines'] and current['lines'][-1]):
+            current['lines'].append(line)
+    return _finish(sections)
+
+
+def _starts_inline_section(section_type, current):
+    if current['type'] == SECTION_HEADER:
+        return True
+    return section_type != current['type'] and current['type'] not in _INLINE_DETAIL_TYPES
+
+
+def _starts_other_section(lines, index, current, heading_type):
+    """
+    Whether an unrecognized heading-like line (short, all caps or set large)
+    really opens a section. Acronym lines ("MBA", "BS CS", "AWS"), a line
+    straight under another heading or the name, and a line followed by no
+    content of its own are read as part of the current section instead.
+    """
+    if not any(current['lines']):
+        return False
+    if not any(len(word) >= 4 for word in heading_title(lines[index]).split()):
+        return False
+    for following in range(index + 1, len(lines)):
+        if lines[following]:
+            return not heading_type(following) and not split_inline_heading(lines[following])
+    return False
+
+
+def page_lines(page, flags=None):
+    """
+    Text lines of a PyMuPDF page as [text, font size, bold] lists, in reading
+    order. Small enough to send back from a worker process.
+    """
+    if flags is None:
+        import fitz  # PyMuPDF
+        flags = fitz.TEXTFLAGS_TEXT
+    lines = []
+    for block in page.get_text("dict", flags=flags)['blocks']:
+        for line in block.get('lines', ()):
+            spans = [span for span in line['spans'] if span['text'].strip()]
+            if not spans:
+                continue
+            text = ''.join(span['text'] for span in line['spans'])
+            size = max(span['size'] for span in spans)
+            # Font flag bit 4 is bold
+            bold = all(span['flags'] & 16 or 'bold' in span['font'].lower() for span in spans)
+            lines.append([text, round(size, 1), bool(bold)])
+    return lines
+
+
+def lines_to_text(lines):
+    """Plain page text for lines from page_lines()"""
+    return '\n'.join(text for text, _, _ in lines)
+
+
+def segment_layout(lines):
+    """
+    Split [text, size, bold] lines (from page_lines, across all pages) into
+    sections. Besides the text heuristics, a short line set in a noticeably
+    larger font, or all bold and all caps, is a heading. The largest line near
+    the top is the candidate's name, not a heading.
+    """
+    sizes = Counter()
+    for text, size, _ in lines:
+        if text.strip():
+            sizes[size] += len(text)
+    if not sizes:
+        return []
+    body_size = sizes.most_common(1)[0][0]
+
+    content = [index for index, (text, _, _) in enumerate(lines) if text.strip()]
+    top = content[:3]
+    name_index = max(top, key=lambda index: lines[index][1]) if top else None
+
+    stripped = [text.strip() for text, _, _ in lines]
+
+    def heading_type(index):
+        line = stripped[index]
+        if index == name_index:
+            return None
+        section_type = classify_heading(line)
+        if section_type is None and _looks_like_layout_heading(line, lines[index][1], lines[index][2], body_size):
+            section_type = section_type_for_title(line) or SECTION_OTHER
+        return section_type
+
+    return _segment(stripped, heading_type)
+
+
+def _looks_like_layout_heading(line, size, bold, body_size):
+    title = heading_title(line)
+    if not title or title.endswith(('.', ',')) or ':' in title or len(title.split()) > 5 or is_contact_line(title):
+        return False
+    if any(char.isdigit() for char in title):
+        return False
+    return size >= body_size * HEADING_SIZE_RATIO or (bold and title.isupper())
+
+
+def format_for_prompt(sections, excluded_types=PROMPT_EXCLUDED_TYPES):
+    """
+    Resume text for a model prompt, one labeled block per relevant section.
+    A section with no body is still listed by its label and title.
+    """
+    blocks = []
+    for section in sections:
+        if section['type'] in excluded_types:
+            continue
+        if section['type'] == SECTION_HEADER:
+            if section['text']:
+                blocks.append(section['text'])
+            continue
+        label = f"[{section['type'].upper()}]"
+        # The heading itself only adds information when it is not just the type name
+        if section['title'].lower() != section['type']:
+            label += f" {section['title']}"
+        blocks.append(f"{label}\n{section['text']}" if section['text'] else label)
+    return '\n\n'.join(blocks)
+
+
+def section_types(sections):
+    """Distinct section types in document order, without the header"""
+    seen = []
+    for section in sections:
+        if section['type'] != SECTION_HEADER and section['type'] not in seen:
+            seen.append(section['type'])
+    return seen
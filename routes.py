@@ -1,56 +1,335 @@
 import os
+import asyncio
 import logging
-from flask import render_template, request, flash, redirect, url_for, jsonify, send_file
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from flask import render_template, request, flash, redirect, url_for, jsonify, send_file, Response, stream_with_context
 from werkzeug.utils import secure_filename
 from werkzeug.datastructures import FileStorage
-from app import app
+from app import app, request_logger, REQUEST_LOG_LEVEL
 from gemini_service import GeminiResumeAnalyzer
 from pdf_parser import PDFParser
+from pdf_engine import PDFExtractionEngine
+from ingestion import Ingestor, IngestionError
+from job_queue import JobQueue, JOB_DONE, JOB_FAILED
+from result_store import ResultStore
+from llm_client import LLMUnavailableError
+from llm_backends import configured_backend_name
+from local_analysis import LocalAnalyzer
+from batch_analyzer import BatchAnalyzer, write_jsonl, write_csv
 import tempfile
+import time
+import zipfile
+import shutil
 import io
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.units import inch
+import uuid
+import json
+from resume_renderer import render_resume_pdf
+from resume_sections import segment_text
+from incremental_analysis import plan_reanalysis
+import metrics
+from metrics import timed, CACHE_EVENTS, BYTES_PROCESSED
 
-# Initialize services
-gemini_analyzer = GeminiResumeAnalyzer()
-pdf_parser = PDFParser()
+# Cheap services are created at import; the model client, PDF parser and
+# batch analyzer are created on first use, once per worker process
+job_queue = JobQueue.from_env()
+# Batches run for minutes, so they get their own small queue instead of taking
+# analysis threads; results are written to a file kept as long as the job
+batch_queue = JobQueue(max_workers=int(os.environ.get('BATCH_JOBS', 1)),
+                       ttl=int(os.environ.get('BATCH_JOB_TTL', 3600)), max_jobs=100)
+BATCH_FORMATS = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+result_store = ResultStore.from_env()
+local_analyzer = LocalAnalyzer()
 
-ALLOWED_EXTENSIONS = {'pdf', 'txt'}
+_services = {}
+_services_lock = threading.Lock()
+
+def _get_service(name, factory):
+    service = _services.get(name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(name)
+            if service is None:
+                service = _services[name] = factory()
+    return service
+
+def _create_pdf_parser():
+    # Extract PDFs in a separate process pool unless explicitly disabled
+    if os.environ.get('PDF_PROCESS_POOL', 'true').lower() in ('1', 'true', 'yes'):
+        return PDFParser(engine=PDFExtractionEngine.from_env(), layout=_pdf_layout_enabled())
+    return PDFParser(max_pages=int(os.environ.get('PDF_MAX_PAGES', 50)), layout=_pdf_layout_enabled())
+
+def _pdf_layout_enabled():
+    # Font sizes and weights find headings the plain-text heuristics miss
+    return os.environ.get('PDF_LAYOUT_SECTIONS', 'true').lower() in ('1', 'true', 'yes')
+
+def get_analyzer():
+    """The worker's GeminiResumeAnalyzer; a missing API key fails here, not at boot"""
+    return _get_service('analyzer', GeminiResumeAnalyzer)
+
+def get_pdf_parser():
+    return _get_service('pdf_parser', _create_pdf_parser)
+
+def get_ingestor():
+    """Upload reader for every supported format; PDFs go through the worker's PDF parser settings"""
+    parser = get_pdf_parser()
+    return _get_service('ingestor', lambda: Ingestor.from_env(parser))
+
+def get_cpu_executor():
+    """Threads for parsing and rendering off the event loop (ASGI mode)"""
+    return _get_service('cpu_executor', lambda: ThreadPoolExecutor(
+        max_workers=int(os.environ.get('ASGI_CPU_WORKERS', 4)), thread_name_prefix='cpu'))
+
+def get_batch_analyzer():
+    analyzer, parser = get_analyzer(), get_pdf_parser()
+    return _get_service('batch_analyzer', lambda: BatchAnalyzer.from_env(analyzer, parser))
+
+def warm_up():
+    """
+    Import the PDF parsing and rendering stacks and build the shared styles
+    ahead of the first request. Creates no threads, processes or network
+    clients, so it is safe in the gunicorn master before workers fork.
+    """
+    import fitz  # noqa: F401  PyMuPDF
+    from resume_renderer import get_styles
+    get_styles()
+    if configured_backend_name() == 'gemini':
+        try:
+            import google.generativeai  # noqa: F401
+        except ImportError:
+            pass
+
+def _llm_metric(name):
+    analyzer = _services.get('analyzer')
+    if analyzer is None or not hasattr(analyzer.model, 'get_metrics'):
+        return 0
+    return analyzer.model.get_metrics()[name]
+
+metrics.REGISTRY.register(metrics.CallbackGauge(
+    'resume_jobs_pending', 'Background analysis jobs queued or running', job_queue.pending_count))
+metrics.REGISTRY.register(metrics.CallbackGauge(
+    'resume_llm_in_flight', 'Model calls currently in flight', lambda: _llm_metric('in_flight')))
+metrics.REGISTRY.register(metrics.CallbackGauge(
+    'resume_llm_queue_depth', 'Model calls waiting for a rate-limit token or slot',
+    lambda: _llm_metric('queue_depth')))
+
+ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def is_section_header(line):
-    """Determine if a line is a section header"""
-    section_keywords = [
-        'experience', 'education', 'skills', 'summary', 'objective',
-        'projects', 'certifications', 'achievements', 'awards',
-        'publications', 'languages', 'interests', 'references',
-        'professional experience', 'work experience', 'employment history',
-        'technical skills', 'core competencies', 'qualifications'
-    ]
+@app.route('/')
+def index():
+    # "Edit & re-analyze" links back here with the previous result to prefill the form
+    previous_id = request.args.get('previous', '')
+    previous = result_store.get(previous_id) if previous_id else None
+    if previous is None:
+        return render_template('index.html')
+    return render_template('index.html', previous_result_id=previous_id, job_role=previous['job_role'],
+                           job_description=previous['job_description'], resume_text=previous['original_resume'])
+
+class SubmissionError(Exception):
+    """Analysis failure carrying a message that is safe to show the user"""
+    user_message = True
+
+def read_upload(file):
+    """
+    Read an uploaded file into memory. Uploads larger than
+    UPLOAD_SPOOL_THRESHOLD are spooled to a temp file instead; returns
+    (data, None) or (None, spooled_path).
+    """
+    threshold = app.config['UPLOAD_SPOOL_THRESHOLD']
+    with timed('upload_read'):
+        data = file.stream.read(threshold + 1)
+        
+        if len(data) <= threshold:
+            BYTES_PROCESSED.inc(len(data), kind='upload')
+            return data, None
+        
+        spool = tempfile.NamedTemporaryFile(dir=app.config['UPLOAD_FOLDER'], delete=False)
+        try:
+            spool.write(data)
+            shutil.copyfileobj(file.stream, spool)
+        finally:
+            spool.close()
+        BYTES_PROCESSED.inc(os.path.getsize(spool.name), kind='upload')
+        return None, spool.name
+
+def process_submission(upload_data, upload_path, filename, resume_text, job_role, job_description,
+                       previous_result_id=None):
+    """
+    Parse an uploaded resume (if any) and analyze it. Runs either inline or on
+    the background job queue; a spooled upload is always removed afterwards.
+    An edit of the result previous_result_id for the same job is re-analyzed
+    incrementally.
+    """
+    resume_content, sections = parse_submission(upload_data, upload_path, filename, resume_text)
+    local_analysis, previous, plan = plan_submission(resume_content, sections, job_role, job_description,
+                                                     previous_result_id)
+    stream = app.config['STREAM_IMPROVED_RESUME']
     
-    line_lower = line.lower().strip()
+    # Analyze resume with Gemini
+    try:
+        if plan is not None:
+            analysis = get_analyzer().reanalyze_resume(resume_content, job_role, job_description, sections,
+                                                       previous, plan, include_improved_resume=not stream,
+                                                       local_analysis=local_analysis)
+        else:
+            analysis = get_analyzer().analyze_resume(resume_content, job_role, job_description,
+                                                     include_improved_resume=not stream,
+                                                     local_analysis=local_analysis, sections=sections)
+    except Exception as e:
+        raise _analysis_failed(e)
     
-    # Check if line contains section keywords and is relatively short
-    if len(line.split()) <= 4:
-        for keyword in section_keywords:
-            if keyword in line_lower:
-                return True
+    return save_submission(analysis, resume_content, sections, job_role, job_description)
+
+async def process_submission_async(upload_data, upload_path, filename, resume_text, job_role, job_description,
+                                   previous_result_id=None):
+    """
+    process_submission for the event loop: parsing and segmenting run on the
+    CPU pool and the model calls are awaited, so a waiting analysis holds no
+    thread.
+    """
+    resume_content, sections = await _off_loop(get_cpu_executor(), parse_submission,
+                                               upload_data, upload_path, filename, resume_text)
+    # Reads the result store, which may be SQLite-backed
+    local_analysis, previous, plan = await _off_loop(None, plan_submission, resume_content, sections,
+                                                     job_role, job_description, previous_result_id)
+    stream = app.config['STREAM_IMPROVED_RESUME']
     
-    # Check if line is all caps (common for section headers)
-    if line.isupper() and len(line.split()) <= 3:
-        return True
-        
-    return False
+    try:
+        if plan is not None:
+            analysis = await get_analyzer().reanalyze_resume_async(
+                resume_content, job_role, job_description, sections, previous, plan,
+                include_improved_resume=not stream, local_analysis=local_analysis)
+        else:
+            analysis = await get_analyzer().analyze_resume_async(
+                resume_content, job_role, job_description, include_improved_resume=not stream,
+                local_analysis=local_analysis, sections=sections)
+    except Exception as e:
+        raise _analysis_failed(e)
+    
+    return await _off_loop(None, save_submission, analysis, resume_content, sections, job_role, job_description)
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+async def _off_loop(executor, func, *args):
+    """
+    Run blocking work on executor (None for the loop's default thread pool).
+    copy_context keeps the job's stage timings and progress reporting working
+    in the pool thread.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, contextvars.copy_context().run, func, *args)
+
+def parse_submission(upload_data, upload_path, filename, resume_text):
+    """(resume text, sections) from an upload, or from the pasted text when there is none"""
+    resume_content = ""
+    sections = None
+    
+    if upload_data is not None or upload_path:
+        try:
+            # Parse straight from memory when possible; spooled uploads are streamed from disk
+            parsed = get_ingestor().ingest(upload_path or upload_data, filename)
+            resume_content, sections = parsed['text'], parsed['sections']
+        except IngestionError as e:
+            metrics.ERRORS.inc(stage='upload_parse')
+            logging.warning(f"Rejected upload {filename}: {e}")
+            raise SubmissionError(str(e))
+        except Exception as e:
+            metrics.ERRORS.inc(stage='upload_parse')
+            logging.error(f"Error processing uploaded file: {e}")
+            raise SubmissionError('Error processing uploaded file. Please try again.')
+        finally:
+            # Clean up spooled upload
+            if upload_path and os.path.exists(upload_path):
+                os.remove(upload_path)
+    
+    # Use text input if no file uploaded or file processing failed
+    if not resume_content and resume_text:
+        resume_content = resume_text
+    
+    if not resume_content:
+        raise SubmissionError('Please provide a resume either by uploading a file or pasting the text.')
+    
+    # Split into sections once; prompts and later re-analysis reuse them
+    if sections is None:
+        with timed('segment_sections'):
+            sections = segment_text(resume_content)
+    return resume_content, sections
+
+def plan_submission(resume_content, sections, job_role, job_description, previous_result_id=None):
+    """
+    Local keyword analysis (reported as job progress) and, for an edit of
+    previous_result_id, the stored result and the incremental re-analysis plan
+    """
+    # The keyword match takes milliseconds; pending pages show it while the model runs
+    with timed('local_analysis'):
+        local_analysis = local_analyzer.analyze(resume_content, job_description, job_role)
+    job_queue.report_progress({'local_analysis': local_analysis})
+    
+    previous = plan = None
+    if previous_result_id and app.config['INCREMENTAL_ANALYSIS']:
+        previous = result_store.get(previous_result_id)
+        plan = plan_reanalysis(previous, sections, job_role, job_description,
+                               app.config['INCREMENTAL_MAX_CHANGE'])
+        if plan is not None:
+            previous = dict(previous, result_id=previous_result_id)
+    return local_analysis, previous, plan
+
+def _analysis_failed(error):
+    logging.error(f"Error analyzing resume with Gemini: {error}")
+    if isinstance(error.__cause__, LLMUnavailableError):
+        return SubmissionError('The AI service is busy right now. Please try again in a minute.')
+    return SubmissionError('Error analyzing resume. Please check your API configuration and try again.')
+
+def save_submission(analysis, resume_content, sections, job_role, job_description):
+    """Store an analysis and return the result the results page is rendered from"""
+    result = {
+        'analysis': analysis,
+        'job_role': job_role,
+        'job_description': job_description,
+        'original_resume': resume_content,
+        'sections': sections
+    }
+    result_id = result_store.save(result)
+    result['result_id'] = result_id
+    
+    # The results page streams the improved resume separately over SSE
+    if app.config['STREAM_IMPROVED_RESUME'] and not analysis.get('improved_resume'):
+        result['stream_id'] = result_id
+    
+    return result
+
+def run_submission_job(*args):
+    """process_submission on the job queue, with its own structured timing log"""
+    metrics.start_timings()
+    status = 'ok'
+    try:
+        return process_submission(*args)
+    except Exception:
+        status = 'error'
+        raise
+    finally:
+        _log_job_timings(status)
+
+async def run_submission_job_async(*args):
+    """process_submission_async as a job on the queue's event loop"""
+    metrics.start_timings()
+    status = 'ok'
+    try:
+        return await process_submission_async(*args)
+    except Exception:
+        status = 'error'
+        raise
+    finally:
+        _log_job_timings(status)
+
+def _log_job_timings(status):
+    stages = metrics.finish_timings()
+    if request_logger.isEnabledFor(REQUEST_LOG_LEVEL):
+        request_logger.log(REQUEST_LOG_LEVEL, json.dumps({'job': 'analysis', 'status': status,
+                                                          'stages_ms': stages}))
 
 @app.route('/analyze', methods=['POST'])
 def analyze_resume():
@@ -59,14 +338,17 @@ def analyze_resume():
         job_role = request.form.get('job_role', '').strip()
         job_description = request.form.get('job_description', '').strip()
         resume_text = request.form.get('resume_text', '').strip()
+        # Only an explicit "Edit & Re-analyze" resubmission is diffed against the result being edited
+        previous_result_id = request.form.get('previous_result_id')
         
         # Validate required fields
         if not job_role:
             flash('Please provide a target job role.', 'error')
             return redirect(url_for('index'))
         
-        # Get resume content
-        resume_content = ""
+        upload_data = None
+        upload_path = None
+        filename = None
         
         # Check if file was uploaded
         if 'resume_file' in request.files:
@@ -74,56 +356,269 @@ def analyze_resume():
             if file and file.filename and allowed_file(file.filename):
                 try:
                     filename = secure_filename(file.filename)
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                    file.save(filepath)
-                    
-                    # Parse PDF or text file
-                    if filename.lower().endswith('.pdf'):
-                        resume_content = pdf_parser.extract_text_from_pdf(filepath)
-                    else:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            resume_content = f.read()
-                    
-                    # Clean up uploaded file
-                    os.remove(filepath)
-                    
+                    upload_data, upload_path = read_upload(file)
                 except Exception as e:
-                    logging.error(f"Error processing uploaded file: {e}")
+                    logging.error(f"Error reading uploaded file: {e}")
                     flash('Error processing uploaded file. Please try again.', 'error')
                     return redirect(url_for('index'))
         
-        # Use text input if no file uploaded or file processing failed
-        if not resume_content and resume_text:
-            resume_content = resume_text
-        
-        if not resume_content:
+        if upload_data is None and not upload_path and not resume_text:
             flash('Please provide a resume either by uploading a file or pasting the text.', 'error')
             return redirect(url_for('index'))
         
-        # Analyze resume with Gemini
+        if app.config['ASYNC_ANALYSIS']:
+            # Under the ASGI server the analysis runs as a task on its event loop
+            runner = run_submission_job_async if job_queue.has_event_loop() else run_submission_job
+            job_id = job_queue.submit(runner, upload_data, upload_path, filename,
+                                      resume_text, job_role, job_description, previous_result_id)
+            return redirect(url_for('job_status', job_id=job_id))
+        
         try:
-            analysis = gemini_analyzer.analyze_resume(resume_content, job_role, job_description)
-            
-            return render_template('results.html', 
-                                 analysis=analysis,
-                                 job_role=job_role,
-                                 original_resume=resume_content)
-                                 
-        except Exception as e:
-            logging.error(f"Error analyzing resume with Gemini: {e}")
-            flash('Error analyzing resume. Please check your API configuration and try again.', 'error')
+            result = process_submission(upload_data, upload_path, filename,
+                                        resume_text, job_role, job_description, previous_result_id)
+        except SubmissionError as e:
+            flash(str(e), 'error')
             return redirect(url_for('index'))
+        
+        with timed('render_template'):
+            return render_template('results.html', **result)
     
     except Exception as e:
         logging.error(f"Unexpected error in analyze_resume: {e}")
         flash('An unexpected error occurred. Please try again.', 'error')
         return redirect(url_for('index'))
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Show results for a finished job, or a polling page while it runs"""
+    job = job_queue.get(job_id)
+    
+    if job is None:
+        flash('This analysis has expired or does not exist. Please submit your resume again.', 'error')
+        return redirect(url_for('index'))
+    
+    if job['status'] == JOB_DONE:
+        with timed('render_template'):
+            return render_template('results.html', **job['result'])
+    
+    if job['status'] == JOB_FAILED:
+        flash(job['error'] or 'An unexpected error occurred. Please try again.', 'error')
+        return redirect(url_for('index'))
+    
+    return render_template('job_pending.html', job_id=job_id)
+
+@app.route('/jobs/<job_id>/status')
+def job_status_json(job_id):
+    """Lightweight status endpoint polled by the pending page"""
+    job = job_queue.get(job_id)
+    
+    if job is None:
+        return jsonify({'status': 'unknown'}), 404
+    
+    status = {
+        'status': job['status'],
+        'result_url': url_for('job_status', job_id=job_id)
+    }
+    if job['progress']:
+        status.update(job['progress'])
+    return jsonify(status)
+
+@app.route('/batch_analyze', methods=['POST'])
+def batch_analyze():
+    """
+    Queue a zip of PDF/DOCX/TXT resumes for analysis against one job
+    role/description. Returns 202 with the job's status URL; the JSONL
+    (default) or CSV results are downloaded once it is done.
+    """
+    job_role = request.form.get('job_role', '').strip()
+    job_description = request.form.get('job_description', '').strip()
+    output_format = request.form.get('format', 'jsonl').lower()
+    shortlist = request.form.get('shortlist', '').strip()
+    archive = request.files.get('resumes_zip')
+    
+    if not job_role:
+        return jsonify({'error': 'job_role is required'}), 400
+    if not archive or not archive.filename or not archive.filename.lower().endswith('.zip'):
+        return jsonify({'error': 'resumes_zip must be a .zip file'}), 400
+    if output_format not in BATCH_FORMATS:
+        return jsonify({'error': 'format must be jsonl or csv'}), 400
+    if shortlist and (not shortlist.isdigit() or int(shortlist) < 1):
+        return jsonify({'error': 'shortlist must be a positive integer'}), 400
+    
+    _remove_expired_batch_results()
+    token = uuid.uuid4().hex
+    archive_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{token}_batch.zip")
+    archive.save(archive_path)
+    
+    # Limits are checked from the zip's directory now, so a bad archive is a 400, not a failed job
+    try:
+        if not zipfile.is_zipfile(archive_path):
+            raise ValueError('resumes_zip is not a valid zip file')
+        get_batch_analyzer().check_source(archive_path)
+    except ValueError as e:
+        os.remove(archive_path)
+        return jsonify({'error': str(e)}), 400
+    
+    output_path = os.path.abspath(os.path.join(app.config['UPLOAD_FOLDER'], f"{token}_batch_results.{output_format}"))
+    job_id = batch_queue.submit(run_batch_job, archive_path, output_path, output_format, job_role,
+                                job_description, int(shortlist) if shortlist else None)
+    return jsonify({'job_id': job_id, 'status': 'pending',
+                    'status_url': url_for('batch_job_status', job_id=job_id)}), 202
+
+def run_batch_job(archive_path, output_path, output_format, job_role, job_description, shortlist):
+    """Analyze a saved batch archive into output_path; returns the result file's details"""
+    processed = 0
+    
+    def counted(results):
+        nonlocal processed
+        for result in results:
+            yield result
+            processed += 1
+            batch_queue.report_progress({'processed': processed})
+    
+    try:
+        results = counted(get_batch_analyzer().run(archive_path, job_role, job_description, shortlist=shortlist))
+        with open(output_path, 'w', encoding='utf-8', newline='') as out:
+            if output_format == 'csv':
+                write_csv(results, out)
+            else:
+                write_jsonl(results, out)
+    except Exception:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    finally:
+        if os.path.exists(archive_path):
+            os.remove(archive_path)
+    return {'path': output_path, 'format': output_format, 'processed': processed}
+
+def _remove_expired_batch_results():
+    """Delete result files of batch jobs older than the batch job TTL"""
+    cutoff = time.time() - batch_queue.ttl
+    folder = app.config['UPLOAD_FOLDER']
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if '_batch_results.' in name and os.path.getmtime(path) < cutoff:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+@app.route('/batch_jobs/<job_id>')
+def batch_job_status(job_id):
+    """Progress of a batch job, with its download URL once done"""
+    job = batch_queue.get(job_id)
+    
+    if job is None:
+        return jsonify({'status': 'unknown'}), 404
+    
+    status = {'status': job['status'], 'processed': (job['progress'] or {}).get('processed', 0)}
+    if job['status'] == JOB_DONE:
+        status['processed'] = job['result']['processed']
+        status['download_url'] = url_for('batch_job_download', job_id=job_id)
+    elif job['status'] == JOB_FAILED:
+        status['error'] = job['error']
+    return jsonify(status)
+
+@app.route('/batch_jobs/<job_id>/download')
+def batch_job_download(job_id):
+    """The JSONL or CSV results of a finished batch job"""
+    job = batch_queue.get(job_id)
+    
+    if job is None or job['status'] != JOB_DONE or not os.path.exists(job['result']['path']):
+        return jsonify({'error': 'No results for this batch job'}), 404
+    
+    output_format = job['result']['format']
+    return send_file(job['result']['path'], mimetype=BATCH_FORMATS[output_format], as_attachment=True,
+                     download_name=f'batch_results.{output_format}')
+
+def _sse_event(data, event=None):
+    """Format one Server-Sent Events message"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+@app.route('/stream_improved_resume/<stream_id>')
+def stream_improved_resume(stream_id):
+    """Stream the improved resume to the results page as Server-Sent Events"""
+    result = result_store.get(stream_id)
+    
+    if result is None:
+        return Response(_sse_event({'message': 'This analysis has expired. Please submit your resume again.'}, 'error'),
+                        mimetype='text/event-stream')
+    
+    analysis = result['analysis']
+    
+    def generate():
+        # A reconnecting browser gets the finished text instead of a second generation
+        if analysis.get('improved_resume'):
+            yield _sse_event({'text': analysis['improved_resume']})
+            yield _sse_event({}, 'done')
+            return
+        
+        chunks = []
+        try:
+            for chunk in get_analyzer().stream_improved_resume(
+                    result['original_resume'], result['job_role'],
+                    result['job_description'], analysis, result.get('sections')):
+                chunks.append(chunk)
+                yield _sse_event({'text': chunk})
+        except Exception as e:
+            logging.error(f"Error streaming improved resume: {e}")
+            yield _sse_event({'message': 'Error generating improved resume. Please try again.'}, 'error')
+            return
+        
+        analysis['improved_resume'] = ''.join(chunks)
+        result_store.update(stream_id, result)
+        yield _sse_event({}, 'done')
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+async def improved_resume_events(stream_id):
+    """
+    The stream_improved_resume events as an async generator, for the ASGI
+    server to send straight from its event loop
+    """
+    result = await _off_loop(None, result_store.get, stream_id)
+    if result is None:
+        yield _sse_event({'message': 'This analysis has expired. Please submit your resume again.'}, 'error')
+        return
+    
+    analysis = result['analysis']
+    if analysis.get('improved_resume'):
+        yield _sse_event({'text': analysis['improved_resume']})
+        yield _sse_event({}, 'done')
+        return
+    
+    chunks = []
+    try:
+        async for chunk in get_analyzer().stream_improved_resume_async(
+                result['original_resume'], result['job_role'],
+                result['job_description'], analysis, result.get('sections')):
+            chunks.append(chunk)
+            yield _sse_event({'text': chunk})
+    except Exception as e:
+        logging.error(f"Error streaming improved resume: {e}")
+        yield _sse_event({'message': 'Error generating improved resume. Please try again.'}, 'error')
+        return
+    
+    analysis['improved_resume'] = ''.join(chunks)
+    await _off_loop(None, result_store.update, stream_id, result)
+    yield _sse_event({}, 'done')
+
 @app.route('/download_improved_resume', methods=['POST'])
 def download_improved_resume():
     try:
-        improved_resume = request.form.get('improved_resume', '')
-        job_role = request.form.get('job_role', 'Professional')
+        result_id = request.form.get('result_id', '')
+        result = result_store.get(result_id)
+        
+        if result is not None:
+            improved_resume = result['analysis'].get('improved_resume', '')
+            job_role = result['job_role'] or 'Professional'
+        else:
+            # Older pages and API clients still post the resume text itself
+            improved_resume = request.form.get('improved_resume', '')
+            job_role = request.form.get('job_role', 'Professional')
         
         logging.info(f"PDF download request - job_role: {job_role}, resume length: {len(improved_resume)}")
         
@@ -132,93 +627,21 @@ def download_improved_resume():
             flash('No improved resume content available for download.', 'error')
             return redirect(url_for('index'))
         
-        # Create PDF
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter,
-                              rightMargin=72, leftMargin=72,
-                              topMargin=72, bottomMargin=18)
-        
-        # Create custom styles for resume formatting
-        styles = getSampleStyleSheet()
-        
-        # Define custom styles
-        name_style = ParagraphStyle(
-            'NameStyle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=12,
-            alignment=1,  # Center alignment
-        )
+        pdf_bytes = result_store.get_pdf(result_id, improved_resume) if result is not None else None
         
-        section_header_style = ParagraphStyle(
-            'SectionHeader',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=8,
-            spaceBefore=16,
-        )
-        
-        contact_style = ParagraphStyle(
-            'ContactStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=12,
-            alignment=1  # Center alignment
-        )
-        
-        bullet_style = ParagraphStyle(
-            'BulletStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            leftIndent=20,
-            spaceAfter=6,
-        )
-        
-        # Simplified PDF generation with basic formatting
-        story = []
-        lines = improved_resume.split('\n')
-        name_found = False
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Detect name (first significant line)
-            if not name_found and len(line.split()) <= 5 and not any(keyword in line.lower() for keyword in ['email', 'phone', '@', 'linkedin', 'experience', 'education', 'skills']):
-                story.append(Paragraph(f'<b>{line}</b>', name_style))
-                name_found = True
-                story.append(Spacer(1, 12))
-                continue
-            
-            # Detect contact information
-            if any(keyword in line.lower() for keyword in ['@', 'phone', 'email', 'linkedin', 'github']):
-                story.append(Paragraph(line, contact_style))
-                continue
-                
-            # Detect section headers
-            if is_section_header(line):
-                story.append(Spacer(1, 16))
-                story.append(Paragraph(f'<b>{line.upper()}</b>', section_header_style))
-                story.append(Spacer(1, 8))
-                continue
-            
-            # Detect bullet points
-            if line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                clean_line = line[1:].strip()
-                story.append(Paragraph(f'• {clean_line}', bullet_style))
-                continue
-            
-            # Regular content
-            if line:
-                story.append(Paragraph(line, styles['Normal']))
-                story.append(Spacer(1, 6))
-        
-        doc.build(story)
-        buffer.seek(0)
+        if pdf_bytes is not None:
+            CACHE_EVENTS.inc(cache='pdf', result='hit')
+            buffer = io.BytesIO(pdf_bytes)
+        else:
+            CACHE_EVENTS.inc(cache='pdf', result='miss')
+            with timed('render_pdf'):
+                buffer = render_resume_pdf(improved_resume)
+            BYTES_PROCESSED.inc(buffer.getbuffer().nbytes, kind='rendered_pdf')
+            if result is not None:
+                result_store.set_pdf(result_id, improved_resume, buffer.getvalue())
         
         return send_file(
-            io.BytesIO(buffer.getvalue()),
+            buffer,
             as_attachment=True,
             download_name=f'improved_resume_{job_role.replace(" ", "_").lower()}.pdf',
             mimetype='application/pdf'
@@ -229,6 +652,35 @@ def download_improved_resume():
         flash('Error generating PDF. Please try again.', 'error')
         return redirect(url_for('index'))
 
+@app.route('/cache_stats')
+def cache_stats():
+    """Report analysis cache hit/miss counters"""
+    analyzer = _services.get('analyzer')
+    if analyzer is None:
+        return jsonify({'initialized': False})
+    return jsonify(analyzer.cache.get_stats())
+
+@app.route('/analysis_stats')
+def analysis_stats():
+    """Report latency per analysis execution mode and LLM client queue/retry counters"""
+    analyzer = _services.get('analyzer')
+    if analyzer is None:
+        return jsonify({'initialized': False})
+    stats = {
+        'mode': analyzer.mode,
+        'latency': analyzer.get_latency_stats()
+    }
+    if hasattr(analyzer.model, 'get_metrics'):
+        stats['llm_client'] = analyzer.model.get_metrics()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text-format metrics for this worker process"""
+    if not metrics.ENABLED:
+        return jsonify({'error': 'metrics are disabled'}), 404
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.errorhandler(413)
 def too_large(e):
     flash('File too large. Please upload a file smaller than 16MB.', 'error')
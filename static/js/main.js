@@ -50,7 +50,7 @@ function initializeFileHandling() {
 // File validation
 function validateFile(file) {
     const maxSize = 16 * 1024 * 1024; // 16MB
-    const allowedTypes = ['.pdf', '.txt'];
+    const allowedTypes = ['.pdf', '.docx', '.txt'];
     const fileExtension = '.' + file.name.split('.').pop().toLowerCase();
     
     if (file.size > maxSize) {
@@ -59,7 +59,7 @@ function validateFile(file) {
     }
     
     if (!allowedTypes.includes(fileExtension)) {
-        showAlert('Please upload a PDF or TXT file only.', 'error');
+        showAlert('Please upload a PDF, DOCX or TXT file only.', 'error');
         return false;
     }
     